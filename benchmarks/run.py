@@ -0,0 +1,418 @@
+import argparse
+import inspect
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from stub_api import StubApi
+from synthetic import iter_findings, write_contracts
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Bump when the layout of the results file changes.
+RESULTS_VERSION = 1
+
+PRESETS = {
+    "small": {"functions": 200, "findings": 1000},
+    "medium": {"functions": 2000, "findings": 5000},
+    "large": {"functions": 20000, "findings": 50000},
+}
+
+SCENARIOS = [
+    "sync",
+    "sync_incremental",
+    "scan",
+    "per_function",
+    "per_function_cached",
+    "per_function_similar",
+    "per_function_matrix",
+    "unique",
+]
+
+# Same defaults as `audit-helper scan --per-function`.
+PER_FUNCTION_OPTIONS = {"limit": 5, "min_overlap": 5, "min_core_overlap": 2}
+
+
+class Skip(Exception):
+    pass
+
+
+def _accepts(fn: Callable, *names: str) -> bool:
+    params = inspect.signature(fn).parameters
+    return all(name in params for name in names)
+
+
+def _require(fn: Callable, *names: str) -> None:
+    params = inspect.signature(fn).parameters
+    missing = [name for name in names if name not in params]
+    if missing:
+        raise Skip(f"{fn.__module__}.{fn.__name__} has no {', '.join(missing)} option")
+
+
+@contextmanager
+def _closing(obj: Any) -> Iterator[Any]:
+    # Older trees have no close() on the index or client.
+    try:
+        yield obj
+    finally:
+        if hasattr(obj, "close"):
+            obj.close()
+
+
+def _git(src: str, *args: str) -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "-C", src, *args], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def _copy_db(src: str, dst: str) -> None:
+    # Through the backup API, so pages still in the WAL are included.
+    source = sqlite3.connect(src)
+    target = sqlite3.connect(dst)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+
+
+def _per_function_signature() -> Callable:
+    # The iterator takes every option where it exists (some trees only
+    # forward **options from the scan to it); older trees spell the options
+    # out on the scan itself.
+    import audit
+
+    return getattr(audit, "iter_local_index_per_function", audit.scan_local_index_per_function)
+
+
+def _count_matches(results: List[dict]) -> int:
+    return sum(len(entry.get("findings") or []) for entry in results)
+
+
+class Bench:
+    def __init__(self, args: argparse.Namespace, work: str, api: StubApi) -> None:
+        self.args = args
+        self.work = work
+        self.api = api
+        self.repo = os.path.join(work, "repo")
+        self.db_path = os.path.join(work, "findings.sqlite")
+        self.files = write_contracts(self.repo, functions=args.functions, per_file=args.functions_per_file, seed=args.seed)
+        self._runs = 0
+        # Everything the code under test reads from the environment points
+        # into the work directory; nothing touches ~/.cache.
+        os.environ.update(
+            {
+                "SOLODIT_API_KEY": "benchmark",
+                "SOLODIT_FINDINGS_DB_PATH": self.db_path,
+                "SOLODIT_CACHE_PATH": os.path.join(work, "cache.sqlite"),
+                "SOLODIT_SCAN_CACHE_PATH": os.path.join(work, "scan_cache.sqlite"),
+                "SOLODIT_TFIDF_CACHE_PATH": os.path.join(work, "tfidf.npz"),
+            }
+        )
+
+    def fresh_path(self, name: str) -> str:
+        self._runs += 1
+        return os.path.join(self.work, f"{name}.{self._runs}.sqlite")
+
+    def build_index(self) -> None:
+        # The scan scenarios share one index, loaded directly (untimed).
+        from index import SoloditFindingsIndex
+
+        findings = iter_findings(self.args.findings, snippet_ratio=self.args.snippet_ratio, seed=self.args.seed)
+        with _closing(SoloditFindingsIndex(self.db_path)) as index:
+            index.upsert_findings(findings)
+
+    def measure(self, setup: Optional[Callable[[], Any]], run: Callable[[Any], Any]) -> Tuple[List[float], Any]:
+        seconds = []
+        result = None
+        for _ in range(self.args.repeat):
+            state = setup() if setup else None
+            start = time.perf_counter()
+            result = run(state)
+            seconds.append(time.perf_counter() - start)
+        return seconds, result
+
+    # Each scenario returns (seconds, unit, items, extra fields).
+
+    def sync(self) -> Tuple[List[float], str, int, Dict[str, Any]]:
+        from client import SoloditClient
+        from index import SoloditFindingsIndex, sync_findings
+
+        options: Dict[str, Any] = {"page_size": self.args.page_size}
+        if self.args.sync_concurrency > 1:
+            _require(sync_findings, "concurrency")
+            options["concurrency"] = self.args.sync_concurrency
+
+        def setup() -> Tuple[str, str]:
+            return self.fresh_path("sync"), self.fresh_path("response_cache")
+
+        def run(paths: Tuple[str, str]) -> int:
+            os.environ["SOLODIT_CACHE_PATH"] = paths[1]
+            with _closing(SoloditClient(base_url=self.api.base_url)) as client, _closing(SoloditFindingsIndex(paths[0])) as index:
+                return sync_findings(client=client, index=index, **options)
+
+        self.api.publish(self.args.findings)
+        seconds, synced = self.measure(setup, run)
+        return seconds, "findings", synced, {"page_size": self.args.page_size, "concurrency": self.args.sync_concurrency}
+
+    def sync_incremental(self) -> Tuple[List[float], str, int, Dict[str, Any]]:
+        from client import SoloditClient
+        from index import SoloditFindingsIndex, sync_findings
+
+        try:
+            from index import sync_incremental
+        except ImportError:
+            raise Skip("this version has no incremental sync")
+
+        new = max(1, int(self.args.findings * self.args.incremental_ratio))
+        base_path = self.fresh_path("incremental_base")
+        # Untimed: index everything but the newest findings and record a
+        # watermark, then publish the rest.
+        self.api.publish(self.args.findings - new)
+        with _closing(SoloditClient(base_url=self.api.base_url)) as client, _closing(SoloditFindingsIndex(base_path)) as index:
+            sync_findings(client=client, index=index, page_size=self.args.page_size)
+            sync_incremental(client=client, index=index, page_size=self.args.page_size)
+        self.api.publish(self.args.findings)
+
+        def setup() -> str:
+            path = self.fresh_path("incremental")
+            _copy_db(base_path, path)
+            return path
+
+        def run(path: str) -> int:
+            with _closing(SoloditClient(base_url=self.api.base_url)) as client, _closing(SoloditFindingsIndex(path)) as index:
+                return sync_incremental(client=client, index=index, page_size=self.args.page_size)
+
+        seconds, synced = self.measure(setup, run)
+        return seconds, "findings", synced, {"page_size": self.args.page_size}
+
+    def scan(self) -> Tuple[List[float], str, int, Dict[str, Any]]:
+        from audit import scan_local_index
+
+        options: Dict[str, Any] = {"limit": 20}
+        if self.args.jobs > 1:
+            _require(scan_local_index, "jobs")
+            options["jobs"] = self.args.jobs
+        seconds, (_query, results) = self.measure(None, lambda _: scan_local_index(self.repo, **options))
+        return seconds, "files", len(self.files), {"matches": len(results)}
+
+    def _per_function(self, cached: bool = False, **extra: Any) -> Tuple[List[float], str, int, Dict[str, Any]]:
+        from audit import scan_local_index_per_function
+
+        options: Dict[str, Any] = dict(PER_FUNCTION_OPTIONS, **extra)
+        if self.args.jobs > 1:
+            options["jobs"] = self.args.jobs
+        if cached or _accepts(_per_function_signature(), "use_scan_cache"):
+            options["use_scan_cache"] = cached
+        _require(_per_function_signature(), *options)
+        run = lambda _: scan_local_index_per_function(self.repo, **options)
+        if cached or extra.get("matrix"):
+            # Untimed warm-up fills the scan cache or builds the matrix file.
+            run(None)
+        seconds, (_query, results) = self.measure(None, run)
+        return seconds, "functions", self.args.functions, {"matches": _count_matches(results)}
+
+    def per_function(self) -> Tuple[List[float], str, int, Dict[str, Any]]:
+        return self._per_function()
+
+    def per_function_cached(self) -> Tuple[List[float], str, int, Dict[str, Any]]:
+        return self._per_function(cached=True)
+
+    def per_function_similar(self) -> Tuple[List[float], str, int, Dict[str, Any]]:
+        return self._per_function(similar_code=True)
+
+    def per_function_matrix(self) -> Tuple[List[float], str, int, Dict[str, Any]]:
+        try:
+            import tfidf
+        except ImportError:
+            raise Skip("this version has no matrix mode")
+        if not tfidf.available():
+            raise Skip("numpy is not installed")
+        return self._per_function(matrix=True)
+
+    def unique(self) -> Tuple[List[float], str, int, Dict[str, Any]]:
+        from audit import aggregate_unique_findings, scan_local_index_per_function
+
+        # Same as `audit-helper scan --unique-findings 20`: one match per
+        # function, then ranked across the scan.
+        options: Dict[str, Any] = dict(PER_FUNCTION_OPTIONS, limit=1)
+        if self.args.jobs > 1:
+            options["jobs"] = self.args.jobs
+        _require(_per_function_signature(), *options)
+        if _accepts(_per_function_signature(), "use_scan_cache"):
+            options["use_scan_cache"] = False
+
+        def run(_: Any) -> List[dict]:
+            _query, results = scan_local_index_per_function(self.repo, **options)
+            return aggregate_unique_findings(results, max_findings=20, max_functions_per_finding=3)
+
+        seconds, unique = self.measure(None, run)
+        return seconds, "functions", self.args.functions, {"matches": len(unique)}
+
+
+def _summary(seconds: List[float], unit: str, items: int, extra: Dict[str, Any]) -> Dict[str, Any]:
+    median = statistics.median(seconds)
+    return {
+        "seconds": [round(s, 6) for s in seconds],
+        "median": round(median, 6),
+        "min": round(min(seconds), 6),
+        "unit": unit,
+        "items": items,
+        "items_per_second": round(items / median, 3) if median > 0 else None,
+        **extra,
+    }
+
+
+def run_benchmarks(args: argparse.Namespace) -> Dict[str, Any]:
+    src = os.path.abspath(args.src)
+    sys.path.insert(0, src)
+    scenarios = args.scenario or SCENARIOS
+    results: Dict[str, Any] = {}
+    work = tempfile.mkdtemp(prefix="audit-helper-bench-")
+    try:
+        with StubApi(args.findings, snippet_ratio=args.snippet_ratio, seed=args.seed) as api:
+            bench = Bench(args, work, api)
+            if any(not name.startswith("sync") for name in scenarios):
+                bench.build_index()
+            for name in scenarios:
+                print(f"{name} ...", file=sys.stderr, flush=True)
+                try:
+                    results[name] = _summary(*getattr(bench, name)())
+                except Skip as exc:
+                    results[name] = {"skipped": str(exc)}
+                if "median" in results[name]:
+                    print(f"  {results[name]['median']:.3f}s median", file=sys.stderr, flush=True)
+                else:
+                    print(f"  skipped: {results[name]['skipped']}", file=sys.stderr, flush=True)
+    finally:
+        if args.keep:
+            print(f"work directory kept at {work}", file=sys.stderr)
+        else:
+            shutil.rmtree(work, ignore_errors=True)
+
+    numpy_version = None
+    try:
+        import numpy
+
+        numpy_version = numpy.__version__
+    except ImportError:
+        pass
+    return {
+        "version": RESULTS_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git(src, "rev-parse", "HEAD"),
+        "dirty": bool(_git(src, "status", "--porcelain", "--", ".")),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "sqlite": sqlite3.sqlite_version,
+            "numpy": numpy_version,
+        },
+        "parameters": {
+            "functions": args.functions,
+            "functions_per_file": args.functions_per_file,
+            "files": len(bench.files),
+            "findings": args.findings,
+            "snippet_ratio": args.snippet_ratio,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "jobs": args.jobs,
+        },
+        "benchmarks": results,
+    }
+
+
+def compare(base: Dict[str, Any], current: Dict[str, Any]) -> str:
+    # Median time per scenario; ratio > 1 means current is slower.
+    lines = [
+        f"base:    {base.get('commit') or '?'}",
+        f"current: {current.get('commit') or '?'}",
+    ]
+    sizes = lambda results: {k: v for k, v in (results.get("parameters") or {}).items() if k != "repeat"}
+    if sizes(base) != sizes(current):
+        lines.append("warning: the runs used different parameters")
+    lines.append(f"{'scenario':<24}{'base (s)':>12}{'current (s)':>14}{'ratio':>8}")
+    for name in sorted(set(base.get("benchmarks", {})) | set(current.get("benchmarks", {}))):
+        old = base.get("benchmarks", {}).get(name, {})
+        new = current.get("benchmarks", {}).get(name, {})
+        if "median" not in old or "median" not in new:
+            old_median = f"{old['median']:.3f}" if "median" in old else "-"
+            new_median = f"{new['median']:.3f}" if "median" in new else "-"
+            lines.append(f"{name:<24}{old_median:>12}{new_median:>14}{'-':>8}")
+            continue
+        ratio = new["median"] / old["median"] if old["median"] else float("inf")
+        note = ""
+        if old.get("matches") != new.get("matches"):
+            note = f"  matches {old.get('matches')} -> {new.get('matches')}"
+        lines.append(f"{name:<24}{old['median']:>12.3f}{new['median']:>14.3f}{ratio:>8.2f}{note}")
+    return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Time sync and scans on a synthetic corpus")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small", help="Corpus size (default: small)")
+    parser.add_argument("--functions", type=int, help="Solidity functions to generate (overrides the preset)")
+    parser.add_argument("--findings", type=int, help="Findings served by the stand-in API (overrides the preset)")
+    parser.add_argument("--functions-per-file", type=int, default=20)
+    parser.add_argument("--snippet-ratio", type=float, default=0.6, help="Share of findings with a code snippet")
+    parser.add_argument("--incremental-ratio", type=float, default=0.05, help="Share of findings new to sync_incremental")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--sync-concurrency", type=int, default=1)
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes for the scans")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=SCENARIOS,
+        help="Run only this scenario (repeatable; default: all)",
+    )
+    parser.add_argument("--src", default=os.path.join(ROOT, "src"), help="Source tree to benchmark (default: ./src)")
+    parser.add_argument("--out", help="Write the results JSON here")
+    parser.add_argument("--baseline", help="Results JSON to compare this run against")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "CURRENT"), help="Compare two results files and exit")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated corpus and databases")
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    if args.compare:
+        with open(args.compare[0], "r", encoding="utf-8") as fh:
+            base = json.load(fh)
+        with open(args.compare[1], "r", encoding="utf-8") as fh:
+            current = json.load(fh)
+        print(compare(base, current))
+        return
+
+    preset = PRESETS[args.preset]
+    args.functions = args.functions or preset["functions"]
+    args.findings = args.findings or preset["findings"]
+    results = run_benchmarks(args)
+    payload = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(payload + "\n")
+    else:
+        print(payload)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as fh:
+            print(compare(json.load(fh), results), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
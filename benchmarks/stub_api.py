@@ -0,0 +1,140 @@
+import json
+import multiprocessing
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from synthetic import iter_findings
+
+# A local stand-in for the Solodit findings endpoint, so sync can be timed
+# without network, API quota or rate limits. It runs in its own process so
+# that serving pages does not compete with the sync for the GIL.
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_StubServer"
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if self.path == "/findings":
+            self._send(200, self.server.page(body))
+        elif self.path == "/_publish":
+            # Benchmark control: make the first count findings visible.
+            self.server.publish(int(body["count"]))
+            self._send(200, b"{}")
+        else:
+            self._send(404, b'{"error": "not found"}')
+
+    def _send(self, status: int, payload: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        # An effectively unlimited quota, so the client paces nothing.
+        self.send_header("X-RateLimit-Remaining", "1000000000")
+        self.send_header("X-RateLimit-Reset", "60")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, corpus: List[dict], visible: int) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.corpus = corpus
+        self.visible = visible
+        # Encoded pages by (visible, newest first, page, page size).
+        self.pages: Dict[Tuple[int, bool, int, int], bytes] = {}
+
+    def publish(self, count: int) -> None:
+        self.visible = min(count, len(self.corpus))
+
+    def page(self, body: dict) -> bytes:
+        filters = body.get("filters") or {}
+        newest_first = filters.get("sortField") == "Recency" and filters.get("sortDirection") == "Desc"
+        page = max(1, int(body.get("page") or 1))
+        page_size = max(1, int(body.get("pageSize") or 50))
+        key = (self.visible, newest_first, page, page_size)
+        encoded = self.pages.get(key)
+        if encoded is None:
+            # The corpus is oldest first, so newest first reads it backwards.
+            visible = self.corpus[:self.visible]
+            ordered = visible[::-1] if newest_first else visible
+            start = (page - 1) * page_size
+            encoded = json.dumps(
+                {
+                    "findings": ordered[start:start + page_size],
+                    "metadata": {"totalResults": len(visible), "page": page, "pageSize": page_size},
+                }
+            ).encode("utf-8")
+            self.pages[key] = encoded
+        return encoded
+
+
+def _serve(conn, findings: int, snippet_ratio: float, seed: int, visible: int) -> None:
+    corpus = list(iter_findings(findings, snippet_ratio=snippet_ratio, seed=seed))
+    server = _StubServer(corpus, visible)
+    conn.send(server.server_address[1])
+    conn.close()
+    server.serve_forever()
+
+
+class StubApi:
+    def __init__(
+        self,
+        findings: int,
+        *,
+        snippet_ratio: float = 0.6,
+        seed: int = 1,
+        visible: Optional[int] = None,
+    ) -> None:
+        self.findings = findings
+        self.snippet_ratio = snippet_ratio
+        self.seed = seed
+        self.visible = findings if visible is None else visible
+        self.port: Optional[int] = None
+        self._process: Optional[multiprocessing.Process] = None
+
+    def __enter__(self) -> "StubApi":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> None:
+        parent, child = multiprocessing.Pipe(duplex=False)
+        self._process = multiprocessing.Process(
+            target=_serve,
+            args=(child, self.findings, self.snippet_ratio, self.seed, self.visible),
+            daemon=True,
+        )
+        self._process.start()
+        child.close()
+        self.port = parent.recv()
+        parent.close()
+
+    def publish(self, count: int) -> None:
+        request = urllib.request.Request(
+            f"{self.base_url}/_publish",
+            data=json.dumps({"count": count}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=30) as resp:
+            resp.read()
+
+    def close(self) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
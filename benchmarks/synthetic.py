@@ -0,0 +1,209 @@
+import os
+import random
+from typing import Dict, Iterator, List, Tuple
+
+# Reproducible inputs for the benchmarks: a Solidity tree and a findings
+# corpus built from the same function templates, so text search, code
+# similarity and the filters all have real matches to find. Everything is
+# derived from the seed; the same arguments always give the same bytes.
+
+IMPACTS = ["HIGH", "MEDIUM", "LOW", "INFO"]
+FIRMS = ["Cyfrin", "Spearbit", "Trail of Bits", "OpenZeppelin", "Code4rena", "Sherlock", "Zellic"]
+
+# Topic -> (words used in prose and identifiers, issue titles)
+TOPICS: Dict[str, Tuple[List[str], List[str]]] = {
+    "reentrancy": (
+        ["reentrancy", "withdraw", "balance", "call", "callback", "transfer"],
+        ["Reentrancy in {fn} drains {asset}", "State updated after external call in {fn}"],
+    ),
+    "oracle": (
+        ["oracle", "price", "stale", "feed", "chainlink", "round"],
+        ["Stale oracle price accepted by {fn}", "Price feed manipulation in {fn}"],
+    ),
+    "slippage": (
+        ["slippage", "swap", "amountOutMin", "frontrun", "sandwich", "deadline"],
+        ["Missing slippage protection in {fn}", "Swap in {fn} can be sandwiched"],
+    ),
+    "signature": (
+        ["signature", "nonce", "permit", "replay", "ecrecover", "deadline"],
+        ["Signature replay in {fn}", "Permit nonce not consumed in {fn}"],
+    ),
+    "proxy": (
+        ["proxy", "upgrade", "delegatecall", "initializer", "implementation", "storage"],
+        ["Unprotected initializer in {fn}", "Storage collision through delegatecall in {fn}"],
+    ),
+    "liquidation": (
+        ["liquidation", "collateral", "debt", "health", "borrow", "repay"],
+        ["Bad debt left by {fn}", "Liquidation in {fn} ignores accrued interest"],
+    ),
+    "rewards": (
+        ["reward", "staking", "share", "rounding", "precision", "accrue"],
+        ["Reward rounding lets {fn} steal {asset}", "Precision loss in {fn}"],
+    ),
+    "governance": (
+        ["governance", "vote", "timelock", "proposal", "quorum", "flashloan"],
+        ["Flashloan voting power in {fn}", "Timelock bypass in {fn}"],
+    ),
+    "bridge": (
+        ["bridge", "messenger", "relayer", "cross-chain", "message", "nonce"],
+        ["Replayable cross-chain message in {fn}", "Relayer can grief {fn}"],
+    ),
+    "access": (
+        ["access", "owner", "auth", "ownership", "admin", "pause"],
+        ["Missing access control on {fn}", "Ownership transfer in {fn} is not two-step"],
+    ),
+}
+
+FILLER = (
+    "the protocol user attacker contract function state value amount token pool vault "
+    "allows because before after without check update external internal loss funds"
+).split()
+
+ASSETS = ["ETH", "USDC", "WETH", "DAI", "shares", "collateral", "rewards"]
+
+# One body per topic. {n} is a per-instance suffix, {k} a constant and
+# {extra} optional statements, so instances share most 3-grams but not all.
+TEMPLATES: Dict[str, str] = {
+    "reentrancy": """function withdraw{n}(uint256 amount) external {{
+        require(balances[msg.sender] >= amount, "insufficient balance");
+        (bool ok, ) = msg.sender.call{{value: amount}}("");
+        require(ok, "transfer failed");
+        balances[msg.sender] -= amount;{extra}
+        emit Withdraw(msg.sender, amount);
+    }}""",
+    "oracle": """function getPrice{n}(address asset) public view returns (uint256) {{
+        (, int256 answer, , uint256 updatedAt, ) = feeds[asset].latestRoundData();
+        require(answer > 0, "bad price");{extra}
+        require(block.timestamp - updatedAt < {k}, "stale price");
+        return uint256(answer) * 1e10;
+    }}""",
+    "slippage": """function swap{n}(address tokenIn, uint256 amountIn) external returns (uint256 out) {{
+        IERC20(tokenIn).transferFrom(msg.sender, address(this), amountIn);
+        out = router.swapExactTokensForTokens(amountIn, 0, path, msg.sender, block.timestamp);{extra}
+        emit Swapped(msg.sender, amountIn, out);
+    }}""",
+    "signature": """function permit{n}(address owner, address spender, uint256 value, uint256 deadline, uint8 v, bytes32 r, bytes32 s) external {{
+        require(block.timestamp <= deadline, "expired");
+        bytes32 digest = keccak256(abi.encode(PERMIT_TYPEHASH, owner, spender, value, nonces[owner], deadline));
+        address signer = ecrecover(digest, v, r, s);{extra}
+        require(signer == owner, "invalid signature");
+        allowance[owner][spender] = value;
+    }}""",
+    "proxy": """function upgradeTo{n}(address implementation) external {{
+        require(implementation != address(0), "zero impl");{extra}
+        (bool ok, ) = implementation.delegatecall(abi.encodeWithSignature("initialize()"));
+        require(ok, "init failed");
+        _implementation = implementation;
+    }}""",
+    "liquidation": """function liquidate{n}(address borrower, uint256 repayAmount) external {{
+        require(healthFactor(borrower) < 1e18, "healthy");
+        debt[borrower] -= repayAmount;{extra}
+        uint256 seized = repayAmount * {k} / 100;
+        collateral[borrower] -= seized;
+        collateral[msg.sender] += seized;
+    }}""",
+    "rewards": """function claim{n}() external {{
+        uint256 owed = shares[msg.sender] * rewardPerShare / 1e18 - paid[msg.sender];{extra}
+        paid[msg.sender] += owed;
+        rewardToken.transfer(msg.sender, owed / {k});
+    }}""",
+    "governance": """function castVote{n}(uint256 proposalId, bool support) external {{
+        uint256 weight = token.balanceOf(msg.sender);
+        require(weight > 0, "no votes");{extra}
+        proposals[proposalId].votes[support] += weight;
+        hasVoted[proposalId][msg.sender] = true;
+    }}""",
+    "bridge": """function relayMessage{n}(bytes calldata message, uint256 nonce, bytes calldata proof) external {{
+        require(verifier.verify(message, proof), "bad proof");{extra}
+        (address target, bytes memory data) = abi.decode(message, (address, bytes));
+        (bool ok, ) = target.call(data);
+        require(ok, "relay failed");
+    }}""",
+    "access": """function setFee{n}(uint256 newFee) external {{
+        require(newFee <= {k}, "fee too high");{extra}
+        fee = newFee;
+        emit FeeUpdated(newFee);
+    }}""",
+}
+
+EXTRAS = [
+    "\n        totalSupply -= amount;",
+    "\n        lastUpdate[msg.sender] = block.timestamp;",
+    "\n        if (paused) revert Paused();",
+    "\n        counter += 1;",
+    "\n        require(msg.sender != address(0), \"zero\");",
+]
+
+
+def function_body(rng: random.Random, topic: str, suffix: str) -> str:
+    extra = "".join(rng.sample(EXTRAS, rng.randint(0, 2)))
+    return TEMPLATES[topic].format(n=suffix, k=rng.choice([3600, 86400, 105, 1000, 10000]), extra=extra)
+
+
+def write_contracts(root: str, *, functions: int, per_file: int = 20, seed: int = 1) -> List[str]:
+    # functions Solidity functions spread over files of about per_file each,
+    # under root/contracts with a few nested folders. Returns the paths.
+    rng = random.Random(seed)
+    topics = sorted(TEMPLATES)
+    paths: List[str] = []
+    written = 0
+    file_no = 0
+    while written < functions:
+        count = min(functions - written, max(1, per_file + rng.randint(-per_file // 2, per_file // 2)))
+        folder = os.path.join(root, "contracts", f"module{file_no % 8}")
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"Contract{file_no}.sol")
+        bodies = []
+        for i in range(count):
+            bodies.append("    " + function_body(rng, rng.choice(topics), f"{file_no}_{i}"))
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(
+                "// SPDX-License-Identifier: MIT\n"
+                "pragma solidity ^0.8.20;\n\n"
+                f"contract Contract{file_no} {{\n"
+                "    mapping(address => uint256) public balances;\n"
+                "    address public owner;\n\n"
+                "    constructor() { owner = msg.sender; }\n\n"
+                + "\n\n".join(bodies)
+                + "\n}\n"
+            )
+        paths.append(path)
+        written += count
+        file_no += 1
+    return paths
+
+
+def iter_findings(count: int, *, snippet_ratio: float = 0.6, seed: int = 1) -> Iterator[dict]:
+    # count findings in API shape, oldest first, with report dates one hour
+    # apart; about snippet_ratio of them carry a fenced Solidity snippet.
+    rng = random.Random(seed * 7919 + 1)
+    topics = sorted(TOPICS)
+    for i in range(count):
+        topic = rng.choice(topics)
+        words, titles = TOPICS[topic]
+        fn = f"{rng.choice(words).replace('-', '')}{rng.randint(1, 99)}"
+        title = rng.choice(titles).format(fn=fn, asset=rng.choice(ASSETS))
+        prose = " ".join(rng.choice(words) if rng.random() < 0.35 else rng.choice(FILLER) for _ in range(rng.randint(40, 120)))
+        content = prose
+        if rng.random() < snippet_ratio:
+            content += "\n\n```solidity\n" + function_body(rng, topic, str(i)) + "\n```\n"
+        day, hour = divmod(i, 24)
+        yield {
+            "id": f"synthetic-{i}",
+            "title": title,
+            "description": prose[:400],
+            "content": content,
+            "summary": title,
+            "tags": rng.sample(words, 2),
+            "impact": rng.choice(IMPACTS),
+            "quality_score": rng.randint(1, 5),
+            "firm_name": rng.choice(FIRMS),
+            "source_link": f"https://example.invalid/findings/{i}",
+            "report_date": _date(day, hour),
+        }
+
+
+def _date(day: int, hour: int) -> str:
+    year, day = divmod(day, 365)
+    month, day = divmod(day, 28)
+    return f"{2020 + year:04d}-{month + 1:02d}-{day + 1:02d}T{hour:02d}:00:00Z"
@@ -0,0 +1,99 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, Optional, Tuple, Union
+
+from cache import SoloditCache
+from client import SoloditClient
+
+DEFAULT_CONCURRENCY = 16
+
+
+class AsyncSoloditClient:
+    # Same surface as SoloditClient. Cache lookups and writes (SQLite reads,
+    # zlib, eviction) run on the default executor so they never block the event
+    # loop; misses go through the pooled keep-alive transport on a worker pool
+    # that is exactly as large as the concurrency limit, so any number of
+    # coroutines can wait on lookups without a thread per request.
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        cache: Optional[SoloditCache] = None,
+        *,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    ) -> None:
+        self._client = SoloditClient(
+            base_url,
+            api_key,
+            cache,
+            timeout=timeout,
+            pool_size=concurrency,
+        )
+        self.cache = self._client.cache
+        self.concurrency = concurrency
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="solodit-async")
+
+    async def __aenter__(self) -> "AsyncSoloditClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        # Waiting for in-flight fetches must not stall other coroutines.
+        await asyncio.to_thread(self._executor.shutdown, wait=True)
+        await asyncio.to_thread(self._client.close)
+
+    async def request(
+        self,
+        path: str,
+        *,
+        method: str = "GET",
+        params: Optional[Dict[str, Any]] = None,
+        body: Optional[Dict[str, Any]] = None,
+        use_cache: bool = True,
+        max_retries: int = 5,
+        backoff_seconds: float = 5.0,
+    ) -> Any:
+        url = self._client._build_url(path, params)
+        cache_key = self.cache.make_key(method, url, params, body)
+        if use_cache:
+            cached = await asyncio.to_thread(self.cache.get, cache_key)
+            if cached is not None:
+                return cached.payload
+
+        fetch = partial(
+            self._client.fetch,
+            url,
+            method=method,
+            body=body,
+            max_retries=max_retries,
+            backoff_seconds=backoff_seconds,
+        )
+        async with self._semaphore:
+            payload = await asyncio.get_running_loop().run_in_executor(self._executor, fetch)
+        if use_cache:
+            await asyncio.to_thread(self.cache.set, cache_key, payload)
+        return payload
+
+    async def search(self, query: str, *, path: str = "/search") -> Any:
+        return await self.request(path, params={"q": query})
+
+    async def findings(
+        self,
+        *,
+        filters: Optional[Dict[str, Any]] = None,
+        page: int = 1,
+        page_size: int = 50,
+        path: str = "/findings",
+        use_cache: bool = True,
+    ) -> Any:
+        body = {
+            "page": page,
+            "pageSize": page_size,
+            "filters": filters or {},
+        }
+        return await self.request(path, method="POST", body=body, use_cache=use_cache)
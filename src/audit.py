@@ -1,11 +1,30 @@
+import asyncio
 import os
 import re
+import threading
+import time
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from functools import partial
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
+from async_client import AsyncSoloditClient
 from client import SoloditClient
-from index import SoloditFindingsIndex
+from features import (
+    CORE_SECURITY_TERMS,
+    FEATURES_VERSION,
+    code_shingles,
+    core_mask,
+    shingle_similarity,
+)
+from index import SHINGLE_INDEX_VERSION, FeatureRow, SoloditFindingsIndex
+from minhash import LSH_VERSION
+import profiling
+from scan_cache import ScanCache
+from solidity import extract_units
+from tfidf import TfidfMatrix, build_matrix, cache_key, load_matrix, require_numpy, save_matrix
 
 
 SOLIDITY_KEYWORDS = {
@@ -144,32 +163,6 @@ DOMAIN_TERMS = [
     "checkpoint",
 ]
 
-CORE_SECURITY_TERMS = [
-    "reentrancy",
-    "delegatecall",
-    "call",
-    "staticcall",
-    "oracle",
-    "price",
-    "timelock",
-    "upgrade",
-    "proxy",
-    "signature",
-    "nonce",
-    "permit",
-    "access",
-    "auth",
-    "ownership",
-    "bridge",
-    "cross-chain",
-    "dos",
-    "grief",
-    "front-run",
-    "frontrun",
-    "flashloan",
-    "slippage",
-]
-
 BASE_KEYWORDS = [
     "bridge",
     "oracle",
@@ -185,6 +178,16 @@ BASE_KEYWORDS = [
     "cross-chain",
 ]
 
+# Functions per matrix-mode batch; each batch is one pass over the corpus.
+MATRIX_BATCH_FUNCTIONS = 512
+# Files per worker task when parsing is streamed, so the first files come
+# back without waiting for a large share of the tree.
+STREAM_PARSE_CHUNK = 8
+
+# Similarity bar for --similar-code matches when --min-code-similarity is unset;
+# the LSH banding is tuned so pairs above it usually share a bucket.
+SIMILAR_CODE_MIN_SIMILARITY = 0.5
+
 EXTENSIONS = {".sol", ".vy", ".rs", ".go", ".py", ".js", ".ts"}
 
 
@@ -194,9 +197,33 @@ class AuditQuery:
     sources: List[str]
 
 
+@dataclass
+class SourceFunction:
+    name: str
+    body: str
+    keywords: List[str]
+    kind: str = "function"
+    start_line: int = 0
+    end_line: int = 0
+
+
+# A parsed source file; keyword_counts feeds the global query and functions
+# feed the per-function matcher.
+@dataclass
+class SourceFile:
+    path: str
+    keyword_counts: Counter
+    functions: List[SourceFunction]
+
+
+# End of an iter_sources stream (None is a file that could not be read).
+_PARSE_DONE = object()
+
+
 def _read_text(path: str, max_bytes: int = 500_000) -> str:
-    with open(path, "rb") as fh:
+    with profiling.stage("parse.read") as stage, open(path, "rb") as fh:
         data = fh.read(max_bytes)
+        stage.nbytes = len(data)
     return data.decode("utf-8", errors="ignore")
 
 
@@ -230,55 +257,138 @@ def _extract_identifiers(text: str) -> List[str]:
 
 
 def _extract_solidity_functions(text: str) -> List[Tuple[str, str]]:
-    # Naive parser: finds "function name(...)" and captures balanced braces.
-    functions: List[Tuple[str, str]] = []
-    for match in re.finditer(r"\bfunction\s+([A-Za-z_][A-Za-z0-9_]*)\s*\(", text):
-        name = match.group(1)
-        brace_idx = text.find("{", match.end())
-        if brace_idx == -1:
-            continue
-        depth = 0
-        end_idx = None
-        for i in range(brace_idx, len(text)):
-            ch = text[i]
-            if ch == "{":
-                depth += 1
-            elif ch == "}":
-                depth -= 1
-                if depth == 0:
-                    end_idx = i + 1
-                    break
-        if end_idx:
-            body = text[brace_idx:end_idx]
-            functions.append((name, body))
-    return functions
-
-
-def _extract_keywords(paths: Sequence[str], extra_keywords: Optional[Sequence[str]] = None) -> AuditQuery:
+    return [(unit.name, unit.body) for unit in extract_units(text)]
+
+
+def _boost_vocabulary(counts: Counter, lowered: str) -> None:
+    for term in VULN_TERMS:
+        if term in lowered:
+            counts[term] += 3
+    for term in DOMAIN_TERMS:
+        if term in lowered:
+            counts[term] += 2
+
+
+def _count_text_keywords(text: str) -> Counter:
     counts: Counter = Counter()
-    sources: List[str] = []
-    for path in paths:
-        try:
-            text = _read_text(path)
-        except (OSError, UnicodeDecodeError):
+    tokens = [t.lower() for t in _tokenize(text)]
+    identifiers = [i.lower() for i in _extract_identifiers(text)]
+    for token in tokens:
+        if token in STOPWORDS or token in SOLIDITY_KEYWORDS:
             continue
-        sources.append(path)
-        tokens = [t.lower() for t in _tokenize(text)]
-        identifiers = [i.lower() for i in _extract_identifiers(text)]
-        for token in tokens:
-            if token in STOPWORDS or token in SOLIDITY_KEYWORDS:
-                continue
-            counts[token] += 1
-        for ident in identifiers:
-            counts[ident] += 2
-        # boost known vuln terms present in text
-        lowered = text.lower()
-        for term in VULN_TERMS:
-            if term in lowered:
-                counts[term] += 3
-        for term in DOMAIN_TERMS:
-            if term in lowered:
-                counts[term] += 2
+        counts[token] += 1
+    for ident in identifiers:
+        counts[ident] += 2
+    # boost known vuln terms present in text
+    _boost_vocabulary(counts, text.lower())
+    return counts
+
+
+def _parse_source(
+    path: str,
+    with_functions: bool = False,
+    include_base: bool = True,
+    count_keywords: bool = True,
+) -> Optional[SourceFile]:
+    try:
+        text = _read_text(path)
+    except (OSError, UnicodeDecodeError):
+        return None
+    functions: List[SourceFunction] = []
+    if with_functions and path.endswith(".sol"):
+        with profiling.stage("parse.functions", len(text)):
+            units = extract_units(text)
+        with profiling.stage("parse.keywords"):
+            for unit in units:
+                keywords = _extract_keywords_from_text(unit.body, extra_keywords=[unit.name], include_base=include_base)
+                functions.append(
+                    SourceFunction(
+                        name=unit.name,
+                        body=unit.body,
+                        keywords=keywords,
+                        kind=unit.kind,
+                        start_line=unit.start_line,
+                        end_line=unit.end_line,
+                    )
+                )
+    keyword_counts: Counter = Counter()
+    if count_keywords:
+        with profiling.stage("parse.tokenize", len(text)):
+            keyword_counts = _count_text_keywords(text)
+    return SourceFile(path=path, keyword_counts=keyword_counts, functions=functions)
+
+
+def _parallel_map(fn: Callable, items: Sequence, jobs: int) -> List:
+    return list(_parallel_imap(fn, items, jobs))
+
+
+def _parallel_imap(fn: Callable, items: Sequence, jobs: int, chunksize: Optional[int] = None) -> Iterator:
+    # Results come back in input order, so merging them is deterministic and
+    # identical to the serial path. Each is yielded as soon as its chunk and
+    # those before it are done.
+    if jobs <= 1 or len(items) < 2:
+        for item in items:
+            yield fn(item)
+        return
+    if chunksize is None:
+        chunksize = max(1, len(items) // (jobs * 4))
+    pool = ProcessPoolExecutor(max_workers=jobs)
+    try:
+        yield from pool.map(fn, items, chunksize=chunksize)
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def parse_sources(
+    paths: Sequence[str],
+    *,
+    with_functions: bool = False,
+    include_base: bool = True,
+    jobs: int = 1,
+) -> List[SourceFile]:
+    parse = partial(_parse_source, with_functions=with_functions, include_base=include_base)
+    # With jobs > 1 the parse.* stages run in the workers and are not
+    # recorded; only this total is.
+    with profiling.stage("parse"):
+        return [source for source in _parallel_map(parse, list(paths), jobs) if source is not None]
+
+
+def iter_sources(
+    paths: Sequence[str],
+    *,
+    with_functions: bool = False,
+    include_base: bool = True,
+    count_keywords: bool = True,
+    jobs: int = 1,
+) -> Iterator[SourceFile]:
+    # parse_sources one file at a time, so callers can work on the first
+    # files while the rest are still being parsed.
+    parse = partial(
+        _parse_source,
+        with_functions=with_functions,
+        include_base=include_base,
+        count_keywords=count_keywords,
+    )
+    parsed = _parallel_imap(parse, list(paths), jobs, chunksize=STREAM_PARSE_CHUNK)
+    try:
+        while True:
+            with profiling.stage("parse"):
+                source = next(parsed, _PARSE_DONE)
+            if source is _PARSE_DONE:
+                return
+            if source is not None:
+                yield source
+    finally:
+        parsed.close()
+
+
+def _query_from_sources(
+    sources: Sequence[SourceFile],
+    extra_keywords: Optional[Sequence[str]] = None,
+) -> AuditQuery:
+    counts: Counter = Counter()
+    for source in sources:
+        counts.update(source.keyword_counts)
 
     for kw in BASE_KEYWORDS:
         counts[kw.lower()] += 4
@@ -298,7 +408,21 @@ def _extract_keywords(paths: Sequence[str], extra_keywords: Optional[Sequence[st
         kw = kw.lower()
         if kw not in keywords:
             keywords.append(kw)
-    return AuditQuery(keywords=keywords, sources=sources)
+    return AuditQuery(keywords=keywords, sources=[source.path for source in sources])
+
+
+def _extract_keywords(
+    paths: Sequence[str],
+    extra_keywords: Optional[Sequence[str]] = None,
+    *,
+    jobs: int = 1,
+) -> AuditQuery:
+    return _query_from_sources(parse_sources(paths, jobs=jobs), extra_keywords)
+
+
+def _keyword_tokens(text: str) -> List[str]:
+    tokens = [t.lower() for t in _tokenize(text)]
+    return [token for token in tokens if token not in STOPWORDS and token not in SOLIDITY_KEYWORDS]
 
 
 def _extract_keywords_from_text(
@@ -307,19 +431,8 @@ def _extract_keywords_from_text(
     extra_keywords: Optional[Sequence[str]] = None,
     include_base: bool = True,
 ) -> List[str]:
-    counts: Counter = Counter()
-    tokens = [t.lower() for t in _tokenize(text)]
-    for token in tokens:
-        if token in STOPWORDS or token in SOLIDITY_KEYWORDS:
-            continue
-        counts[token] += 1
-    lowered = text.lower()
-    for term in VULN_TERMS:
-        if term in lowered:
-            counts[term] += 3
-    for term in DOMAIN_TERMS:
-        if term in lowered:
-            counts[term] += 2
+    counts: Counter = Counter(_keyword_tokens(text))
+    _boost_vocabulary(counts, text.lower())
 
     if include_base:
         for kw in BASE_KEYWORDS:
@@ -342,11 +455,80 @@ def _extract_keywords_from_text(
     return keywords
 
 
-def build_query(path: str, extra_keywords: Optional[Sequence[str]] = None) -> AuditQuery:
+def _load_path(
+    path: str,
+    *,
+    extra_keywords: Optional[Sequence[str]] = None,
+    with_functions: bool = False,
+    include_base: bool = True,
+    jobs: int = 1,
+) -> Tuple[AuditQuery, Iterable[SourceFile]]:
     files = list(_iter_files(path))
     if not files:
-        return AuditQuery(keywords=list(extra_keywords or []), sources=[])
-    return _extract_keywords(files, extra_keywords=extra_keywords)
+        return AuditQuery(keywords=list(extra_keywords or []), sources=[]), []
+    return _load_files(
+        files,
+        extra_keywords=extra_keywords,
+        with_functions=with_functions,
+        include_base=include_base,
+        jobs=jobs,
+    )
+
+
+def _load_files(
+    files: Sequence[str],
+    *,
+    extra_keywords: Optional[Sequence[str]] = None,
+    with_functions: bool = False,
+    include_base: bool = True,
+    jobs: int = 1,
+) -> Tuple[AuditQuery, Iterable[SourceFile]]:
+    # The query needs the keywords of every file, the matcher only the
+    # functions of the files it is on. So all files are tokenized up front,
+    # and functions are extracted lazily in a second read as matching
+    # reaches each file: the first matches do not wait for the whole tree.
+    sources = parse_sources(files, jobs=jobs)
+    query = _query_from_sources(sources, extra_keywords)
+    if not with_functions:
+        return query, sources
+    functions = iter_sources(
+        query.sources,
+        with_functions=True,
+        include_base=include_base,
+        count_keywords=False,
+        jobs=jobs,
+    )
+    return query, functions
+
+
+def build_query(
+    path: str,
+    extra_keywords: Optional[Sequence[str]] = None,
+    *,
+    jobs: int = 1,
+) -> AuditQuery:
+    query, _ = _load_path(path, extra_keywords=extra_keywords, jobs=jobs)
+    return query
+
+
+def _api_filters(
+    query: AuditQuery,
+    *,
+    impact: Optional[List[str]],
+    quality_score: Optional[int],
+    sort_field: str,
+    sort_direction: str,
+) -> dict:
+    filters = {
+        "keywords": " ".join(query.keywords),
+        "sortField": sort_field,
+        "sortDirection": sort_direction,
+    }
+    if impact:
+        filters["impact"] = impact
+    if quality_score is not None:
+        filters["qualityScore"] = quality_score
+    return filters
 
 
 def scan_findings(
@@ -361,22 +543,52 @@ def scan_findings(
     page_size: int = 20,
 ) -> Tuple[AuditQuery, dict]:
     query = build_query(path, extra_keywords=extra_keywords)
-    filters = {
-        "keywords": " ".join(query.keywords),
-        "sortField": sort_field,
-        "sortDirection": sort_direction,
-    }
-    if impact:
-        filters["impact"] = impact
-    if quality_score is not None:
-        filters["qualityScore"] = quality_score
+    filters = _api_filters(
+        query,
+        impact=impact,
+        quality_score=quality_score,
+        sort_field=sort_field,
+        sort_direction=sort_direction,
+    )
+
+    with SoloditClient() as client:
+        payload = client.findings(
+            filters=filters,
+            page=page,
+            page_size=page_size,
+        )
+    return query, payload
+
 
-    client = SoloditClient()
-    payload = client.findings(
-        filters=filters,
-        page=page,
-        page_size=page_size,
+async def scan_findings_async(
+    path: str,
+    *,
+    client: Optional[AsyncSoloditClient] = None,
+    extra_keywords: Optional[Sequence[str]] = None,
+    impact: Optional[List[str]] = None,
+    quality_score: Optional[int] = None,
+    sort_field: str = "Quality",
+    sort_direction: str = "Desc",
+    page: int = 1,
+    page_size: int = 20,
+) -> Tuple[AuditQuery, dict]:
+    # Keyword extraction is blocking file I/O and regex work; keep it off the loop.
+    query = await asyncio.get_running_loop().run_in_executor(
+        None, partial(build_query, path, extra_keywords=extra_keywords)
+    )
+    filters = _api_filters(
+        query,
+        impact=impact,
+        quality_score=quality_score,
+        sort_field=sort_field,
+        sort_direction=sort_direction,
     )
+
+    if client is not None:
+        payload = await client.findings(filters=filters, page=page, page_size=page_size)
+    else:
+        async with AsyncSoloditClient() as owned:
+            payload = await owned.findings(filters=filters, page=page, page_size=page_size)
     return query, payload
 
 
@@ -393,19 +605,8 @@ def _build_fts_query(keywords: Sequence[str]) -> str:
     return " OR ".join(parts) if parts else ""
 
 
-def _finding_text(finding: dict) -> str:
-    parts = [
-        str(finding.get("title") or ""),
-        str(finding.get("description") or ""),
-        str(finding.get("summary") or ""),
-        str(finding.get("tags") or ""),
-        str(finding.get("keywords") or ""),
-    ]
-    return " ".join(parts).lower()
-
-
-def _keyword_overlap(finding: dict, keywords: Sequence[str]) -> int:
-    text = _finding_text(finding)
+def _keyword_overlap(text: str, keywords: Sequence[str]) -> int:
+    # text is a finding's lowered feature text.
     if not text:
         return 0
     count = 0
@@ -418,85 +619,11 @@ def _keyword_overlap(finding: dict, keywords: Sequence[str]) -> int:
     return count
 
 
-def _core_overlap(finding: dict, func_text: str, min_core: int) -> bool:
+def _core_overlap(finding_mask: int, func_mask: int, min_core: int) -> bool:
+    # Both masks come from features.core_mask.
     if min_core <= 0:
         return True
-    finding_text = _finding_text(finding)
-    func_text = func_text.lower()
-    count = 0
-    for term in CORE_SECURITY_TERMS:
-        if term in finding_text and term in func_text:
-            count += 1
-            if count >= min_core:
-                return True
-    return False
-
-
-def _extract_code_snippets(finding: dict) -> List[str]:
-    snippets: List[str] = []
-    # common fields
-    for key in ("content", "code", "snippet", "snippets", "poc", "details", "description", "summary", "analysis"):
-        val = finding.get(key)
-        if not val:
-            continue
-        if isinstance(val, list):
-            for item in val:
-                if isinstance(item, str):
-                    snippets.extend(_extract_code_blocks(item))
-        elif isinstance(val, str):
-            snippets.extend(_extract_code_blocks(val))
-    return [s for s in snippets if s.strip()]
-
-
-def _extract_code_blocks(text: str) -> List[str]:
-    blocks = re.findall(r"```(?:[a-zA-Z0-9_-]+)?\\n(.*?)```", text, flags=re.DOTALL)
-    return [b.strip() for b in blocks if b.strip()]
-
-
-def _normalize_code(text: str) -> str:
-    # Strip comments
-    text = re.sub(r"//.*?$", "", text, flags=re.MULTILINE)
-    text = re.sub(r"/\\*.*?\\*/", "", text, flags=re.DOTALL)
-    # Normalize addresses and hex literals
-    text = re.sub(r"0x[a-fA-F0-9]+", "0xHEX", text)
-    # Normalize numbers
-    text = re.sub(r"\\b\\d+\\b", "NUM", text)
-    return text
-
-
-def _code_tokens(text: str) -> List[str]:
-    text = _normalize_code(text)
-    tokens = re.findall(r"[A-Za-z_][A-Za-z0-9_]*|0xHEX|NUM|==|!=|<=|>=|&&|\\|\\||[{}();.,=<>+\\-*/%]", text)
-    # Normalize identifiers to reduce sensitivity to variable names
-    normalized = []
-    for t in tokens:
-        if re.match(r"[A-Za-z_][A-Za-z0-9_]*", t) and t not in {
-            "if","else","for","while","return","require","revert","assert","emit","function","constructor",
-            "mapping","struct","event","error","modifier","public","private","internal","external","view","pure",
-            "memory","calldata","storage","payable","unchecked","try","catch","new"
-        }:
-            normalized.append("ID")
-        else:
-            normalized.append(t)
-    return normalized
-
-
-def _token_ngrams(tokens: List[str], n: int = 1) -> List[str]:
-    if len(tokens) < n:
-        return []
-    return [" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
-
-
-def _code_similarity(a: str, b: str) -> float:
-    ta = _code_tokens(a)
-    tb = _code_tokens(b)
-    ga = set(_token_ngrams(ta, 3))
-    gb = set(_token_ngrams(tb, 3))
-    if not ga or not gb:
-        return 0.0
-    inter = len(ga & gb)
-    union = len(ga | gb)
-    return inter / union if union else 0.0
+    return (finding_mask & func_mask).bit_count() >= min_core
 
 
 def scan_local_index(
@@ -506,16 +633,18 @@ def scan_local_index(
     impact: Optional[List[str]] = None,
     quality_score: Optional[int] = None,
     limit: int = 20,
+    jobs: int = 1,
+    session: Optional["ScanSession"] = None,
 ) -> Tuple[AuditQuery, List[dict]]:
-    query = build_query(path, extra_keywords=extra_keywords)
+    query = build_query(path, extra_keywords=extra_keywords, jobs=jobs)
     fts_query = _build_fts_query(query.keywords)
-    index = SoloditFindingsIndex()
-    results = index.search(
-        fts_query,
-        impact=impact,
-        min_quality=quality_score,
-        limit=limit,
-    )
+    with _session_index(session) as index:
+        results = index.search(
+            fts_query,
+            impact=impact,
+            min_quality=quality_score,
+            limit=limit,
+        )
     return query, results
 
 
@@ -526,17 +655,443 @@ def scan_local_index_files(
     impact: Optional[List[str]] = None,
     quality_score: Optional[int] = None,
     limit: int = 20,
+    jobs: int = 1,
+    session: Optional["ScanSession"] = None,
 ) -> Tuple[AuditQuery, List[dict]]:
-    query = _extract_keywords(list(files), extra_keywords=extra_keywords)
+    query = _extract_keywords(list(files), extra_keywords=extra_keywords, jobs=jobs)
     fts_query = _build_fts_query(query.keywords)
-    index = SoloditFindingsIndex()
-    results = index.search(
-        fts_query,
+    with _session_index(session) as index:
+        results = index.search(
+            fts_query,
+            impact=impact,
+            min_quality=quality_score,
+            limit=limit,
+        )
+    return AuditQuery(keywords=query.keywords, sources=list(files)), results
+
+
+def _filter_function_results(
+    results: List[FeatureRow],
+    body: str,
+    func_keywords: Sequence[str],
+    *,
+    min_overlap: int,
+    min_code_similarity: float,
+    require_snippet: bool,
+    min_core_overlap: int,
+) -> List[FeatureRow]:
+    # Pure predicates, so the cheap term checks run first and code similarity
+    # only sees what survives them. Finding-side text, core terms and snippet
+    # shingles were computed when the finding was indexed; the function side
+    # is computed once here.
+    if min_overlap > 0:
+        results = [r for r in results if _keyword_overlap(r[2].text, func_keywords) >= min_overlap]
+    if min_core_overlap > 0:
+        func_mask = core_mask(body.lower())
+        results = [r for r in results if _core_overlap(r[2].core_mask, func_mask, min_core_overlap)]
+    if min_code_similarity > 0 or require_snippet:
+        func_shingles = code_shingles(body)
+        filtered = []
+        for r in results:
+            shingles = r[2].shingles
+            if require_snippet and not shingles:
+                continue
+            best = 0.0
+            for group in shingles:
+                best = max(best, shingle_similarity(func_shingles, group))
+            if best >= min_code_similarity:
+                filtered.append(r)
+        results = filtered
+    return results
+
+
+def load_tfidf_matrix(index: SoloditFindingsIndex) -> TfidfMatrix:
+    # The TF-IDF vectors of every indexed finding, from the on-disk cache when
+    # it was built for this index version, otherwise rebuilt and saved.
+    key = cache_key(index.version)
+    matrix = load_matrix(key)
+    if matrix is None:
+        matrix = build_matrix(key, index.iter_corpus(), _keyword_tokens)
+        save_matrix(matrix)
+    return matrix
+
+
+class ScanSession:
+    # One findings index kept open across scans, with the scan cache and the
+    # TF-IDF matrix for its current version, for long-running callers such as
+    # `audit-helper serve`. Safe to share between threads. The version is
+    # re-read on every lookup, so a sync from another process is picked up
+    # by the next scan.
+    def __init__(self, index: Optional[SoloditFindingsIndex] = None) -> None:
+        self.index = index or SoloditFindingsIndex()
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        self._scan_cache: Optional[ScanCache] = None
+        self._matrix: Optional[TfidfMatrix] = None
+        # Caches of older versions may still be in use by a running scan;
+        # they are closed with the session.
+        self._retired: List[ScanCache] = []
+
+    def __enter__(self) -> "ScanSession":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            caches = self._retired + ([self._scan_cache] if self._scan_cache is not None else [])
+            self._retired, self._scan_cache, self._matrix = [], None, None
+        for cache in caches:
+            cache.close()
+        self.index.close()
+
+    def _refresh(self) -> str:
+        # Call with the lock held.
+        version = self.index.version
+        if version != self._version:
+            if self._scan_cache is not None:
+                self._retired.append(self._scan_cache)
+            self._version, self._scan_cache, self._matrix = version, None, None
+        return version
+
+    def scan_cache(self) -> ScanCache:
+        with self._lock:
+            version = self._refresh()
+            if self._scan_cache is None:
+                self._scan_cache = ScanCache(version, self.index.path)
+            return self._scan_cache
+
+    def matrix(self) -> TfidfMatrix:
+        # Loaded (or built) under the lock, so concurrent matrix scans after
+        # a sync build it once.
+        with self._lock:
+            self._refresh()
+            if self._matrix is None:
+                self._matrix = load_tfidf_matrix(self.index)
+            return self._matrix
+
+    def warm(self) -> int:
+        return self.index.warm()
+
+
+@contextmanager
+def _session_index(session: Optional[ScanSession]) -> Iterator[SoloditFindingsIndex]:
+    # The session's index, or one opened for this call only.
+    if session is not None:
+        yield session.index
+        return
+    with SoloditFindingsIndex() as index:
+        yield index
+
+
+def _matrix_search(
+    index: SoloditFindingsIndex,
+    matrix: TfidfMatrix,
+    functions: Sequence[SourceFunction],
+    *,
+    impact: Optional[List[str]],
+    quality_score: Optional[int],
+    limit: int,
+    jobs: int,
+) -> List[List[FeatureRow]]:
+    # Stand-in for the per-function FTS queries: the top findings by cosine
+    # between TF-IDF vectors of the function and finding texts, all functions
+    # at once. The same filters run on the result.
+    if not functions:
+        return []
+    ranked = matrix.top_k(
+        [Counter(_keyword_tokens(f"{func.name} {func.body}")) for func in functions],
+        k=limit,
         impact=impact,
         min_quality=quality_score,
+        jobs=jobs,
+    )
+    rows = index.feature_rows({finding_id for hits in ranked for finding_id, _ in hits})
+    return [[rows[finding_id] for finding_id, _ in hits if finding_id in rows] for hits in ranked]
+
+
+def _iter_function_matches(
+    sources: Iterable[SourceFile],
+    *,
+    impact: Optional[List[str]],
+    quality_score: Optional[int],
+    limit: int,
+    min_overlap: int,
+    min_code_similarity: float,
+    require_snippet: bool,
+    min_core_overlap: int,
+    use_scan_cache: bool = False,
+    similar_code: bool = False,
+    matrix: bool = False,
+    jobs: int = 1,
+    session: Optional[ScanSession] = None,
+) -> Iterator[dict]:
+    # One entry per function, in source order. Sources are matched in batches
+    # and each batch is yielded as soon as it is done, so callers can write
+    # results while the scan runs. A batch is a single file, except in matrix
+    # mode, where every pass touches the whole corpus and files are grouped
+    # until they hold MATRIX_BATCH_FUNCTIONS functions.
+    if matrix:
+        require_numpy()
+    with _session_index(session) as index, ExitStack() as stack:
+        scan_cache = None
+        if use_scan_cache:
+            scan_cache = session.scan_cache() if session is not None else stack.enter_context(ScanCache(index.version, index.path))
+        tfidf_matrix = None
+        if matrix:
+            with profiling.stage("match.load_matrix"):
+                tfidf_matrix = session.matrix() if session is not None else load_tfidf_matrix(index)
+        batch_size = MATRIX_BATCH_FUNCTIONS if matrix else 1
+        for batch in _source_batches(sources, batch_size):
+            yield from _match_batch(
+                index,
+                scan_cache,
+                tfidf_matrix,
+                [(source, func) for source in batch for func in source.functions],
+                impact=impact,
+                quality_score=quality_score,
+                limit=limit,
+                min_overlap=min_overlap,
+                min_code_similarity=min_code_similarity,
+                require_snippet=require_snippet,
+                min_core_overlap=min_core_overlap,
+                similar_code=similar_code,
+                jobs=jobs,
+            )
+
+
+def _source_batches(sources: Iterable[SourceFile], min_functions: int) -> Iterator[List[SourceFile]]:
+    batch: List[SourceFile] = []
+    count = 0
+    for source in sources:
+        batch.append(source)
+        count += len(source.functions)
+        if count >= min_functions:
+            yield batch
+            batch = []
+            count = 0
+    if batch:
+        yield batch
+
+
+def _match_batch(
+    index: SoloditFindingsIndex,
+    scan_cache: Optional[ScanCache],
+    tfidf_matrix: Optional[TfidfMatrix],
+    functions: List[Tuple[SourceFile, SourceFunction]],
+    *,
+    impact: Optional[List[str]],
+    quality_score: Optional[int],
+    limit: int,
+    min_overlap: int,
+    min_code_similarity: float,
+    require_snippet: bool,
+    min_core_overlap: int,
+    similar_code: bool,
+    jobs: int,
+) -> List[dict]:
+    options = {
+        "impact": impact,
+        "quality_score": quality_score,
+        "limit": limit,
+        "min_overlap": min_overlap,
+        "min_code_similarity": min_code_similarity,
+        "require_snippet": require_snippet,
+        "min_core_overlap": min_core_overlap,
+        "features": FEATURES_VERSION,
+        "similar_code": similar_code,
+        # Both candidate indexes feed --similar-code results.
+        "lsh": LSH_VERSION,
+        "shingles": SHINGLE_INDEX_VERSION,
+        "matrix": tfidf_matrix is not None,
+    }
+    matched: List[dict] = []
+    keys: List[str] = []
+    cached: Dict[str, List[dict]] = {}
+    if scan_cache is not None:
+        keys = [
+            scan_cache.make_key(func.name, func.body, dict(options, keywords=func.keywords))
+            for _, func in functions
+        ]
+        with profiling.stage("match.scan_cache"):
+            cached = scan_cache.get_many(keys)
+    misses = [
+        position
+        for position in range(len(functions))
+        if not keys or keys[position] not in cached
+    ]
+    if tfidf_matrix is not None:
+        with profiling.stage("match.matrix"):
+            searched = _matrix_search(
+                index,
+                tfidf_matrix,
+                [functions[position][1] for position in misses],
+                impact=impact,
+                quality_score=quality_score,
+                limit=limit,
+                jobs=jobs,
+            )
+    else:
+        # Timed per query inside the index (index.fts / index.decode).
+        searched = index.search_many_with_features(
+            [
+                (_build_fts_query(functions[position][1].keywords), impact, quality_score, limit)
+                for position in misses
+            ]
+        )
+    results_by_position = dict(zip(misses, searched))
+    code_matches: Dict[int, List[FeatureRow]] = {}
+    if similar_code and misses:
+        # Second candidate source: findings whose snippets look like the
+        # function, whatever their prose says.
+        with profiling.stage("match.similar_code"):
+            similar = index.similar_code_many(
+                [code_shingles(functions[position][1].body) for position in misses],
+                impact=impact,
+                min_quality=quality_score,
+                min_similarity=min_code_similarity if min_code_similarity > 0 else SIMILAR_CODE_MIN_SIMILARITY,
+                limit=limit,
+            )
+        code_matches = dict(zip(misses, similar))
+    kept_by_position: Dict[int, List[FeatureRow]] = {}
+    profiler = profiling.active()
+    for position in misses:
+        source, func = functions[position]
+        started = time.perf_counter() if profiler is not None else 0.0
+        kept = _filter_function_results(
+            results_by_position[position],
+            func.body,
+            func.keywords,
+            min_overlap=min_overlap,
+            min_code_similarity=min_code_similarity,
+            require_snippet=require_snippet,
+            min_core_overlap=min_core_overlap,
+        )
+        # Code matches already cleared the similarity bar and skip the
+        # keyword filters; that is the point of looking them up. They
+        # fill whatever room the text matches leave under the limit.
+        seen = {finding_id for finding_id, _, _ in kept}
+        kept = kept + [row for row in code_matches.get(position, []) if row[0] not in seen]
+        kept_by_position[position] = kept[:limit]
+        if profiler is not None:
+            elapsed = time.perf_counter() - started
+            profiler.add("match.filter", elapsed)
+            profiler.note("functions (filtering)", f"{source.path}::{func.name}", elapsed)
+    # Only the survivors' JSON is ever decoded, in one batch.
+    payloads = index.hydrate(
+        finding_id for kept in kept_by_position.values() for finding_id, _, _ in kept
+    )
+    fresh: List[Tuple[str, List[dict]]] = []
+    for position, (source, func) in enumerate(functions):
+        key = keys[position] if keys else ""
+        if key in cached:
+            results = cached[key]
+        else:
+            results = [
+                payloads[finding_id] if finding_id in payloads else row.finding
+                for finding_id, row, _ in kept_by_position[position]
+            ]
+            if key:
+                fresh.append((key, results))
+        matched.append(
+            {
+                "file": source.path,
+                "function": func.name,
+                "keywords": func.keywords,
+                "findings": results,
+            }
+        )
+    if scan_cache is not None and fresh:
+        with profiling.stage("match.scan_cache"):
+            scan_cache.set_many(fresh)
+    return matched
+
+
+def iter_local_index_per_function(
+    path: str,
+    *,
+    extra_keywords: Optional[Sequence[str]] = None,
+    impact: Optional[List[str]] = None,
+    quality_score: Optional[int] = None,
+    limit: int = 5,
+    include_base: bool = True,
+    min_overlap: int = 0,
+    min_code_similarity: float = 0.0,
+    require_snippet: bool = False,
+    min_core_overlap: int = 0,
+    jobs: int = 1,
+    use_scan_cache: bool = False,
+    similar_code: bool = False,
+    matrix: bool = False,
+    session: Optional[ScanSession] = None,
+) -> Tuple[AuditQuery, Iterator[dict]]:
+    query, sources = _load_path(
+        path,
+        extra_keywords=extra_keywords,
+        with_functions=True,
+        include_base=include_base,
+        jobs=jobs,
+    )
+    matches = _iter_function_matches(
+        sources,
+        impact=impact,
+        quality_score=quality_score,
         limit=limit,
+        min_overlap=min_overlap,
+        min_code_similarity=min_code_similarity,
+        require_snippet=require_snippet,
+        min_core_overlap=min_core_overlap,
+        use_scan_cache=use_scan_cache,
+        similar_code=similar_code,
+        matrix=matrix,
+        jobs=jobs,
+        session=session,
     )
-    return AuditQuery(keywords=query.keywords, sources=list(files)), results
+    return query, matches
+
+
+def iter_local_index_per_function_files(
+    files: Sequence[str],
+    *,
+    extra_keywords: Optional[Sequence[str]] = None,
+    impact: Optional[List[str]] = None,
+    quality_score: Optional[int] = None,
+    per_function_limit: int = 5,
+    include_base: bool = True,
+    min_overlap: int = 0,
+    min_code_similarity: float = 0.0,
+    require_snippet: bool = False,
+    min_core_overlap: int = 0,
+    jobs: int = 1,
+    use_scan_cache: bool = False,
+    similar_code: bool = False,
+    matrix: bool = False,
+    session: Optional[ScanSession] = None,
+) -> Tuple[AuditQuery, Iterator[dict]]:
+    query, sources = _load_files(
+        files,
+        extra_keywords=extra_keywords,
+        with_functions=True,
+        include_base=include_base,
+        jobs=jobs,
+    )
+    matches = _iter_function_matches(
+        sources,
+        impact=impact,
+        quality_score=quality_score,
+        limit=per_function_limit,
+        min_overlap=min_overlap,
+        min_code_similarity=min_code_similarity,
+        require_snippet=require_snippet,
+        min_core_overlap=min_core_overlap,
+        use_scan_cache=use_scan_cache,
+        similar_code=similar_code,
+        matrix=matrix,
+        jobs=jobs,
+        session=session,
+    )
+    return AuditQuery(keywords=query.keywords, sources=list(files)), matches
 
 
 def scan_local_index_per_function(
@@ -551,57 +1106,31 @@ def scan_local_index_per_function(
     min_code_similarity: float = 0.0,
     require_snippet: bool = False,
     min_core_overlap: int = 0,
+    jobs: int = 1,
+    use_scan_cache: bool = False,
+    similar_code: bool = False,
+    matrix: bool = False,
+    session: Optional[ScanSession] = None,
 ) -> Tuple[AuditQuery, List[dict]]:
-    query = build_query(path, extra_keywords=extra_keywords)
-    index = SoloditFindingsIndex()
-
-    findings_by_function: List[dict] = []
-    for file_path in query.sources:
-        if not file_path.endswith(".sol"):
-            continue
-        try:
-            text = _read_text(file_path)
-        except (OSError, UnicodeDecodeError):
-            continue
-        for func_name, body in _extract_solidity_functions(text):
-            func_keywords = _extract_keywords_from_text(
-                body,
-                extra_keywords=[func_name],
-                include_base=include_base,
-            )
-            fts_query = _build_fts_query(func_keywords)
-            results = index.search(
-                fts_query,
-                impact=impact,
-                min_quality=quality_score,
-                limit=limit,
-            )
-            if min_overlap > 0:
-                results = [r for r in results if _keyword_overlap(r, func_keywords) >= min_overlap]
-            if min_code_similarity > 0 or require_snippet:
-                filtered = []
-                for r in results:
-                    snippets = _extract_code_snippets(r)
-                    if require_snippet and not snippets:
-                        continue
-                    best = 0.0
-                    for snip in snippets:
-                        best = max(best, _code_similarity(body, snip))
-                    if best >= min_code_similarity:
-                        filtered.append(r)
-                results = filtered
-            if min_core_overlap > 0:
-                results = [r for r in results if _core_overlap(r, body, min_core_overlap)]
-            findings_by_function.append(
-                {
-                    "file": file_path,
-                    "function": func_name,
-                    "keywords": func_keywords,
-                    "findings": results,
-                }
-            )
-
-    return query, findings_by_function
+    # iter_local_index_per_function with every result collected.
+    query, matches = iter_local_index_per_function(
+        path,
+        extra_keywords=extra_keywords,
+        impact=impact,
+        quality_score=quality_score,
+        limit=limit,
+        include_base=include_base,
+        min_overlap=min_overlap,
+        min_code_similarity=min_code_similarity,
+        require_snippet=require_snippet,
+        min_core_overlap=min_core_overlap,
+        jobs=jobs,
+        use_scan_cache=use_scan_cache,
+        similar_code=similar_code,
+        matrix=matrix,
+        session=session,
+    )
+    return query, list(matches)
 
 
 def scan_local_index_per_function_files(
@@ -616,59 +1145,34 @@ def scan_local_index_per_function_files(
     min_code_similarity: float = 0.0,
     require_snippet: bool = False,
     min_core_overlap: int = 0,
+    jobs: int = 1,
+    use_scan_cache: bool = False,
+    similar_code: bool = False,
+    matrix: bool = False,
+    session: Optional[ScanSession] = None,
 ) -> Tuple[AuditQuery, List[dict]]:
-    query = _extract_keywords(list(files), extra_keywords=extra_keywords)
-    index = SoloditFindingsIndex()
-    findings_by_function: List[dict] = []
-    for file_path in files:
-        if not file_path.endswith(".sol"):
-            continue
-        try:
-            text = _read_text(file_path)
-        except (OSError, UnicodeDecodeError):
-            continue
-        for func_name, body in _extract_solidity_functions(text):
-            func_keywords = _extract_keywords_from_text(
-                body,
-                extra_keywords=[func_name],
-                include_base=include_base,
-            )
-            fts_query = _build_fts_query(func_keywords)
-            results = index.search(
-                fts_query,
-                impact=impact,
-                min_quality=quality_score,
-                limit=per_function_limit,
-            )
-            if min_overlap > 0:
-                results = [r for r in results if _keyword_overlap(r, func_keywords) >= min_overlap]
-            if min_code_similarity > 0 or require_snippet:
-                filtered = []
-                for r in results:
-                    snippets = _extract_code_snippets(r)
-                    if require_snippet and not snippets:
-                        continue
-                    best = 0.0
-                    for snip in snippets:
-                        best = max(best, _code_similarity(body, snip))
-                    if best >= min_code_similarity:
-                        filtered.append(r)
-                results = filtered
-            if min_core_overlap > 0:
-                results = [r for r in results if _core_overlap(r, body, min_core_overlap)]
-            findings_by_function.append(
-                {
-                    "file": file_path,
-                    "function": func_name,
-                    "keywords": func_keywords,
-                    "findings": results,
-                }
-            )
-    return AuditQuery(keywords=query.keywords, sources=list(files)), findings_by_function
+    query, matches = iter_local_index_per_function_files(
+        files,
+        extra_keywords=extra_keywords,
+        impact=impact,
+        quality_score=quality_score,
+        per_function_limit=per_function_limit,
+        include_base=include_base,
+        min_overlap=min_overlap,
+        min_code_similarity=min_code_similarity,
+        require_snippet=require_snippet,
+        min_core_overlap=min_core_overlap,
+        jobs=jobs,
+        use_scan_cache=use_scan_cache,
+        similar_code=similar_code,
+        matrix=matrix,
+        session=session,
+    )
+    return query, list(matches)
 
 
 def aggregate_unique_findings(
-    per_function_results: List[dict],
+    per_function_results: Iterable[dict],
     *,
     max_findings: int = 20,
     max_functions_per_finding: int = 3,
@@ -1,12 +1,33 @@
 import hashlib
 import json
 import os
-import sqlite3
+import pickle
+import threading
 import time
+import zlib
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any, Optional
+from typing import Any, Dict, Optional, Tuple
 
-from config import get_cache_path, get_cache_ttl_days
+from config import (
+    get_cache_eviction,
+    get_cache_max_bytes,
+    get_cache_memory_bytes,
+    get_cache_memory_entries,
+    get_cache_path,
+    get_cache_ttl_days,
+)
+from db import ConnectionPool
+
+COMPRESS_MIN_BYTES = 512
+COMPRESS_LEVEL = 6
+EVICTION_ORDER = {
+    "lru": "last_accessed",
+    "lfu": "hits, last_accessed",
+}
+EVICTION_HEADROOM = 0.9
+EVICTION_BATCH = 256
+TOUCH_FLUSH_THRESHOLD = 1024
 
 
 @dataclass
@@ -16,12 +37,113 @@ class CacheEntry:
     created_at: float
 
 
+class MemoryLRU:
+    # Payloads keyed by cache key, bounded by entry count and by the size of
+    # their JSON encoding (a cheap stand-in for their memory footprint).
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0], entry[1]
+
+    def put(self, key: str, payload: Any, created_at: float, size: int) -> None:
+        if self.max_entries <= 0 or size > self.max_bytes:
+            self.pop(key)
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+            self._entries[key] = (payload, created_at, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+
+    def pop(self, key: str) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+
+@dataclass
+class CacheStats:
+    entries: int
+    stored_bytes: int
+    file_bytes: int
+    max_bytes: int
+    hits: int
+    misses: int
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
 class SoloditCache:
-    def __init__(self, path: Optional[str] = None, ttl_days: Optional[int] = None) -> None:
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl_days: Optional[int] = None,
+        *,
+        memory_entries: Optional[int] = None,
+        memory_bytes: Optional[int] = None,
+        share_payloads: bool = False,
+        max_bytes: Optional[int] = None,
+        eviction: Optional[str] = None,
+    ) -> None:
         self.path = path or get_cache_path()
         self.ttl_seconds = (ttl_days or get_cache_ttl_days()) * 24 * 60 * 60
+        # With share_payloads every hit returns the same decoded object, so
+        # callers must treat cached payloads as read-only.
+        self.share_payloads = share_payloads
+        self.memory = MemoryLRU(
+            get_cache_memory_entries() if memory_entries is None else memory_entries,
+            get_cache_memory_bytes() if memory_bytes is None else memory_bytes,
+        )
+        self.max_bytes = get_cache_max_bytes() if max_bytes is None else max_bytes
+        self.eviction = (eviction or get_cache_eviction()).lower()
+        if self.eviction not in EVICTION_ORDER:
+            raise ValueError(f"Unknown cache eviction policy '{self.eviction}'")
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        # Access times and hit counts are buffered and written in bulk, so reads
+        # never turn into SQLite write transactions.
+        self._touched: Dict[str, Tuple[float, int]] = {}
         self._ensure_dir()
+        self._pool = ConnectionPool(self.path)
         self._init_db()
+        self._stored_bytes = self._sum_stored_bytes()
+
+    def __enter__(self) -> "SoloditCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.flush()
+        self._pool.close()
 
     def _ensure_dir(self) -> None:
         dir_path = os.path.dirname(self.path)
@@ -29,7 +151,7 @@ class SoloditCache:
             os.makedirs(dir_path, exist_ok=True)
 
     def _init_db(self) -> None:
-        with sqlite3.connect(self.path) as conn:
+        with self._pool.get() as conn:
             conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS cache (
@@ -39,6 +161,29 @@ class SoloditCache:
                 )
                 """
             )
+            # Columns added after the first release; older rows hold plain JSON text.
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(cache)")}
+            for name, decl in (
+                ("compressed", "INTEGER NOT NULL DEFAULT 0"),
+                ("size", "INTEGER NOT NULL DEFAULT 0"),
+                ("last_accessed", "REAL NOT NULL DEFAULT 0"),
+                ("hits", "INTEGER NOT NULL DEFAULT 0"),
+            ):
+                if name not in columns:
+                    conn.execute(f"ALTER TABLE cache ADD COLUMN {name} {decl}")
+            if "size" not in columns:
+                conn.execute(
+                    "UPDATE cache SET size = length(CAST(payload AS BLOB)), last_accessed = created_at"
+                )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_last_accessed ON cache(last_accessed)")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache_stats (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+                """
+            )
 
     @staticmethod
     def make_key(method: str, url: str, params: Optional[dict], body: Optional[dict]) -> str:
@@ -56,33 +201,200 @@ class SoloditCache:
 
     def get(self, key: str) -> Optional[CacheEntry]:
         now = time.time()
-        with sqlite3.connect(self.path) as conn:
-            row = conn.execute(
-                "SELECT payload, created_at FROM cache WHERE key = ?", (key,)
-            ).fetchone()
+        hit = self.memory.get(key)
+        if hit is not None:
+            stored, created_at = hit
+            if now - created_at > self.ttl_seconds:
+                self.delete(key)
+                self._record(key, now, hit=False)
+                return None
+            self._record(key, now, hit=True)
+            return CacheEntry(key=key, payload=self._hand_out(stored), created_at=created_at)
+
+        row = self._pool.get().execute(
+            "SELECT payload, created_at, compressed FROM cache WHERE key = ?", (key,)
+        ).fetchone()
         if not row:
+            self._record(key, now, hit=False)
             return None
-        payload_text, created_at = row
+        stored_payload, created_at, compressed = row
         if now - created_at > self.ttl_seconds:
             self.delete(key)
+            self._record(key, now, hit=False)
             return None
         try:
+            payload_text = _decode_payload(stored_payload, compressed)
             payload = json.loads(payload_text)
-        except json.JSONDecodeError:
+        except (json.JSONDecodeError, zlib.error, UnicodeDecodeError):
+            self._record(key, now, hit=False)
             return None
+        self._record(key, now, hit=True)
+        self.memory.put(key, self._keep(payload), created_at, len(payload_text))
         return CacheEntry(key=key, payload=payload, created_at=created_at)
 
     def set(self, key: str, payload: Any) -> None:
-        with sqlite3.connect(self.path) as conn:
+        payload_text = json.dumps(payload)
+        stored_payload, compressed = _encode_payload(payload_text)
+        size = len(stored_payload)
+        created_at = time.time()
+        with self._pool.get() as conn:
+            old = conn.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
             conn.execute(
-                "INSERT OR REPLACE INTO cache (key, payload, created_at) VALUES (?, ?, ?)",
-                (key, json.dumps(payload), time.time()),
+                """
+                INSERT OR REPLACE INTO cache
+                    (key, payload, created_at, compressed, size, last_accessed, hits)
+                VALUES (?, ?, ?, ?, ?, ?, 0)
+                """,
+                (key, stored_payload, created_at, compressed, size, created_at),
             )
+        self.memory.put(key, self._keep(payload), created_at, len(payload_text))
+        with self._lock:
+            self._stored_bytes += size - (old[0] if old else 0)
+            over_budget = 0 < self.max_bytes < self._stored_bytes
+        if over_budget:
+            self.evict()
 
     def delete(self, key: str) -> None:
-        with sqlite3.connect(self.path) as conn:
+        self.memory.pop(key)
+        with self._pool.get() as conn:
+            old = conn.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
             conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+        if old:
+            with self._lock:
+                self._stored_bytes -= old[0]
 
     def clear(self) -> None:
-        with sqlite3.connect(self.path) as conn:
+        self.memory.clear()
+        with self._lock:
+            self._touched.clear()
+            self._stored_bytes = 0
+        with self._pool.get() as conn:
             conn.execute("DELETE FROM cache")
+
+    def flush(self) -> None:
+        with self._lock:
+            touched, self._touched = self._touched, {}
+            hits, misses = self._hits, self._misses
+            self._hits = self._misses = 0
+        if not touched and not hits and not misses:
+            return
+        with self._pool.get() as conn:
+            conn.executemany(
+                "UPDATE cache SET last_accessed = MAX(last_accessed, ?), hits = hits + ? WHERE key = ?",
+                [(at, count, key) for key, (at, count) in touched.items()],
+            )
+            conn.executemany(
+                """
+                INSERT INTO cache_stats (name, value) VALUES (?, ?)
+                ON CONFLICT(name) DO UPDATE SET value = value + excluded.value
+                """,
+                [("hits", hits), ("misses", misses)],
+            )
+
+    def evict(self, target_bytes: Optional[int] = None) -> int:
+        if target_bytes is None:
+            if self.max_bytes <= 0:
+                return 0
+            # Evict below the cap so the next few writes don't trigger another pass.
+            target_bytes = int(self.max_bytes * EVICTION_HEADROOM)
+        self.flush()
+        conn = self._pool.get()
+        stored = self._sum_stored_bytes()
+        removed = 0
+        while stored > target_bytes:
+            rows = conn.execute(
+                f"SELECT key, size FROM cache ORDER BY {EVICTION_ORDER[self.eviction]} LIMIT ?",
+                (EVICTION_BATCH,),
+            ).fetchall()
+            if not rows:
+                break
+            victims = []
+            for key, size in rows:
+                if stored <= target_bytes:
+                    break
+                victims.append((key,))
+                stored -= size
+            with conn:
+                conn.executemany("DELETE FROM cache WHERE key = ?", victims)
+            for (key,) in victims:
+                self.memory.pop(key)
+            removed += len(victims)
+        with self._lock:
+            self._stored_bytes = stored
+        return removed
+
+    def sweep(self, *, vacuum: bool = True) -> int:
+        self.flush()
+        cutoff = time.time() - self.ttl_seconds
+        conn = self._pool.get()
+        expired = [row[0] for row in conn.execute("SELECT key FROM cache WHERE created_at < ?", (cutoff,))]
+        with conn:
+            conn.executemany("DELETE FROM cache WHERE key = ?", [(key,) for key in expired])
+        for key in expired:
+            self.memory.pop(key)
+        with self._lock:
+            self._stored_bytes = self._sum_stored_bytes()
+        removed = len(expired) + self.evict()
+        if vacuum:
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return removed
+
+    def stats(self) -> CacheStats:
+        self.flush()
+        conn = self._pool.get()
+        entries, stored_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        counters = dict(conn.execute("SELECT name, value FROM cache_stats").fetchall())
+        file_bytes = sum(
+            os.path.getsize(p)
+            for p in (self.path, f"{self.path}-wal", f"{self.path}-shm")
+            if os.path.exists(p)
+        )
+        return CacheStats(
+            entries=entries,
+            stored_bytes=stored_bytes,
+            file_bytes=file_bytes,
+            max_bytes=self.max_bytes,
+            hits=counters.get("hits", 0),
+            misses=counters.get("misses", 0),
+        )
+
+    def _record(self, key: str, now: float, *, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self._hits += 1
+                _, count = self._touched.get(key, (now, 0))
+                self._touched[key] = (now, count + 1)
+            else:
+                self._misses += 1
+            pending = len(self._touched) + self._hits + self._misses
+        if pending >= TOUCH_FLUSH_THRESHOLD:
+            self.flush()
+
+    def _sum_stored_bytes(self) -> int:
+        row = self._pool.get().execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()
+        return row[0]
+
+    def _keep(self, payload: Any) -> Any:
+        # Unless objects are shared, keep a pickled snapshot: unpickling hands out
+        # a private copy several times faster than json.loads or copy.deepcopy.
+        if self.share_payloads:
+            return payload
+        return pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _hand_out(self, stored: Any) -> Any:
+        return stored if self.share_payloads else pickle.loads(stored)
+
+
+def _encode_payload(payload_text: str) -> Tuple[Any, int]:
+    if len(payload_text) < COMPRESS_MIN_BYTES:
+        return payload_text, 0
+    return zlib.compress(payload_text.encode("utf-8"), COMPRESS_LEVEL), 1
+
+
+def _decode_payload(stored: Any, compressed: int) -> str:
+    if compressed:
+        return zlib.decompress(stored).decode("utf-8")
+    if isinstance(stored, bytes):
+        return stored.decode("utf-8")
+    return stored
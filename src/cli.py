@@ -1,19 +1,33 @@
 import argparse
+import io
 import os
 import json
-from typing import Dict, List, Optional
+import signal
+import sqlite3
+import sys
+import time
+from contextlib import nullcontext
+from functools import partial
+from typing import Any, ContextManager, Dict, Iterable, List, Optional, TextIO, Tuple, Type
 
 from cache import SoloditCache
 from audit import (
+    AuditQuery,
+    ScanSession,
     aggregate_unique_findings,
+    iter_local_index_per_function,
+    iter_local_index_per_function_files,
+    load_tfidf_matrix,
     scan_findings,
     scan_local_index,
     scan_local_index_files,
-    scan_local_index_per_function,
-    scan_local_index_per_function_files,
 )
 from client import SoloditClient
-from index import sync_findings
+from config import get_server_address, get_server_token, get_tfidf_cache_path
+from index import SoloditFindingsIndex, sync_findings, sync_incremental
+import profiling
+from server import DEFAULT_WORKERS, create_server
+from tfidf import available as tfidf_available
 
 
 def _parse_params(items: Optional[List[str]]) -> Dict[str, str]:
@@ -33,40 +47,57 @@ def _print_json(payload) -> None:
 
 
 def _cmd_search(args: argparse.Namespace) -> None:
-    client = SoloditClient()
-    payload = client.search(args.query, path=args.path)
+    with SoloditClient() as client:
+        payload = client.search(args.query, path=args.path)
     _print_json(payload)
 
 
 def _cmd_request(args: argparse.Namespace) -> None:
-    client = SoloditClient()
     params = _parse_params(args.params)
     body = _parse_params(args.body) if args.body else None
-    payload = client.request(
-        args.path,
-        method=args.method,
-        params=params or None,
-        body=body,
-        use_cache=not args.no_cache,
-    )
+    with SoloditClient() as client:
+        payload = client.request(
+            args.path,
+            method=args.method,
+            params=params or None,
+            body=body,
+            use_cache=not args.no_cache,
+        )
     _print_json(payload)
 
 
 def _cmd_cache_clear(_: argparse.Namespace) -> None:
-    cache = SoloditCache()
-    cache.clear()
+    with SoloditCache() as cache:
+        cache.clear()
     print("Cache cleared.")
 
 
+def _cmd_cache_stats(_: argparse.Namespace) -> None:
+    with SoloditCache() as cache:
+        stats = cache.stats()
+    limit = f"{stats.max_bytes / 1024 / 1024:.1f} MiB" if stats.max_bytes > 0 else "unlimited"
+    print(f"Path: {cache.path}")
+    print(f"Entries: {stats.entries}")
+    print(f"Stored payloads: {stats.stored_bytes / 1024 / 1024:.1f} MiB (limit: {limit}, eviction: {cache.eviction})")
+    print(f"File size: {stats.file_bytes / 1024 / 1024:.1f} MiB")
+    print(f"Hits: {stats.hits} | Misses: {stats.misses} | Hit ratio: {stats.hit_ratio:.1%}")
+
+
+def _cmd_cache_sweep(args: argparse.Namespace) -> None:
+    with SoloditCache() as cache:
+        removed = cache.sweep(vacuum=not args.no_vacuum)
+    print(f"Removed {removed} expired or evicted entries.")
+
+
 def _cmd_findings(args: argparse.Namespace) -> None:
-    client = SoloditClient()
     filters = json.loads(args.filters_json) if args.filters_json else None
-    payload = client.findings(
-        filters=filters,
-        page=args.page,
-        page_size=args.page_size,
-        path=args.path,
-    )
+    with SoloditClient() as client:
+        payload = client.findings(
+            filters=filters,
+            page=args.page,
+            page_size=args.page_size,
+            path=args.path,
+        )
     _print_json(payload)
 
 
@@ -94,14 +125,15 @@ def _render_report(payload: dict, top: int) -> str:
     return "\n".join(lines) + "\n"
 
 
-def _render_function_report(results: List[dict], top: int) -> str:
+def _write_function_report(fh: TextIO, results: Iterable[dict], top: int) -> None:
+    # Markdown for the first 10 functions with matches. Each one is flushed as
+    # soon as it is written; once 10 are out the rest of the scan is skipped.
     printed = 0
-    lines: List[str] = []
     for entry in results:
         findings = entry.get("findings", []) or []
         if not findings:
             continue
-        lines.append(f"Function: {entry.get('function')} ({entry.get('file')})")
+        lines = [f"Function: {entry.get('function')} ({entry.get('file')})"]
         for idx, finding in enumerate(findings[:top], start=1):
             title = finding.get("title", "Untitled")
             impact = finding.get("impact", "UNKNOWN")
@@ -113,10 +145,43 @@ def _render_function_report(results: List[dict], top: int) -> str:
             if link:
                 lines.append(f"     Link: {link}")
         lines.append("")
+        text = "\n".join(lines) + "\n"
+        with profiling.stage("report.write", len(text)):
+            fh.write(text)
+            fh.flush()
         printed += 1
         if printed >= 10:
             break
-    return "\n".join(lines) + ("\n" if lines else "")
+
+
+def _write_raw_results(fh: TextIO, results: Iterable[dict]) -> None:
+    # Byte-for-byte json.dumps({"results": [...]}, indent=2, sort_keys=True),
+    # written one entry at a time. Nested indentation only prefixes each
+    # newline, and strings never hold a raw newline.
+    fh.write('{\n  "results": [')
+    empty = True
+    for entry in results:
+        with profiling.stage("report.write") as stage:
+            body = json.dumps(entry, indent=2, sort_keys=True).replace("\n", "\n    ")
+            fh.write(("\n    " if empty else ",\n    ") + body)
+            fh.flush()
+            stage.nbytes = len(body)
+        empty = False
+    fh.write("]\n}" if empty else "\n  ]\n}")
+    fh.flush()
+
+
+def _write_json_lines(fh: TextIO, records: Iterable[dict]) -> None:
+    for record in records:
+        with profiling.stage("report.write") as stage:
+            line = json.dumps(record, sort_keys=True) + "\n"
+            fh.write(line)
+            fh.flush()
+            stage.nbytes = len(line)
+
+
+def _open_output(path: Optional[str], stdout: TextIO) -> ContextManager[TextIO]:
+    return open(path, "w", encoding="utf-8") if path else nullcontext(stdout)
 
 
 def _render_unique_report(results: List[dict]) -> str:
@@ -141,6 +206,14 @@ def _render_unique_report(results: List[dict]) -> str:
 
 
 def _cmd_scan(args: argparse.Namespace) -> None:
+    _run_scan(args, sys.stdout)
+
+
+def _run_scan(args: argparse.Namespace, stdout: TextIO, session: Optional[ScanSession] = None) -> None:
+    # Everything `scan` prints goes to stdout, so `serve` can run it per
+    # request; session is the server's warm index.
+    if args.matrix and not tfidf_available():
+        raise SystemExit('--matrix needs numpy: pip install -e ".[matrix]"')
     if args.api:
         query, payload = scan_findings(
             args.path,
@@ -152,19 +225,12 @@ def _cmd_scan(args: argparse.Namespace) -> None:
             page=args.page,
             page_size=args.page_size,
         )
-        print(json.dumps({"sources": query.sources, "keywords": query.keywords}, indent=2))
-        if args.raw:
-            output = json.dumps(payload, indent=2, sort_keys=True)
-        else:
-            output = _render_report(payload, top=args.top)
-        if args.out:
-            with open(args.out, "w", encoding="utf-8") as fh:
-                fh.write(output)
-        else:
-            print(output, end="")
+        _print_query(args, query, stdout)
+        _write_payload(args, payload, stdout)
         return
 
     if args.per_function or args.unique_findings:
+        per_func_limit = 1 if args.unique_findings else args.top
         if args.file_list:
             with open(args.file_list, "r", encoding="utf-8") as fh:
                 files = [line.strip() for line in fh if line.strip()]
@@ -172,8 +238,7 @@ def _cmd_scan(args: argparse.Namespace) -> None:
                 f if os.path.isabs(f) else os.path.normpath(os.path.join(args.path, f))
                 for f in files
             ]
-            per_func_limit = 1 if args.unique_findings else args.top
-            query, func_results = scan_local_index_per_function_files(
+            query, func_results = iter_local_index_per_function_files(
                 files,
                 extra_keywords=args.keyword,
                 impact=args.impact,
@@ -184,10 +249,14 @@ def _cmd_scan(args: argparse.Namespace) -> None:
                 min_code_similarity=args.min_code_similarity,
                 require_snippet=args.require_snippet,
                 min_core_overlap=args.min_core_overlap,
+                jobs=args.jobs,
+                use_scan_cache=not args.no_scan_cache,
+                similar_code=args.similar_code,
+                matrix=args.matrix,
+                session=session,
             )
         else:
-            per_func_limit = 1 if args.unique_findings else args.top
-            query, func_results = scan_local_index_per_function(
+            query, func_results = iter_local_index_per_function(
                 args.path,
                 extra_keywords=args.keyword,
                 impact=args.impact,
@@ -198,25 +267,35 @@ def _cmd_scan(args: argparse.Namespace) -> None:
                 min_code_similarity=args.min_code_similarity,
                 require_snippet=args.require_snippet,
                 min_core_overlap=args.min_core_overlap,
+                jobs=args.jobs,
+                use_scan_cache=not args.no_scan_cache,
+                similar_code=args.similar_code,
+                matrix=args.matrix,
+                session=session,
             )
-        print(json.dumps({"sources": query.sources, "keywords": query.keywords}, indent=2))
-        if args.raw:
-            output = json.dumps({"results": func_results}, indent=2, sort_keys=True)
-        else:
-            if args.unique_findings:
+        _print_query(args, query, stdout)
+        # func_results is a generator: every writer below consumes it as the
+        # scan goes, so output appears per function instead of at the end.
+        with _open_output(args.out, stdout) as fh:
+            if args.raw:
+                _write_raw_results(fh, func_results)
+            elif args.unique_findings:
                 unique = aggregate_unique_findings(
                     func_results,
                     max_findings=args.unique_findings,
                     max_functions_per_finding=3,
                 )
-                output = _render_unique_report(unique)
+                if args.jsonl:
+                    _write_json_lines(fh, unique)
+                else:
+                    with profiling.stage("report.write") as stage:
+                        text = _render_unique_report(unique)
+                        fh.write(text)
+                        stage.nbytes = len(text)
+            elif args.jsonl:
+                _write_json_lines(fh, func_results)
             else:
-                output = _render_function_report(func_results, top=args.top)
-        if args.out:
-            with open(args.out, "w", encoding="utf-8") as fh:
-                fh.write(output)
-        else:
-            print(output, end="")
+                _write_function_report(fh, func_results, top=args.top)
         return
 
     if args.file_list:
@@ -232,6 +311,8 @@ def _cmd_scan(args: argparse.Namespace) -> None:
             impact=args.impact,
             quality_score=args.quality_score,
             limit=args.top,
+            jobs=args.jobs,
+            session=session,
         )
     else:
         query, results = scan_local_index(
@@ -240,35 +321,215 @@ def _cmd_scan(args: argparse.Namespace) -> None:
             impact=args.impact,
             quality_score=args.quality_score,
             limit=args.top,
+            jobs=args.jobs,
+            session=session,
         )
-    print(json.dumps({"sources": query.sources, "keywords": query.keywords}, indent=2))
-    payload = {"findings": results, "metadata": {"totalResults": len(results)}}
-    if args.raw:
-        output = json.dumps(payload, indent=2, sort_keys=True)
-    else:
-        output = _render_report(payload, top=args.top)
-    if args.out:
-        with open(args.out, "w", encoding="utf-8") as fh:
-            fh.write(output)
+    _print_query(args, query, stdout)
+    _write_payload(args, {"findings": results, "metadata": {"totalResults": len(results)}}, stdout)
+
+
+def _print_query(args: argparse.Namespace, query: AuditQuery, stdout: TextIO) -> None:
+    header = {"sources": query.sources, "keywords": query.keywords}
+    if args.jsonl:
+        # One compact record, so stdout stays valid JSON Lines.
+        print(json.dumps(header), file=stdout)
     else:
-        print(output, end="")
+        print(json.dumps(header, indent=2), file=stdout)
+
+
+def _write_payload(args: argparse.Namespace, payload: dict, stdout: TextIO) -> None:
+    with _open_output(args.out, stdout) as fh:
+        if args.jsonl:
+            _write_json_lines(fh, payload.get("findings", []) or [])
+            return
+        with profiling.stage("report.write") as stage:
+            text = json.dumps(payload, indent=2, sort_keys=True) if args.raw else _render_report(payload, top=args.top)
+            fh.write(text)
+            stage.nbytes = len(text)
 
 
 def _cmd_sync(args: argparse.Namespace) -> None:
     if args.page_size > 100:
         raise SystemExit("page-size must be <= 100 for the Solodit API")
-    count = sync_findings(
-        page_size=args.page_size,
-        max_pages=args.max_pages,
-        sleep_seconds=args.sleep_seconds,
-        start_page=args.start_page,
-        resume=args.resume,
+    index = SoloditFindingsIndex()
+    with index, (index.bulk_load() if args.bulk else nullcontext()):
+        if args.incremental:
+            count = sync_incremental(
+                page_size=args.page_size,
+                max_pages=args.max_pages,
+                sleep_seconds=args.sleep_seconds,
+                index=index,
+            )
+        else:
+            count = sync_findings(
+                page_size=args.page_size,
+                max_pages=args.max_pages,
+                sleep_seconds=args.sleep_seconds,
+                index=index,
+                start_page=args.start_page,
+                resume=args.resume,
+                concurrency=args.concurrency,
+            )
+    if count and tfidf_available() and os.path.exists(get_tfidf_cache_path()):
+        # Matrix mode is in use; rebuild its cache now rather than on the next scan.
+        with SoloditFindingsIndex() as refreshed:
+            load_tfidf_matrix(refreshed)
+    label = "new findings" if args.incremental else "findings"
+    rate = index.ingest_stats.rows_per_second
+    print(f"Synced {count} {label} into the local index ({rate:.0f} rows/s written).")
+
+
+class _UsageExit(Exception):
+    def __init__(self, status: int, text: str) -> None:
+        super().__init__(text)
+        self.status = status
+        self.text = text
+
+
+class _RequestParser(argparse.ArgumentParser):
+    # Parses the arguments a client sends to `serve`: --help and usage errors
+    # go back to the client instead of being printed by the server.
+    def print_help(self, file: Optional[TextIO] = None) -> None:
+        raise _UsageExit(0, self.format_help())
+
+    def error(self, message: str) -> None:
+        raise _UsageExit(2, f"{self.format_usage()}{self.prog}: error: {message}\n")
+
+
+def _serve_scan(session: ScanSession, body: dict) -> Tuple[int, dict]:
+    # {"args": [...], "cwd": "/abs/dir"} -> what `audit-helper scan ARGS` run
+    # in cwd would print, and its exit status.
+    argv = body.get("args")
+    cwd = body.get("cwd")
+    if not isinstance(argv, list) or not all(isinstance(arg, str) for arg in argv):
+        return 400, {"error": "args must be a list of strings"}
+    if not isinstance(cwd, str) or not os.path.isabs(cwd):
+        return 400, {"error": "cwd must be an absolute path"}
+    stdout = io.StringIO()
+    try:
+        args = build_parser(_RequestParser, prog="audit-helper").parse_args(["scan", *argv])
+        if args.profile or args.profile_json:
+            raise SystemExit("--profile is not available per request; start the server with `serve --profile`")
+        # The server only reads what the scan itself names and never writes
+        # files; the client prints the report and can redirect it.
+        if args.out:
+            raise SystemExit("--out is not available through the server; redirect the client's output instead")
+        if args.file_list:
+            raise SystemExit("--file-list is not available through the server; run `audit-helper scan` directly")
+        args.path = os.path.normpath(os.path.join(cwd, args.path))
+        # Worker processes do not mix with the server's threads; concurrent
+        # requests already run side by side.
+        args.jobs = 1
+        _run_scan(args, stdout, session)
+    except _UsageExit as exc:
+        if exc.status == 0:
+            return 200, {"status": 0, "stdout": exc.text, "stderr": ""}
+        return 200, {"status": exc.status, "stdout": "", "stderr": exc.text}
+    except SystemExit as exc:
+        if isinstance(exc.code, str):
+            return 200, {"status": 1, "stdout": stdout.getvalue(), "stderr": exc.code + "\n"}
+        return 200, {"status": exc.code or 0, "stdout": stdout.getvalue(), "stderr": ""}
+    return 200, {"status": 0, "stdout": stdout.getvalue(), "stderr": ""}
+
+
+def _serve_search(session: ScanSession, body: dict) -> Tuple[int, dict]:
+    # Full-text search of the local index: {"query": FTS5 query, "impact":
+    # [...], "quality_score": n, "limit": n}.
+    query = body.get("query")
+    if not isinstance(query, str) or not query.strip():
+        return 400, {"error": "query must be a non-empty string"}
+    try:
+        findings = session.index.search(
+            query,
+            impact=body.get("impact") or None,
+            min_quality=body.get("quality_score"),
+            limit=int(body.get("limit") or 20),
+        )
+    except sqlite3.OperationalError as exc:
+        return 400, {"error": f"Invalid search query: {exc}"}
+    return 200, {"findings": findings}
+
+
+def _serve_status(session: ScanSession, server: Any, started: float, _: Optional[dict]) -> Tuple[int, dict]:
+    return 200, {
+        "index_version": session.index.version,
+        "requests": server.requests,
+        "uptime_seconds": round(time.time() - started, 3),
+    }
+
+
+def _cmd_serve(args: argparse.Namespace) -> None:
+    if args.matrix and not tfidf_available():
+        raise SystemExit('--matrix needs numpy: pip install -e ".[matrix]"')
+    session = ScanSession()
+    try:
+        warmed = session.warm()
+        if args.matrix:
+            session.matrix()
+        routes: Dict[Tuple[str, str], Any] = {
+            ("POST", "/scan"): partial(_serve_scan, session),
+            ("POST", "/search"): partial(_serve_search, session),
+        }
+        try:
+            server = create_server(
+                args.listen,
+                routes,
+                workers=args.workers,
+                verbose=args.verbose,
+                token=get_server_token(),
+            )
+        except (ValueError, RuntimeError, OSError) as exc:
+            raise SystemExit(f"Cannot listen on {args.listen}: {exc}")
+        routes[("GET", "/status")] = partial(_serve_status, session, server, time.time())
+        # SIGTERM (e.g. from a service manager) shuts down like Ctrl-C.
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        print(
+            f"Serving on {args.listen} with {args.workers} workers ({warmed / 1024 / 1024:.1f} MiB of index warmed).",
+            file=sys.stderr,
+            flush=True,
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    finally:
+        session.close()
+
+
+def _add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print wall time, calls and bytes per stage, and the slowest functions and FTS queries, to stderr",
+    )
+    parser.add_argument("--profile-json", help="Write the profile as JSON to this path")
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=profiling.DEFAULT_TOP,
+        help=f"Slowest items to keep per kind (default: {profiling.DEFAULT_TOP})",
     )
-    print(f"Synced {count} findings into the local index.")
 
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description="Solodit API CLI")
+def _finish_profile(args: argparse.Namespace) -> None:
+    profiler = profiling.stop()
+    if profiler is None:
+        return
+    if args.profile:
+        sys.stderr.write(profiler.render())
+    if args.profile_json:
+        with open(args.profile_json, "w", encoding="utf-8") as fh:
+            json.dump(dict(profiler.to_dict(), command=sys.argv[1:]), fh, indent=2)
+            fh.write("\n")
+
+
+def build_parser(
+    parser_class: Type[argparse.ArgumentParser] = argparse.ArgumentParser,
+    prog: Optional[str] = None,
+) -> argparse.ArgumentParser:
+    parser = parser_class(prog=prog, description="Solodit API CLI")
     sub = parser.add_subparsers(dest="cmd", required=True)
 
     search = sub.add_parser("search", help="Search Solodit by query")
@@ -316,7 +577,13 @@ def main() -> None:
     scan.add_argument("--page", type=int, default=1, help="Page number (default: 1)")
     scan.add_argument("--page-size", type=int, default=20, help="Page size (default: 20)")
     scan.add_argument("--top", type=int, default=5, help="Top findings to print (default: 5)")
-    scan.add_argument("--raw", action="store_true", help="Print raw JSON instead of report")
+    scan_format = scan.add_mutually_exclusive_group()
+    scan_format.add_argument("--raw", action="store_true", help="Print raw JSON instead of report")
+    scan_format.add_argument(
+        "--jsonl",
+        action="store_true",
+        help="Print JSON Lines: one object per function (or per finding) instead of report",
+    )
     scan.add_argument("--api", action="store_true", help="Query the API directly instead of the local index")
     scan.add_argument("--per-function", action="store_true", help="Match findings per Solidity function")
     scan.add_argument("--out", help="Write report to a file instead of stdout")
@@ -354,21 +621,116 @@ def main() -> None:
         default=2,
         help="Minimum overlap on core security terms (default: 2)",
     )
+    scan.add_argument(
+        "--similar-code",
+        action="store_true",
+        help="Also match findings whose code snippets resemble each function, regardless of keywords",
+    )
+    scan.add_argument(
+        "--matrix",
+        action="store_true",
+        help="Rank findings for every function at once by TF-IDF similarity instead of one FTS query each (needs numpy)",
+    )
+    scan.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Read and tokenize source files with N worker processes (default: 1)",
+    )
+    scan.add_argument(
+        "--no-scan-cache",
+        action="store_true",
+        help="Re-match every function instead of reusing results for unchanged functions",
+    )
+    _add_profile_arguments(scan)
     scan.set_defaults(func=_cmd_scan)
 
     sync = sub.add_parser("sync", help="Sync findings into the local index")
     sync.add_argument("--page-size", type=int, default=100, help="Page size (default: 100)")
     sync.add_argument("--max-pages", type=int, help="Maximum pages to fetch")
-    sync.add_argument("--sleep-seconds", type=float, default=0.2, help="Delay between requests")
+    sync.add_argument(
+        "--sleep-seconds",
+        type=float,
+        default=0.0,
+        help="Extra delay between requests (default: 0; requests are already paced by the API quota, or 0.2s apart until one is reported)",
+    )
     sync.add_argument("--start-page", type=int, default=1, help="Start page (default: 1)")
     sync.add_argument("--resume", action="store_true", help="Resume from last synced page")
+    sync.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Fetch pages with N parallel workers and a single index writer (default: 1)",
+    )
+    sync.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Fetch newest findings first and stop at the last sync's watermark",
+    )
+    sync.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Suspend FTS automerge during the load and optimize the index at the end",
+    )
+    _add_profile_arguments(sync)
     sync.set_defaults(func=_cmd_sync)
 
     cache_clear = sub.add_parser("cache-clear", help="Clear the local cache")
     cache_clear.set_defaults(func=_cmd_cache_clear)
 
-    args = parser.parse_args()
-    args.func(args)
+    cache_stats = sub.add_parser("cache-stats", help="Show cache size, entry count and hit ratio")
+    cache_stats.set_defaults(func=_cmd_cache_stats)
+
+    cache_sweep = sub.add_parser(
+        "cache-sweep",
+        help="Purge expired entries, enforce the size limit and vacuum the cache",
+    )
+    cache_sweep.add_argument("--no-vacuum", action="store_true", help="Skip VACUUM after purging")
+    cache_sweep.set_defaults(func=_cmd_cache_sweep)
+
+    serve = sub.add_parser(
+        "serve",
+        help="Keep the local index warm and answer scan/search requests from audit-helper-client",
+    )
+    serve.add_argument(
+        "--listen",
+        default=get_server_address(),
+        help="unix:PATH, or a loopback HOST:PORT (needs SOLODIT_SERVER_TOKEN), to listen on (default: %(default)s, from SOLODIT_SERVER when set)",
+    )
+    serve.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Requests handled at once (default: {DEFAULT_WORKERS})",
+    )
+    serve.add_argument(
+        "--matrix",
+        action="store_true",
+        help="Load the TF-IDF finding vectors at startup instead of on the first --matrix scan (needs numpy)",
+    )
+    serve.add_argument("--verbose", action="store_true", help="Log every request to stderr")
+    _add_profile_arguments(serve)
+    serve.set_defaults(func=_cmd_serve)
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    if getattr(args, "profile", False) or getattr(args, "profile_json", None):
+        profiling.start(args.profile_top)
+    try:
+        args.func(args)
+    except BrokenPipeError:
+        # The reader (e.g. `| head`) went away mid-stream. Point stdout at
+        # devnull so the interpreter's final flush does not raise again.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        raise SystemExit(1)
+    finally:
+        # Also after a failure or Ctrl-C: a partial profile still shows
+        # where the time went.
+        if profiling.active() is not None:
+            _finish_profile(args)
 
 
 if __name__ == "__main__":
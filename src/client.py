@@ -1,12 +1,25 @@
+import hashlib
 import json
+import threading
 import time
-import urllib.error
 import urllib.parse
-import urllib.request
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
 
 from cache import SoloditCache
-from config import get_api_key, get_base_url
+from config import (
+    get_api_key,
+    get_base_url,
+    get_connect_timeout,
+    get_read_timeout,
+    get_shared_rate_limit,
+)
+import profiling
+from ratelimit import RateLimiter
+
+DEFAULT_POOL_SIZE = 16
 
 
 class SoloditClient:
@@ -15,10 +28,57 @@ class SoloditClient:
         base_url: Optional[str] = None,
         api_key: Optional[str] = None,
         cache: Optional[SoloditCache] = None,
+        *,
+        timeout: Optional[Union[float, Tuple[float, float]]] = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        rate_limiter: Optional[RateLimiter] = None,
     ) -> None:
         self.base_url = (base_url or get_base_url()).rstrip("/")
         self.api_key = api_key or get_api_key()
+        self._owns_cache = cache is None
         self.cache = cache or SoloditCache()
+        self.timeout = timeout or (get_connect_timeout(), get_read_timeout())
+        self._owns_rate_limiter = rate_limiter is None
+        self.rate_limiter = rate_limiter or RateLimiter(
+            key=hashlib.sha256(self.api_key.encode("utf-8")).hexdigest()[:16],
+            shared_path=self.cache.path if get_shared_rate_limit() else None,
+        )
+        # Every thread gets its own Session (they are not thread-safe), but all of
+        # them share one adapter, so keep-alive connections are pooled process-wide.
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._local = threading.local()
+        self._sessions_lock = threading.Lock()
+        self._sessions: List[requests.Session] = []
+
+    def __enter__(self) -> "SoloditClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._sessions_lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+        self._adapter.close()
+        self._local = threading.local()
+        if self._owns_rate_limiter:
+            self.rate_limiter.close()
+        if self._owns_cache:
+            self.cache.close()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", self._adapter)
+            session.mount("http://", self._adapter)
+            session.headers.update({"Accept": "application/json", "Accept-Encoding": "gzip, deflate"})
+            with self._sessions_lock:
+                self._sessions.append(session)
+            self._local.session = session
+        return session
 
     def _build_url(self, path: str, params: Optional[Dict[str, Any]] = None) -> str:
         path = path if path.startswith("/") else f"/{path}"
@@ -40,51 +100,84 @@ class SoloditClient:
         backoff_seconds: float = 5.0,
     ) -> Any:
         url = self._build_url(path, params)
-        headers = {"Accept": "application/json"}
-        if self.api_key:
-            headers["X-Cyfrin-API-Key"] = self.api_key
-
         cache_key = self.cache.make_key(method, url, params, body)
         if use_cache:
-            cached = self.cache.get(cache_key)
+            with profiling.stage("api.cache"):
+                cached = self.cache.get(cache_key)
             if cached is not None:
                 return cached.payload
 
+        payload = self.fetch(
+            url,
+            method=method,
+            body=body,
+            max_retries=max_retries,
+            backoff_seconds=backoff_seconds,
+        )
+        if use_cache:
+            with profiling.stage("api.cache"):
+                self.cache.set(cache_key, payload)
+        return payload
+
+    def fetch(
+        self,
+        url: str,
+        *,
+        method: str = "GET",
+        body: Optional[Dict[str, Any]] = None,
+        max_retries: int = 5,
+        backoff_seconds: float = 5.0,
+    ) -> Any:
+        headers: Dict[str, str] = {}
+        if self.api_key:
+            headers["X-Cyfrin-API-Key"] = self.api_key
         data = None
         if body is not None:
             data = json.dumps(body).encode("utf-8")
             headers["Content-Type"] = "application/json"
 
-        req = urllib.request.Request(url, data=data, method=method.upper(), headers=headers)
+        session = self._session()
         attempt = 0
         while True:
+            with profiling.stage("api.wait"):
+                self.rate_limiter.acquire()
             try:
-                with urllib.request.urlopen(req, timeout=30) as resp:
-                    raw = resp.read().decode("utf-8")
+                with profiling.stage("api.request") as stage:
+                    resp = session.request(
+                        method.upper(),
+                        url,
+                        data=data,
+                        headers=headers,
+                        timeout=self.timeout,
+                    )
+                    # requests transparently inflates gzip/deflate bodies.
+                    content = resp.content
+                    stage.nbytes = len(content)
+            except requests.RequestException as exc:
+                raise RuntimeError(f"Solodit API connection error: {exc}") from exc
+            quota_in_headers = self.rate_limiter.update_from_headers(resp.headers)
+            raw = content.decode("utf-8")
+            if resp.status_code < 400:
+                with profiling.stage("api.decode", len(content)):
                     payload = json.loads(raw) if raw else {}
+                if not quota_in_headers:
+                    self.rate_limiter.update_from_body(payload)
                 break
-            except urllib.error.HTTPError as exc:
-                raw = exc.read().decode("utf-8")
-                if exc.code == 429 and attempt < max_retries:
-                    retry_after = exc.headers.get("Retry-After")
-                    reset_at = exc.headers.get("X-RateLimit-Reset")
-                    sleep_for = None
-                    if retry_after and retry_after.isdigit():
-                        sleep_for = int(retry_after)
-                    elif reset_at and reset_at.isdigit():
-                        reset_ts = int(reset_at)
-                        sleep_for = max(0, reset_ts - int(time.time())) + 1
-                    else:
-                        sleep_for = backoff_seconds * (2**attempt)
-                    time.sleep(sleep_for)
-                    attempt += 1
-                    continue
-                raise RuntimeError(f"Solodit API error {exc.code}: {raw}") from exc
-            except urllib.error.URLError as exc:
-                raise RuntimeError(f"Solodit API connection error: {exc}") from exc
-
-        if use_cache:
-            self.cache.set(cache_key, payload)
+            if resp.status_code == 429 and attempt < max_retries:
+                retry_after = resp.headers.get("Retry-After")
+                reset_at = resp.headers.get("X-RateLimit-Reset")
+                sleep_for = None
+                if retry_after and retry_after.isdigit():
+                    sleep_for = int(retry_after)
+                elif reset_at and reset_at.isdigit():
+                    reset_ts = int(reset_at)
+                    sleep_for = max(0, reset_ts - int(time.time())) + 1
+                else:
+                    sleep_for = backoff_seconds * (2**attempt)
+                time.sleep(sleep_for)
+                attempt += 1
+                continue
+            raise RuntimeError(f"Solodit API error {resp.status_code}: {raw}")
         return payload
 
     def search(self, query: str, *, path: str = "/search") -> Any:
@@ -97,10 +190,11 @@ class SoloditClient:
         page: int = 1,
         page_size: int = 50,
         path: str = "/findings",
+        use_cache: bool = True,
     ) -> Any:
         body = {
             "page": page,
             "pageSize": page_size,
             "filters": filters or {},
         }
-        return self.request(path, method="POST", body=body)
+        return self.request(path, method="POST", body=body, use_cache=use_cache)
@@ -1,9 +1,19 @@
 import os
+from typing import Optional
 
 DEFAULT_BASE_URL = "https://solodit.cyfrin.io/api/v1/solodit"
 DEFAULT_CACHE_PATH = os.path.expanduser("~/.cache/solodit_cache.sqlite")
 DEFAULT_FINDINGS_DB_PATH = os.path.expanduser("~/.cache/solodit_findings.sqlite")
+DEFAULT_SCAN_CACHE_PATH = os.path.expanduser("~/.cache/solodit_scan_cache.sqlite")
+DEFAULT_TFIDF_CACHE_PATH = os.path.expanduser("~/.cache/solodit_tfidf.npz")
 DEFAULT_CACHE_TTL_DAYS = 30
+DEFAULT_CACHE_MEMORY_ENTRIES = 1024
+DEFAULT_CACHE_MEMORY_MB = 64
+DEFAULT_CACHE_MAX_MB = 512
+DEFAULT_CACHE_EVICTION = "lru"
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 30.0
+DEFAULT_SERVER_ADDRESS = "unix:" + os.path.expanduser("~/.cache/audit-helper.sock")
 
 
 def get_base_url() -> str:
@@ -18,6 +28,24 @@ def get_findings_db_path() -> str:
     return os.environ.get("SOLODIT_FINDINGS_DB_PATH", DEFAULT_FINDINGS_DB_PATH)
 
 
+def get_scan_cache_path() -> str:
+    return os.environ.get("SOLODIT_SCAN_CACHE_PATH", DEFAULT_SCAN_CACHE_PATH)
+
+
+def get_tfidf_cache_path() -> str:
+    return os.environ.get("SOLODIT_TFIDF_CACHE_PATH", DEFAULT_TFIDF_CACHE_PATH)
+
+
+def get_server_address() -> str:
+    # HOST:PORT, or unix:PATH for a Unix socket.
+    return os.environ.get("SOLODIT_SERVER", DEFAULT_SERVER_ADDRESS)
+
+
+def get_server_token() -> Optional[str]:
+    # Shared secret for `serve` on TCP; the Unix socket relies on file modes.
+    return os.environ.get("SOLODIT_SERVER_TOKEN") or None
+
+
 def get_cache_ttl_days() -> int:
     raw = os.environ.get("SOLODIT_CACHE_TTL_DAYS", str(DEFAULT_CACHE_TTL_DAYS))
     try:
@@ -26,5 +54,45 @@ def get_cache_ttl_days() -> int:
         return DEFAULT_CACHE_TTL_DAYS
 
 
+def get_cache_memory_entries() -> int:
+    raw = os.environ.get("SOLODIT_CACHE_MEMORY_ENTRIES", str(DEFAULT_CACHE_MEMORY_ENTRIES))
+    try:
+        return int(raw)
+    except ValueError:
+        return DEFAULT_CACHE_MEMORY_ENTRIES
+
+
+def get_cache_memory_bytes() -> int:
+    return int(_get_float("SOLODIT_CACHE_MEMORY_MB", DEFAULT_CACHE_MEMORY_MB) * 1024 * 1024)
+
+
+def get_cache_max_bytes() -> int:
+    return int(_get_float("SOLODIT_CACHE_MAX_MB", DEFAULT_CACHE_MAX_MB) * 1024 * 1024)
+
+
+def get_cache_eviction() -> str:
+    return os.environ.get("SOLODIT_CACHE_EVICTION", DEFAULT_CACHE_EVICTION)
+
+
+def _get_float(name: str, default: float) -> float:
+    raw = os.environ.get(name, str(default))
+    try:
+        return float(raw)
+    except ValueError:
+        return default
+
+
+def get_connect_timeout() -> float:
+    return _get_float("SOLODIT_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)
+
+
+def get_read_timeout() -> float:
+    return _get_float("SOLODIT_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)
+
+
+def get_shared_rate_limit() -> bool:
+    return os.environ.get("SOLODIT_SHARED_RATE_LIMIT", "").lower() in {"1", "true", "yes"}
+
+
 def get_api_key() -> str:
     return os.environ.get("SOLODIT_API_KEY", "")
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import re
+from array import array
+from dataclasses import dataclass
+from typing import FrozenSet, List, Tuple
+
+# Bump when anything below changes what is stored, so the index recomputes
+# features for rows written by an older version.
+FEATURES_VERSION = 1
+
+CORE_SECURITY_TERMS = [
+    "reentrancy",
+    "delegatecall",
+    "call",
+    "staticcall",
+    "oracle",
+    "price",
+    "timelock",
+    "upgrade",
+    "proxy",
+    "signature",
+    "nonce",
+    "permit",
+    "access",
+    "auth",
+    "ownership",
+    "bridge",
+    "cross-chain",
+    "dos",
+    "grief",
+    "front-run",
+    "frontrun",
+    "flashloan",
+    "slippage",
+]
+
+SNIPPET_FIELDS = ("content", "code", "snippet", "snippets", "poc", "details", "description", "summary", "analysis")
+
+CODE_KEYWORDS = {
+    "if", "else", "for", "while", "return", "require", "revert", "assert", "emit", "function", "constructor",
+    "mapping", "struct", "event", "error", "modifier", "public", "private", "internal", "external", "view", "pure",
+    "memory", "calldata", "storage", "payable", "unchecked", "try", "catch", "new",
+}
+
+_CODE_BLOCK_RE = re.compile(r"```(?:[a-zA-Z0-9_-]+)?\n(.*?)```", re.DOTALL)
+_LINE_COMMENT_RE = re.compile(r"//.*?$", re.MULTILINE)
+_BLOCK_COMMENT_RE = re.compile(r"/\*.*?\*/", re.DOTALL)
+_HEX_RE = re.compile(r"0x[a-fA-F0-9]+")
+_NUMBER_RE = re.compile(r"\b\d+\b")
+_CODE_TOKEN_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|0xHEX|NUM|==|!=|<=|>=|&&|\|\||[{}();.,=<>+\-*/%]")
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+# Everything a scan needs from a finding besides its JSON, computed once when
+# the finding is written to the index. shingles holds one set per snippet.
+@dataclass
+class FindingFeatures:
+    text: str
+    snippets: List[str]
+    shingles: List[FrozenSet[int]]
+    core_mask: int
+
+
+def compute_features(finding: dict) -> FindingFeatures:
+    text = finding_text(finding)
+    snippets = extract_code_snippets(finding)
+    return FindingFeatures(
+        text=text,
+        snippets=snippets,
+        shingles=[code_shingles(snippet) for snippet in snippets],
+        core_mask=core_mask(text),
+    )
+
+
+def finding_text(finding: dict) -> str:
+    parts = [
+        str(finding.get("title") or ""),
+        str(finding.get("description") or ""),
+        str(finding.get("summary") or ""),
+        str(finding.get("tags") or ""),
+        str(finding.get("keywords") or ""),
+    ]
+    return " ".join(parts).lower()
+
+
+def core_mask(lowered: str) -> int:
+    # Bit i is set when CORE_SECURITY_TERMS[i] occurs in the lowered text.
+    mask = 0
+    for bit, term in enumerate(CORE_SECURITY_TERMS):
+        if term in lowered:
+            mask |= 1 << bit
+    return mask
+
+
+def extract_code_snippets(finding: dict) -> List[str]:
+    snippets: List[str] = []
+    # common fields
+    for key in SNIPPET_FIELDS:
+        val = finding.get(key)
+        if not val:
+            continue
+        if isinstance(val, list):
+            for item in val:
+                if isinstance(item, str):
+                    snippets.extend(extract_code_blocks(item))
+        elif isinstance(val, str):
+            snippets.extend(extract_code_blocks(val))
+    return [s for s in snippets if s.strip()]
+
+
+def extract_code_blocks(text: str) -> List[str]:
+    blocks = _CODE_BLOCK_RE.findall(text)
+    return [b.strip() for b in blocks if b.strip()]
+
+
+def normalize_code(text: str) -> str:
+    # Strip comments
+    text = _LINE_COMMENT_RE.sub("", text)
+    text = _BLOCK_COMMENT_RE.sub("", text)
+    # Normalize addresses and hex literals
+    text = _HEX_RE.sub("0xHEX", text)
+    # Normalize numbers
+    text = _NUMBER_RE.sub("NUM", text)
+    return text
+
+
+def code_tokens(text: str) -> List[str]:
+    tokens = _CODE_TOKEN_RE.findall(normalize_code(text))
+    # Normalize identifiers to reduce sensitivity to variable names
+    return ["ID" if _IDENTIFIER_RE.match(t) and t not in CODE_KEYWORDS else t for t in tokens]
+
+
+def token_ngrams(tokens: List[str], n: int = 1) -> List[str]:
+    if len(tokens) < n:
+        return []
+    return [" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+
+
+def code_shingles(text: str) -> FrozenSet[int]:
+    # Token 3-grams hashed to signed 64-bit ints, so they pack into a BLOB and
+    # compare as ints; a collision needs ~2**32 distinct 3-grams to be likely.
+    return frozenset(_hash_gram(gram) for gram in token_ngrams(code_tokens(text), 3))
+
+
+def shingle_similarity(a: FrozenSet[int], b: FrozenSet[int]) -> float:
+    if not a or not b:
+        return 0.0
+    inter = len(a & b)
+    union = len(a | b)
+    return inter / union if union else 0.0
+
+
+def code_similarity(a: str, b: str) -> float:
+    return shingle_similarity(code_shingles(a), code_shingles(b))
+
+
+def encode_shingles(shingles: List[FrozenSet[int]]) -> bytes:
+    # One int64 array: for each snippet its set size, then its sorted hashes.
+    packed = array("q")
+    for group in shingles:
+        packed.append(len(group))
+        packed.extend(sorted(group))
+    return packed.tobytes()
+
+
+def decode_shingles(blob: bytes) -> List[FrozenSet[int]]:
+    packed = array("q")
+    packed.frombytes(blob)
+    groups: List[FrozenSet[int]] = []
+    pos = 0
+    while pos < len(packed):
+        size = packed[pos]
+        groups.append(frozenset(packed[pos + 1:pos + 1 + size]))
+        pos += 1 + size
+    return groups
+
+
+def encode_features(features: FindingFeatures) -> Tuple[str, str, bytes, int]:
+    return (
+        features.text,
+        json.dumps(features.snippets),
+        encode_shingles(features.shingles),
+        features.core_mask,
+    )
+
+
+def decode_features(text: str, snippets_json: str, shingles_blob: bytes, mask: int) -> FindingFeatures:
+    return FindingFeatures(
+        text=text,
+        snippets=json.loads(snippets_json),
+        shingles=decode_shingles(shingles_blob),
+        core_mask=mask,
+    )
+
+
+def _hash_gram(gram: str) -> int:
+    digest = hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
@@ -1,19 +1,110 @@
+import asyncio
 import json
+import math
+import queue
 import sqlite3
+import threading
 import time
-from typing import Iterable, List, Optional
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
+from async_client import AsyncSoloditClient
 from client import SoloditClient
 from config import get_findings_db_path
+from db import ConnectionPool
+from features import (
+    FEATURES_VERSION,
+    FindingFeatures,
+    code_shingles,
+    compute_features,
+    decode_features,
+    decode_shingles,
+    encode_features,
+    shingle_similarity,
+)
+from minhash import BANDS, LSH_MIN_SIMILARITY, LSH_VERSION, lsh_buckets
+import profiling
+
+SCHEMA_VERSION = 3
+FTS_AUTOMERGE_DEFAULT = 4
+INCREMENTAL_SORT_FIELD = "Recency"
+
+# (fts_query, impact, min_quality, limit) for SoloditFindingsIndex.search_many.
+SearchQuery = Tuple[str, Optional[List[str]], Optional[int], int]
+
+
+@dataclass(eq=False)
+class FindingRow:
+    # A hit without its JSON payload: the columns the findings table keeps
+    # outside raw_json, plus the bm25 score for FTS hits (lower is better).
+    # The payload is decoded on first access to .finding; decode many at once
+    # with SoloditFindingsIndex.hydrate.
+    id: int
+    score: Optional[float]
+    title: str
+    impact: str
+    quality_score: str
+    source_link: str
+    firm_name: str
+    loader: Callable[[Iterable[int]], Dict[int, dict]] = field(repr=False)
+    payload: Optional[dict] = field(default=None, repr=False)
+
+    @property
+    def finding(self) -> dict:
+        if self.payload is None:
+            self.payload = self.loader([self.id]).get(self.id) or _fallback_view(
+                self.title, self.impact, self.quality_score, self.source_link, self.firm_name
+            )
+        return self.payload
+
+
+# (findings.id, row handle, features) as returned to scans.
+FeatureRow = Tuple[int, FindingRow, FindingFeatures]
+
+# Rows per IN (...) lookup, well below SQLite's bound-parameter limit.
+LOOKUP_CHUNK = 500
+
+# Bump when what snippet_shingles holds changes; it is rebuilt on open.
+SHINGLE_INDEX_VERSION = 1
+
+
+@dataclass
+class IngestStats:
+    rows: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def add(self, other: "IngestStats") -> None:
+        self.rows += other.rows
+        self.seconds += other.seconds
 
 
 class SoloditFindingsIndex:
     def __init__(self, path: Optional[str] = None) -> None:
         self.path = path or get_findings_db_path()
+        self.ingest_stats = IngestStats()
+        self._pool = ConnectionPool(self.path)
         self._init_db()
 
+    def __enter__(self) -> "SoloditFindingsIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._pool.close()
+
     def _init_db(self) -> None:
-        with sqlite3.connect(self.path) as conn:
+        with self._pool.get() as conn:
             conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS metadata (
@@ -22,81 +113,126 @@ class SoloditFindingsIndex:
                 )
                 """
             )
-            conn.execute(
-                """
-                CREATE VIRTUAL TABLE IF NOT EXISTS findings_fts
-                USING fts5(
-                    title,
-                    description,
-                    tags,
-                    impact UNINDEXED,
-                    quality_score UNINDEXED,
-                    source_link UNINDEXED,
-                    firm_name UNINDEXED,
-                    external_id UNINDEXED,
-                    raw_json UNINDEXED
+            if _is_legacy_schema(conn):
+                _migrate_legacy_schema(conn)
+            _create_schema(conn)
+            row = conn.execute("SELECT value FROM metadata WHERE key = 'features_version'").fetchone()
+            if not row or row[0] != str(FEATURES_VERSION):
+                _backfill_features(conn)
+                conn.execute(
+                    "INSERT OR REPLACE INTO metadata (key, value) VALUES ('features_version', ?)",
+                    (str(FEATURES_VERSION),),
+                )
+            row = conn.execute("SELECT value FROM metadata WHERE key = 'lsh_version'").fetchone()
+            if not row or row[0] != str(LSH_VERSION):
+                _rebuild_lsh(conn)
+                conn.execute(
+                    "INSERT OR REPLACE INTO metadata (key, value) VALUES ('lsh_version', ?)",
+                    (str(LSH_VERSION),),
+                )
+            row = conn.execute("SELECT value FROM metadata WHERE key = 'shingle_index_version'").fetchone()
+            if not row or row[0] != str(SHINGLE_INDEX_VERSION):
+                _rebuild_shingles(conn)
+                conn.execute(
+                    "INSERT OR REPLACE INTO metadata (key, value) VALUES ('shingle_index_version', ?)",
+                    (str(SHINGLE_INDEX_VERSION),),
                 )
-                """
-            )
 
     def get_meta(self, key: str) -> Optional[str]:
-        with sqlite3.connect(self.path) as conn:
-            row = conn.execute("SELECT value FROM metadata WHERE key = ?", (key,)).fetchone()
+        conn = self._pool.get()
+        row = conn.execute("SELECT value FROM metadata WHERE key = ?", (key,)).fetchone()
         return row[0] if row else None
 
     def set_meta(self, key: str, value: str) -> None:
-        with sqlite3.connect(self.path) as conn:
+        with self._pool.get() as conn:
             conn.execute(
                 "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
                 (key, value),
             )
 
-    def upsert_findings(self, findings: Iterable[dict]) -> None:
-        with sqlite3.connect(self.path) as conn:
+    @property
+    def version(self) -> str:
+        return self.get_meta("index_version") or "0"
+
+    def warm(self) -> int:
+        # Read every page a scan touches (FTS segments, stored features,
+        # finding rows) so they sit in the OS page cache, which the mmap'd
+        # connections of every thread share. Returns the bytes read.
+        conn = self._pool.get()
+        total = 0
+        for sql in (
+            "SELECT sum(length(block)) FROM findings_fts_data",
+            "SELECT sum(length(text) + length(snippets) + length(shingles)) FROM finding_features",
+            "SELECT sum(length(raw_json)) FROM findings",
+        ):
+            total += conn.execute(sql).fetchone()[0] or 0
+        return total
+
+    def known_ids(self, external_ids: Iterable[str]) -> Set[str]:
+        ids = list(external_ids)
+        if not ids:
+            return set()
+        placeholders = ",".join("?" for _ in ids)
+        rows = self._pool.get().execute(
+            f"SELECT external_id FROM findings WHERE external_id IN ({placeholders})",
+            ids,
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    def upsert_findings(self, findings: Iterable[dict]) -> IngestStats:
+        started = time.perf_counter()
+        # Normalize, serialize and extract features for the whole batch before
+        # touching the database so the write transaction only runs SQL.
+        rows = []
+        features = []
+        with profiling.stage("index.features") as stage:
             for finding in findings:
-                external_id = finding.get("id") or finding.get("finding_id") or ""
-                title = finding.get("title") or ""
-                description = finding.get("description") or finding.get("summary") or ""
-                tags = finding.get("tags") or finding.get("keywords") or ""
-                if isinstance(tags, list):
-                    tags = " ".join([str(t) for t in tags])
-                impact = finding.get("impact") or ""
-                quality = finding.get("quality_score") or finding.get("qualityScore") or ""
-                source_link = finding.get("source_link") or finding.get("sourceLink") or ""
-                firm = finding.get("firm_name") or finding.get("firmName") or ""
-
-                if external_id:
-                    conn.execute(
-                        "DELETE FROM findings_fts WHERE external_id = ?",
-                        (external_id,),
-                    )
+                row = _finding_row(finding)
+                rows.append(row)
+                features.append(compute_features(_search_view(finding, row)))
+            encoded = [encode_features(item) for item in features]
+            buckets = [_snippet_buckets(item.shingles) for item in features]
+            # The serialized findings, last column of each row.
+            stage.nbytes = sum(len(row[-1]) for row in rows)
+        with profiling.stage("index.write"), self._pool.get() as conn:
+            ids = _upsert_rows(conn, rows)
+            conn.executemany(
+                FEATURES_UPSERT_SQL,
+                [(finding_id, FEATURES_VERSION) + values for finding_id, values in zip(ids, encoded)],
+            )
+            _write_lsh(conn, zip(ids, buckets))
+            _write_shingles(conn, zip(ids, [item.shingles for item in features]))
+            if rows:
+                # Anything derived from search results (e.g. the scan cache) is
+                # keyed by this stamp and goes stale as soon as it changes.
+                conn.execute(
+                    "INSERT OR REPLACE INTO metadata (key, value) VALUES ('index_version', ?)",
+                    (uuid.uuid4().hex,),
+                )
+        stats = IngestStats(rows=len(rows), seconds=time.perf_counter() - started)
+        self.ingest_stats.add(stats)
+        return stats
 
+    @contextmanager
+    def bulk_load(self, *, optimize: bool = True) -> Iterator[IngestStats]:
+        # Incremental FTS segment merging is wasted work during a large load;
+        # suspend it and merge everything once at the end instead.
+        rows_before, seconds_before = self.ingest_stats.rows, self.ingest_stats.seconds
+        loaded = IngestStats()
+        with self._pool.get() as conn:
+            conn.execute("INSERT INTO findings_fts(findings_fts, rank) VALUES ('automerge', 0)")
+        try:
+            yield loaded
+        finally:
+            with self._pool.get() as conn:
                 conn.execute(
-                    """
-                    INSERT INTO findings_fts(
-                        title,
-                        description,
-                        tags,
-                        impact,
-                        quality_score,
-                        source_link,
-                        firm_name,
-                        external_id,
-                        raw_json
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        title,
-                        description,
-                        tags,
-                        impact,
-                        str(quality),
-                        source_link,
-                        firm,
-                        external_id,
-                        json.dumps(finding),
-                    ),
+                    "INSERT INTO findings_fts(findings_fts, rank) VALUES ('automerge', ?)",
+                    (FTS_AUTOMERGE_DEFAULT,),
                 )
+                if optimize:
+                    conn.execute("INSERT INTO findings_fts(findings_fts) VALUES ('optimize')")
+            loaded.rows = self.ingest_stats.rows - rows_before
+            loaded.seconds = self.ingest_stats.seconds - seconds_before
 
     def search(
         self,
@@ -106,59 +242,874 @@ class SoloditFindingsIndex:
         min_quality: Optional[int] = None,
         limit: int = 20,
     ) -> List[dict]:
-        where = []
-        params: List[str] = [query]
-        if impact:
-            placeholders = ",".join("?" for _ in impact)
-            where.append(f"impact IN ({placeholders})")
-            params.extend(impact)
-        if min_quality is not None:
-            where.append("CAST(quality_score AS INTEGER) >= ?")
-            params.append(str(min_quality))
-        where_sql = f"AND {' AND '.join(where)}" if where else ""
-
-        sql = f"""
-            SELECT
-                title, impact, quality_score, source_link, firm_name, raw_json
-            FROM findings_fts
-            WHERE findings_fts MATCH ?
-            {where_sql}
-            ORDER BY bm25(findings_fts)
-            LIMIT ?
-        """
-        params.append(str(limit))
-        with sqlite3.connect(self.path) as conn:
-            rows = conn.execute(sql, params).fetchall()
-        results = []
-        for title, impact_val, quality, link, firm, raw_json in rows:
-            try:
-                raw = json.loads(raw_json)
-            except json.JSONDecodeError:
-                raw = {}
-            if not raw:
-                raw = {
-                    "title": title,
-                    "impact": impact_val,
-                    "quality_score": quality,
-                    "source_link": link,
-                    "firm_name": firm,
-                }
-            results.append(raw)
+        return self.search_many([(query, impact, min_quality, limit)])[0]
+
+    def search_many(self, queries: Sequence[SearchQuery]) -> List[List[dict]]:
+        return self._search_many(queries, SEARCH_SQL, _decode_search_row)
+
+    def search_rows(
+        self,
+        query: str,
+        *,
+        impact: Optional[List[str]] = None,
+        min_quality: Optional[int] = None,
+        limit: int = 20,
+    ) -> List[FindingRow]:
+        return self.search_many_rows([(query, impact, min_quality, limit)])[0]
+
+    def search_many_rows(self, queries: Sequence[SearchQuery]) -> List[List[FindingRow]]:
+        # Same hits as search_many, as handles that leave raw_json unread
+        # until a payload is asked for.
+        return self._search_many(queries, SEARCH_ROWS_SQL, partial(_decode_finding_row, self.hydrate))
+
+    def search_many_with_features(self, queries: Sequence[SearchQuery]) -> List[List[FeatureRow]]:
+        # Same as search_many_rows, with each handle paired with its
+        # findings.id and the features computed when it was written, so scans
+        # never re-derive them.
+        return self._search_many(queries, SEARCH_FEATURES_SQL, partial(_decode_feature_row, self.hydrate))
+
+    def hydrate(self, ids: Iterable[int]) -> Dict[int, dict]:
+        # Full finding payloads by findings.id, decoded in one pass; ids that
+        # are not in the index are left out.
+        conn = self._pool.get()
+        ids = list(dict.fromkeys(ids))
+        found: Dict[int, dict] = {}
+        with profiling.stage("index.hydrate") as stage:
+            for start in range(0, len(ids), LOOKUP_CHUNK):
+                chunk = ids[start:start + LOOKUP_CHUNK]
+                for row in conn.execute(HYDRATE_SQL, (json.dumps(chunk),)):
+                    found[row[0]] = _decode_search_row(row[1:])
+                    stage.nbytes += len(row[-1] or "")
+        return found
+
+    def _search_many(
+        self,
+        queries: Sequence[SearchQuery],
+        sql: str,
+        decode: Callable[[Tuple], Any],
+    ) -> List[List[Any]]:
+        # Every (fts_query, impact, min_quality, limit) tuple runs through the
+        # same statement on one connection, so SQLite compiles it once. Repeated
+        # tuples are only run once; results come back in input order, each in
+        # its own list (duplicates share the decoded rows, not the list).
+        conn = self._pool.get()
+        by_query: Dict[Tuple[str, Optional[Tuple[str, ...]], Optional[int], int], List[Any]] = {}
+        results: List[List[Any]] = []
+        profiler = profiling.active()
+        for query, impact, min_quality, limit in queries:
+            impact_key = tuple(impact) if impact else None
+            dedupe_key = (query, impact_key, min_quality, limit)
+            found = by_query.get(dedupe_key)
+            if found is None:
+                impact_json = json.dumps(list(impact_key)) if impact_key else None
+                started = time.perf_counter() if profiler is not None else 0.0
+                rows = conn.execute(
+                    sql,
+                    (query, impact_json, impact_json, min_quality, min_quality, limit),
+                ).fetchall()
+                if profiler is not None:
+                    fetched = time.perf_counter()
+                    profiler.add("index.fts", fetched - started)
+                    profiler.note("FTS queries", query, fetched - started)
+                found = [decode(row) for row in rows]
+                if profiler is not None:
+                    profiler.add("index.decode", time.perf_counter() - fetched)
+                by_query[dedupe_key] = found
+            results.append(list(found))
+        return results
+
+    def feature_rows(
+        self,
+        ids: Iterable[int],
+        *,
+        impact: Optional[List[str]] = None,
+        min_quality: Optional[int] = None,
+    ) -> Dict[int, FeatureRow]:
+        # Findings by findings.id, with their features; ids that are missing
+        # or fail the filters are left out.
+        impact_json = json.dumps(list(impact)) if impact else None
+        return _fetch_feature_rows(self._pool.get(), self.hydrate, list(ids), impact_json, min_quality)
+
+    def iter_corpus(self) -> Iterator[Tuple[int, str, Optional[int], str]]:
+        # (id, impact, quality, normalized text) for every finding, in id
+        # order; the text is the one the scan filters compare against.
+        conn = self._pool.get()
+        yield from conn.execute(CORPUS_SQL)
+
+    def search_code(
+        self,
+        body: str,
+        *,
+        impact: Optional[List[str]] = None,
+        min_quality: Optional[int] = None,
+        min_shared: int = 1,
+        limit: Optional[int] = 20,
+    ) -> List[FeatureRow]:
+        return self.search_code_many(
+            [code_shingles(body)],
+            impact=impact,
+            min_quality=min_quality,
+            min_shared=min_shared,
+            limit=limit,
+        )[0]
+
+    def search_code_many(
+        self,
+        shingle_sets: Sequence[FrozenSet[int]],
+        *,
+        impact: Optional[List[str]] = None,
+        min_quality: Optional[int] = None,
+        min_shared: int = 1,
+        limit: Optional[int] = 20,
+    ) -> List[List[FeatureRow]]:
+        # Findings sharing at least min_shared code 3-grams with each shingle
+        # set (see features.code_shingles), most shared first; limit None
+        # returns all of them. The counting runs in SQL over the
+        # snippet_shingles postings, so every indexed snippet is considered.
+        conn = self._pool.get()
+        impact_json = json.dumps(list(impact)) if impact else None
+        candidates: Dict[int, FeatureRow] = {}
+        ranked: List[List[int]] = []
+        for shingles in shingle_sets:
+            ids = _code_search_ids(conn, shingles, min_shared, impact_json, min_quality, limit) if shingles else []
+            unseen = [finding_id for finding_id in ids if finding_id not in candidates]
+            candidates.update(_fetch_feature_rows(conn, self.hydrate, unseen, None, None))
+            ranked.append(ids)
+        return [[candidates[finding_id] for finding_id in ids if finding_id in candidates] for ids in ranked]
+
+    def similar_code_many(
+        self,
+        shingle_sets: Sequence[FrozenSet[int]],
+        *,
+        impact: Optional[List[str]] = None,
+        min_quality: Optional[int] = None,
+        min_similarity: float = 0.5,
+        limit: int = 5,
+    ) -> List[List[FeatureRow]]:
+        # Findings with a code snippet similar to each shingle set, best first.
+        # Candidates come from the LSH buckets written at sync time, so the
+        # cost follows the number of near matches rather than the index size.
+        # Below LSH_MIN_SIMILARITY they come from the shingle postings instead:
+        # a snippet at Jaccard t shares at least t * len(shingles) of them.
+        # Either way each candidate is then checked with the exact Jaccard
+        # over its stored shingles.
+        conn = self._pool.get()
+        impact_json = json.dumps(list(impact)) if impact else None
+        candidates: Dict[int, Optional[FeatureRow]] = {}
+        results: List[List[FeatureRow]] = []
+        for shingles in shingle_sets:
+            if not shingles:
+                results.append([])
+                continue
+            if min_similarity >= LSH_MIN_SIMILARITY:
+                buckets = lsh_buckets(shingles)
+                ids = [
+                    row[0]
+                    for row in conn.execute(LSH_CANDIDATES_SQL, [value for bucket in buckets for value in bucket])
+                ]
+            else:
+                min_shared = math.ceil(min_similarity * len(shingles) - 1e-9)
+                ids = _code_search_ids(conn, shingles, min_shared, impact_json, min_quality, None)
+            unseen = [finding_id for finding_id in ids if finding_id not in candidates]
+            for finding_id in unseen:
+                candidates[finding_id] = None
+            candidates.update(_fetch_feature_rows(conn, self.hydrate, unseen, impact_json, min_quality))
+            scored = []
+            for finding_id in ids:
+                candidate = candidates[finding_id]
+                if candidate is None:
+                    continue
+                best = max(
+                    (shingle_similarity(shingles, group) for group in candidate[2].shingles),
+                    default=0.0,
+                )
+                if best >= min_similarity:
+                    scored.append((-best, finding_id, candidate))
+            scored.sort(key=lambda item: item[:2])
+            results.append([candidate for _, _, candidate in scored[:limit]])
         return results
 
 
+# Filters are bound as parameters (NULL disables one) so the SQL text never
+# changes and the statement cache can reuse a single prepared statement.
+SEARCH_SQL = """
+    SELECT
+        f.title, f.impact, f.quality_score, f.source_link, f.firm_name, f.raw_json
+    FROM findings_fts
+    JOIN findings f ON f.id = findings_fts.rowid
+    WHERE findings_fts MATCH ?
+    AND (? IS NULL OR f.impact IN (SELECT value FROM json_each(?)))
+    AND (? IS NULL OR CAST(f.quality_score AS INTEGER) >= ?)
+    ORDER BY bm25(findings_fts)
+    LIMIT ?
+"""
+
+# Everything but raw_json, which is only read when a payload is hydrated.
+ROW_COLUMNS = """
+    f.id, f.title, f.impact, f.quality_score, f.source_link, f.firm_name
+"""
+
+FEATURE_COLUMNS = f"""
+    {ROW_COLUMNS}, ff.text, ff.snippets, ff.shingles, ff.core_mask
+"""
+
+SEARCH_ROWS_SQL = f"""
+    SELECT {ROW_COLUMNS}, bm25(findings_fts)
+    FROM findings_fts
+    JOIN findings f ON f.id = findings_fts.rowid
+    WHERE findings_fts MATCH ?
+    AND (? IS NULL OR f.impact IN (SELECT value FROM json_each(?)))
+    AND (? IS NULL OR CAST(f.quality_score AS INTEGER) >= ?)
+    ORDER BY bm25(findings_fts)
+    LIMIT ?
+"""
+
+SEARCH_FEATURES_SQL = f"""
+    SELECT {FEATURE_COLUMNS}, bm25(findings_fts)
+    FROM findings_fts
+    JOIN findings f ON f.id = findings_fts.rowid
+    LEFT JOIN finding_features ff ON ff.id = f.id
+    WHERE findings_fts MATCH ?
+    AND (? IS NULL OR f.impact IN (SELECT value FROM json_each(?)))
+    AND (? IS NULL OR CAST(f.quality_score AS INTEGER) >= ?)
+    ORDER BY bm25(findings_fts)
+    LIMIT ?
+"""
+
+# Driving the join from the bucket list keeps every lookup on the primary key;
+# a row-value IN (...) makes SQLite scan the whole table instead.
+LSH_CANDIDATES_SQL = f"""
+    SELECT DISTINCT l.finding_id
+    FROM (VALUES {", ".join("(?, ?)" for _ in range(BANDS))}) AS q
+    CROSS JOIN snippet_lsh l ON l.band = q.column1 AND l.bucket = q.column2
+    ORDER BY l.finding_id
+"""
+
+# Postings are counted per finding before the filters join in, so the
+# findings table is only touched once per candidate. LIMIT -1 is no limit.
+CODE_SEARCH_SQL = """
+    SELECT c.finding_id
+    FROM (
+        SELECT s.finding_id, COUNT(*) AS shared
+        FROM json_each(?) AS q
+        CROSS JOIN snippet_shingles s ON s.shingle_hash = q.value
+        GROUP BY s.finding_id
+        HAVING COUNT(*) >= ?
+    ) AS c
+    JOIN findings f ON f.id = c.finding_id
+    WHERE (? IS NULL OR f.impact IN (SELECT value FROM json_each(?)))
+    AND (? IS NULL OR CAST(f.quality_score AS INTEGER) >= ?)
+    ORDER BY c.shared DESC, c.finding_id
+    LIMIT ?
+"""
+
+CANDIDATE_FEATURES_SQL = f"""
+    SELECT {FEATURE_COLUMNS}, NULL
+    FROM findings f
+    LEFT JOIN finding_features ff ON ff.id = f.id
+    WHERE f.id IN (SELECT value FROM json_each(?))
+    AND (? IS NULL OR f.impact IN (SELECT value FROM json_each(?)))
+    AND (? IS NULL OR CAST(f.quality_score AS INTEGER) >= ?)
+"""
+
+CORPUS_SQL = """
+    SELECT
+        f.id,
+        f.impact,
+        CAST(f.quality_score AS INTEGER),
+        COALESCE(ff.text, lower(f.title), '')
+    FROM findings f
+    LEFT JOIN finding_features ff ON ff.id = f.id
+    ORDER BY f.id
+"""
+
+HYDRATE_SQL = """
+    SELECT id, title, impact, quality_score, source_link, firm_name, raw_json
+    FROM findings
+    WHERE id IN (SELECT value FROM json_each(?))
+"""
+
+FEATURES_UPSERT_SQL = """
+    INSERT OR REPLACE INTO finding_features (id, version, text, snippets, shingles, core_mask)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+
+def _decode_search_row(row: Tuple) -> dict:
+    title, impact_val, quality, link, firm, raw_json = row
+    try:
+        raw = json.loads(raw_json)
+    except json.JSONDecodeError:
+        raw = {}
+    if not raw:
+        raw = _fallback_view(title, impact_val, quality, link, firm)
+    return raw
+
+
+def _decode_finding_row(loader: Callable[[Iterable[int]], Dict[int, dict]], row: Tuple) -> FindingRow:
+    # row is ROW_COLUMNS followed by the score.
+    finding_id, title, impact, quality, link, firm = row[:6]
+    return FindingRow(finding_id, row[-1], title, impact, quality, link, firm, loader)
+
+
+def _decode_feature_row(loader: Callable[[Iterable[int]], Dict[int, dict]], row: Tuple) -> FeatureRow:
+    handle = _decode_finding_row(loader, row)
+    if row[6] is None:
+        # Written by something that skipped upsert_findings; derive them now.
+        return handle.id, handle, compute_features(handle.finding)
+    return handle.id, handle, decode_features(*row[6:10])
+
+
+def _code_search_ids(
+    conn: sqlite3.Connection,
+    shingles: FrozenSet[int],
+    min_shared: int,
+    impact_json: Optional[str],
+    min_quality: Optional[int],
+    limit: Optional[int],
+) -> List[int]:
+    rows = conn.execute(
+        CODE_SEARCH_SQL,
+        (
+            json.dumps(sorted(shingles)),
+            max(1, min_shared),
+            impact_json,
+            impact_json,
+            min_quality,
+            min_quality,
+            -1 if limit is None else limit,
+        ),
+    )
+    return [row[0] for row in rows]
+
+
+def _fetch_feature_rows(
+    conn: sqlite3.Connection,
+    loader: Callable[[Iterable[int]], Dict[int, dict]],
+    ids: List[int],
+    impact_json: Optional[str],
+    min_quality: Optional[int],
+) -> Dict[int, FeatureRow]:
+    found: Dict[int, FeatureRow] = {}
+    for start in range(0, len(ids), LOOKUP_CHUNK):
+        chunk = ids[start:start + LOOKUP_CHUNK]
+        rows = conn.execute(
+            CANDIDATE_FEATURES_SQL,
+            (json.dumps(chunk), impact_json, impact_json, min_quality, min_quality),
+        )
+        for row in rows:
+            found[row[0]] = _decode_feature_row(loader, row)
+    return found
+
+
+def _fallback_view(title: str, impact: str, quality: str, link: str, firm: str) -> dict:
+    return {
+        "title": title,
+        "impact": impact,
+        "quality_score": quality,
+        "source_link": link,
+        "firm_name": firm,
+    }
+
+
+def _search_view(finding: dict, row: Tuple) -> dict:
+    # What search returns for this finding once stored; features are computed
+    # from exactly that.
+    if finding:
+        return finding
+    return _fallback_view(row[1], row[4], row[5], row[6], row[7])
+
+
+def _upsert_rows(conn: sqlite3.Connection, rows: List[Tuple]) -> List[int]:
+    # Writes rows in order and returns the findings.id of each. Rows with an
+    # external id go through executemany and are looked up afterwards; rows
+    # without one are always inserts and report their own rowid.
+    ids: List[Optional[int]] = [None] * len(rows)
+    keyed: List[int] = []
+
+    def flush() -> None:
+        if not keyed:
+            return
+        conn.executemany(UPSERT_SQL, [rows[position] for position in keyed])
+        external_ids = list({rows[position][0] for position in keyed})
+        by_external: Dict[str, int] = {}
+        for start in range(0, len(external_ids), LOOKUP_CHUNK):
+            chunk = external_ids[start:start + LOOKUP_CHUNK]
+            placeholders = ",".join("?" for _ in chunk)
+            for finding_id, external_id in conn.execute(
+                f"SELECT id, external_id FROM findings WHERE external_id IN ({placeholders})",
+                chunk,
+            ):
+                by_external[external_id] = finding_id
+        for position in keyed:
+            ids[position] = by_external[rows[position][0]]
+        keyed.clear()
+
+    for position, row in enumerate(rows):
+        if row[0] is None:
+            flush()
+            ids[position] = conn.execute(UPSERT_SQL, row).lastrowid
+        else:
+            keyed.append(position)
+    flush()
+    return ids  # type: ignore[return-value]
+
+
+def _backfill_features(conn: sqlite3.Connection) -> None:
+    # Rows written before the feature table existed, or by an older
+    # FEATURES_VERSION, get their features computed once here.
+    stale = [
+        row[0]
+        for row in conn.execute(
+            """
+            SELECT f.id FROM findings f
+            LEFT JOIN finding_features ff ON ff.id = f.id
+            WHERE ff.id IS NULL OR ff.version != ?
+            """,
+            (FEATURES_VERSION,),
+        )
+    ]
+    for start in range(0, len(stale), LOOKUP_CHUNK):
+        chunk = stale[start:start + LOOKUP_CHUNK]
+        placeholders = ",".join("?" for _ in chunk)
+        rows = conn.execute(
+            f"""
+            SELECT id, title, impact, quality_score, source_link, firm_name, raw_json
+            FROM findings WHERE id IN ({placeholders})
+            """,
+            chunk,
+        ).fetchall()
+        computed = [(row[0], compute_features(_decode_search_row(row[1:]))) for row in rows]
+        conn.executemany(
+            FEATURES_UPSERT_SQL,
+            [(finding_id, FEATURES_VERSION) + encode_features(item) for finding_id, item in computed],
+        )
+        _write_lsh(conn, [(finding_id, _snippet_buckets(item.shingles)) for finding_id, item in computed])
+        _write_shingles(conn, [(finding_id, item.shingles) for finding_id, item in computed])
+
+
+def _snippet_buckets(shingles: List[FrozenSet[int]]) -> Set[Tuple[int, int]]:
+    # Every snippet of a finding goes into its own buckets; a finding is a
+    # candidate when any of its snippets collides.
+    buckets: Set[Tuple[int, int]] = set()
+    for group in shingles:
+        buckets.update(lsh_buckets(group))
+    return buckets
+
+
+def _write_lsh(conn: sqlite3.Connection, entries: Iterable[Tuple[int, Set[Tuple[int, int]]]]) -> None:
+    entries = list(entries)
+    conn.executemany("DELETE FROM snippet_lsh WHERE finding_id = ?", [(finding_id,) for finding_id, _ in entries])
+    conn.executemany(
+        "INSERT OR IGNORE INTO snippet_lsh (band, bucket, finding_id) VALUES (?, ?, ?)",
+        [(band, bucket, finding_id) for finding_id, buckets in entries for band, bucket in buckets],
+    )
+
+
+def _rebuild_lsh(conn: sqlite3.Connection) -> None:
+    # Buckets come from the stored shingles, so a new LSH scheme never has to
+    # re-extract snippets.
+    conn.execute("DELETE FROM snippet_lsh")
+    for chunk in _stored_shingles(conn):
+        _write_lsh(conn, [(finding_id, _snippet_buckets(groups)) for finding_id, groups in chunk])
+
+
+def _write_shingles(conn: sqlite3.Connection, entries: Iterable[Tuple[int, List[FrozenSet[int]]]]) -> None:
+    # One posting per distinct shingle of a finding, across all its snippets.
+    entries = list(entries)
+    conn.executemany("DELETE FROM snippet_shingles WHERE finding_id = ?", [(finding_id,) for finding_id, _ in entries])
+    conn.executemany(
+        "INSERT OR IGNORE INTO snippet_shingles (shingle_hash, finding_id) VALUES (?, ?)",
+        [
+            (shingle, finding_id)
+            for finding_id, groups in entries
+            for shingle in frozenset().union(*groups)
+        ],
+    )
+
+
+def _rebuild_shingles(conn: sqlite3.Connection) -> None:
+    conn.execute("DELETE FROM snippet_shingles")
+    for chunk in _stored_shingles(conn):
+        _write_shingles(conn, chunk)
+
+
+def _stored_shingles(conn: sqlite3.Connection) -> Iterator[List[Tuple[int, List[FrozenSet[int]]]]]:
+    # Chunks of (id, per-snippet shingles) from finding_features, in id order.
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, shingles FROM finding_features WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, LOOKUP_CHUNK),
+        ).fetchall()
+        if not rows:
+            return
+        yield [(finding_id, decode_shingles(blob)) for finding_id, blob in rows]
+        last_id = rows[-1][0]
+
+
+UPSERT_SQL = """
+    INSERT INTO findings(
+        external_id,
+        title,
+        description,
+        tags,
+        impact,
+        quality_score,
+        source_link,
+        firm_name,
+        raw_json
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(external_id) DO UPDATE SET
+        title = excluded.title,
+        description = excluded.description,
+        tags = excluded.tags,
+        impact = excluded.impact,
+        quality_score = excluded.quality_score,
+        source_link = excluded.source_link,
+        firm_name = excluded.firm_name,
+        raw_json = excluded.raw_json
+"""
+
+
+def _external_id(finding: dict) -> str:
+    external_id = finding.get("id") or finding.get("finding_id") or ""
+    return str(external_id) if external_id else ""
+
+
+def _finding_date(finding: dict) -> str:
+    for key in ("report_date", "reportDate", "created_at", "createdAt", "date"):
+        value = finding.get(key)
+        if isinstance(value, str) and value:
+            return value
+    return ""
+
+
+def _finding_row(finding: dict) -> Tuple:
+    external_id = _external_id(finding)
+    title = finding.get("title") or ""
+    description = finding.get("description") or finding.get("summary") or ""
+    tags = finding.get("tags") or finding.get("keywords") or ""
+    if isinstance(tags, list):
+        tags = " ".join([str(t) for t in tags])
+    impact = finding.get("impact") or ""
+    quality = finding.get("quality_score") or finding.get("qualityScore") or ""
+    source_link = finding.get("source_link") or finding.get("sourceLink") or ""
+    firm = finding.get("firm_name") or finding.get("firmName") or ""
+    # Findings without an id are never deduplicated; NULL keeps them out of the unique index.
+    return (
+        external_id or None,
+        title,
+        description,
+        tags,
+        impact,
+        str(quality),
+        source_link,
+        firm,
+        json.dumps(finding),
+    )
+
+
+def _create_schema(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS findings (
+            id INTEGER PRIMARY KEY,
+            external_id TEXT UNIQUE,
+            title TEXT NOT NULL,
+            description TEXT NOT NULL,
+            tags TEXT NOT NULL,
+            impact TEXT NOT NULL,
+            quality_score TEXT NOT NULL,
+            source_link TEXT NOT NULL,
+            firm_name TEXT NOT NULL,
+            raw_json TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS findings_fts
+        USING fts5(
+            title,
+            description,
+            tags,
+            content='findings',
+            content_rowid='id'
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS findings_ai AFTER INSERT ON findings BEGIN
+            INSERT INTO findings_fts(rowid, title, description, tags)
+            VALUES (new.id, new.title, new.description, new.tags);
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS findings_ad AFTER DELETE ON findings BEGIN
+            INSERT INTO findings_fts(findings_fts, rowid, title, description, tags)
+            VALUES ('delete', old.id, old.title, old.description, old.tags);
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS findings_au AFTER UPDATE ON findings BEGIN
+            INSERT INTO findings_fts(findings_fts, rowid, title, description, tags)
+            VALUES ('delete', old.id, old.title, old.description, old.tags);
+            INSERT INTO findings_fts(rowid, title, description, tags)
+            VALUES (new.id, new.title, new.description, new.tags);
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS finding_features (
+            id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            snippets TEXT NOT NULL,
+            shingles BLOB NOT NULL,
+            core_mask INTEGER NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS findings_features_ad AFTER DELETE ON findings BEGIN
+            DELETE FROM finding_features WHERE id = old.id;
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS snippet_lsh (
+            band INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            finding_id INTEGER NOT NULL,
+            PRIMARY KEY (band, bucket, finding_id)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS snippet_lsh_finding ON snippet_lsh(finding_id)")
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS findings_lsh_ad AFTER DELETE ON findings BEGIN
+            DELETE FROM snippet_lsh WHERE finding_id = old.id;
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS snippet_shingles (
+            shingle_hash INTEGER NOT NULL,
+            finding_id INTEGER NOT NULL,
+            PRIMARY KEY (shingle_hash, finding_id)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS snippet_shingles_finding ON snippet_shingles(finding_id)")
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS findings_shingles_ad AFTER DELETE ON findings BEGIN
+            DELETE FROM snippet_shingles WHERE finding_id = old.id;
+        END
+        """
+    )
+    conn.execute(
+        "INSERT OR REPLACE INTO metadata (key, value) VALUES ('schema_version', ?)",
+        (str(SCHEMA_VERSION),),
+    )
+
+
+def _is_legacy_schema(conn: sqlite3.Connection) -> bool:
+    # Before schema_version 2 every column, including external_id and raw_json,
+    # lived directly in the FTS table.
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'findings_fts'"
+    ).fetchone()
+    return bool(row) and "external_id" in row[0]
+
+
+def _migrate_legacy_schema(conn: sqlite3.Connection) -> None:
+    conn.execute("ALTER TABLE findings_fts RENAME TO findings_fts_legacy")
+    _create_schema(conn)
+    # Later rows won over earlier ones in the old delete-then-insert upsert,
+    # so copy in rowid order and let the conflict clause keep the newest copy.
+    rows = conn.execute(
+        """
+        SELECT
+            external_id, title, description, tags, impact,
+            quality_score, source_link, firm_name, raw_json
+        FROM findings_fts_legacy
+        ORDER BY rowid
+        """
+    )
+    conn.executemany(
+        UPSERT_SQL,
+        [((str(row[0]) if row[0] else None),) + tuple(row[1:]) for row in rows.fetchall()],
+    )
+    conn.execute("DROP TABLE findings_fts_legacy")
+
+
 def sync_findings(
     *,
     client: Optional[SoloditClient] = None,
     page_size: int = 100,
     max_pages: Optional[int] = None,
-    sleep_seconds: float = 0.2,
+    sleep_seconds: float = 0.0,
     index: Optional[SoloditFindingsIndex] = None,
     start_page: int = 1,
     resume: bool = False,
+    concurrency: int = 1,
 ) -> int:
+    owns_client = client is None
     client = client or SoloditClient()
     index = index or SoloditFindingsIndex()
+    try:
+        if resume:
+            last_page = index.get_meta("last_synced_page")
+            if last_page and last_page.isdigit():
+                start_page = max(start_page, int(last_page) + 1)
+
+        if concurrency > 1:
+            return _sync_pipelined(
+                client,
+                index,
+                page_size=page_size,
+                max_pages=max_pages,
+                sleep_seconds=sleep_seconds,
+                start_page=start_page,
+                concurrency=concurrency,
+            )
+
+        total = 0
+        page = start_page
+        total_results = None
+        while True:
+            payload = client.findings(
+                filters={},
+                page=page,
+                page_size=page_size,
+            )
+            findings = payload.get("findings", []) or []
+            index.upsert_findings(findings)
+            total += len(findings)
+            index.set_meta("last_synced_page", str(page))
+
+            metadata = payload.get("metadata", {}) or {}
+            if total_results is None:
+                total_results = metadata.get("totalResults")
+
+            if not findings:
+                break
+            if max_pages is not None and page >= max_pages:
+                break
+            if total_results is not None and total >= int(total_results):
+                break
+            page += 1
+            if sleep_seconds > 0:
+                time.sleep(sleep_seconds)
+
+        return total
+    finally:
+        if owns_client:
+            client.close()
+
+
+def sync_incremental(
+    *,
+    client: Optional[SoloditClient] = None,
+    page_size: int = 100,
+    max_pages: Optional[int] = None,
+    sleep_seconds: float = 0.0,
+    index: Optional[SoloditFindingsIndex] = None,
+) -> int:
+    owns_client = client is None
+    client = client or SoloditClient()
+    index = index or SoloditFindingsIndex()
+    try:
+        raw_watermark = index.get_meta("sync_watermark")
+        watermark = json.loads(raw_watermark) if raw_watermark else {}
+        watermark_id = watermark.get("id") or ""
+        watermark_date = watermark.get("date") or ""
+
+        total = 0
+        page = 1
+        newest: Optional[dict] = None
+        complete = True
+        while True:
+            payload = client.findings(
+                filters={"sortField": INCREMENTAL_SORT_FIELD, "sortDirection": "Desc"},
+                page=page,
+                page_size=page_size,
+                use_cache=False,
+            )
+            findings = payload.get("findings", []) or []
+            if not findings:
+                break
+            if newest is None:
+                newest = findings[0]
+
+            # Without a watermark (first incremental run) fall back to whatever the
+            # index already holds; afterwards only the watermark decides, so a run
+            # that was interrupted half-way refetches the gap instead of skipping it.
+            known: Set[str] = set()
+            if not watermark:
+                known = index.known_ids(i for i in map(_external_id, findings) if i)
+            fresh = []
+            reached = False
+            for finding in findings:
+                external_id = _external_id(finding)
+                found_date = _finding_date(finding)
+                if (
+                    (external_id and external_id == watermark_id)
+                    or external_id in known
+                    or (watermark_date and found_date and found_date < watermark_date)
+                ):
+                    reached = True
+                    break
+                fresh.append(finding)
+            index.upsert_findings(fresh)
+            total += len(fresh)
+
+            if reached:
+                break
+            if max_pages is not None and page >= max_pages:
+                # Moving the watermark now would hide the unfetched pages behind it.
+                complete = False
+                break
+            page += 1
+            if sleep_seconds > 0:
+                time.sleep(sleep_seconds)
+
+        if complete and newest is not None:
+            index.set_meta(
+                "sync_watermark",
+                json.dumps({"id": _external_id(newest), "date": _finding_date(newest)}),
+            )
+        return total
+    finally:
+        if owns_client:
+            client.close()
+
+
+async def sync_findings_async(
+    *,
+    client: Optional[AsyncSoloditClient] = None,
+    page_size: int = 100,
+    max_pages: Optional[int] = None,
+    index: Optional[SoloditFindingsIndex] = None,
+    start_page: int = 1,
+    resume: bool = False,
+) -> int:
+    owns_client = client is None
+    client = client or AsyncSoloditClient()
+    index = index or SoloditFindingsIndex()
+    loop = asyncio.get_running_loop()
 
     if resume:
         last_page = index.get_meta("last_synced_page")
@@ -166,30 +1117,160 @@ def sync_findings(
             start_page = max(start_page, int(last_page) + 1)
 
     total = 0
-    page = start_page
-    total_results = None
-    while True:
-        payload = client.findings(
-            filters={},
-            page=page,
-            page_size=page_size,
-        )
-        findings = payload.get("findings", []) or []
-        index.upsert_findings(findings)
-        total += len(findings)
-        index.set_meta("last_synced_page", str(page))
+    last_page = max_pages
+    next_page = start_page
+    pending: Deque[Tuple[int, "asyncio.Task[Any]"]] = deque()
+    try:
+        while True:
+            # Same windowing as the threaded pipeline: fetches run ahead, pages
+            # are written one at a time in order so the checkpoint stays contiguous.
+            while len(pending) < client.concurrency * 2 and (last_page is None or next_page <= last_page):
+                fetch = client.findings(filters={}, page=next_page, page_size=page_size)
+                pending.append((next_page, asyncio.ensure_future(fetch)))
+                next_page += 1
+            if not pending:
+                break
+            page, task = pending.popleft()
+            payload = await task
+            findings = payload.get("findings", []) or []
+            await loop.run_in_executor(None, _write_page, index, page, findings)
+            total += len(findings)
+            if not findings:
+                break
 
-        metadata = payload.get("metadata", {}) or {}
-        if total_results is None:
+            metadata = payload.get("metadata", {}) or {}
             total_results = metadata.get("totalResults")
+            if total_results is not None:
+                page_count = -(-int(total_results) // page_size)
+                last_page = page_count if last_page is None else min(last_page, page_count)
+    finally:
+        tasks = [task for _, task in pending]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if owns_client:
+            await client.aclose()
+
+    return total
+
+
+def _write_page(index: SoloditFindingsIndex, page: int, findings: List[dict]) -> None:
+    index.upsert_findings(findings)
+    index.set_meta("last_synced_page", str(page))
+
+
+class _Pacer:
+    # Spaces request starts at least `interval` seconds apart across all workers.
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def wait(self) -> None:
+        if self.interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_at)
+            self._next_at = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class _PageWriter:
+    # Single writer thread: pages arrive in order and are upserted in batches,
+    # checkpointing last_synced_page after each committed batch.
+    def __init__(self, index: SoloditFindingsIndex, batch_pages: int) -> None:
+        self.index = index
+        self.batch_pages = batch_pages
+        self._queue: "queue.Queue[Optional[Tuple[int, List[dict]]]]" = queue.Queue(maxsize=batch_pages * 4)
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="sync-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, page: int, findings: List[dict]) -> None:
+        if self._error is not None:
+            raise self._error
+        self._queue.put((page, findings))
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            batch = []
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_pages:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            stopping = item is None
+            if not batch or self._error is not None:
+                continue
+            try:
+                self.index.upsert_findings(f for _, findings in batch for f in findings)
+                self.index.set_meta("last_synced_page", str(batch[-1][0]))
+            except BaseException as exc:
+                self._error = exc
+
+
+def _sync_pipelined(
+    client: SoloditClient,
+    index: SoloditFindingsIndex,
+    *,
+    page_size: int,
+    max_pages: Optional[int],
+    sleep_seconds: float,
+    start_page: int,
+    concurrency: int,
+) -> int:
+    pacer = _Pacer(sleep_seconds)
+
+    def fetch(page: int) -> dict:
+        pacer.wait()
+        return client.findings(filters={}, page=page, page_size=page_size)
+
+    total = 0
+    last_page = max_pages
+    next_page = start_page
+    pending: Deque[Tuple[int, Future]] = deque()
+    writer = _PageWriter(index, batch_pages=concurrency)
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="sync-fetch") as pool:
+            try:
+                while True:
+                    # Keep a bounded window of pages in flight; results are consumed
+                    # in page order so the checkpoint only ever covers a contiguous prefix.
+                    while len(pending) < concurrency * 2 and (last_page is None or next_page <= last_page):
+                        pending.append((next_page, pool.submit(fetch, next_page)))
+                        next_page += 1
+                    if not pending:
+                        break
+                    page, future = pending.popleft()
+                    payload = future.result()
+                    findings = payload.get("findings", []) or []
+                    writer.put(page, findings)
+                    total += len(findings)
+                    if not findings:
+                        break
 
-        if not findings:
-            break
-        if max_pages is not None and page >= max_pages:
-            break
-        if total_results is not None and total >= int(total_results):
-            break
-        page += 1
-        time.sleep(sleep_seconds)
+                    metadata = payload.get("metadata", {}) or {}
+                    total_results = metadata.get("totalResults")
+                    if total_results is not None:
+                        page_count = -(-int(total_results) // page_size)
+                        last_page = page_count if last_page is None else min(last_page, page_count)
+            finally:
+                for _, future in pending:
+                    future.cancel()
+    finally:
+        writer.close()
 
     return total
@@ -0,0 +1,51 @@
+import hashlib
+import random
+import struct
+from typing import FrozenSet, List, Optional, Tuple
+
+# 16 bands of 4 rows: two snippets land in a shared bucket with probability
+# 1 - (1 - J**4)**16, about 0.64 at Jaccard 0.5, 0.98 at 0.7 and 0.03 at 0.2.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# Bump when the signature or bucket scheme changes; stored buckets are rebuilt.
+LSH_VERSION = 1
+
+# Below this Jaccard the banding misses too many pairs to be used for lookups
+# (about a third at 0.5, nearly all at 0.2).
+LSH_MIN_SIMILARITY = 0.5
+
+_MASK64 = (1 << 64) - 1
+
+# The shingles are already uniform 64-bit digests, so XOR with a random mask
+# is a good enough permutation for MinHash and about four times cheaper in
+# Python than (a * x + b) mod p. Fixed seed: buckets are persisted and
+# compared across processes.
+_rng = random.Random(0x5EED)
+_MASKS: List[int] = [_rng.getrandbits(64) for _ in range(NUM_PERM)]
+
+
+def signature(shingles: FrozenSet[int]) -> Optional[Tuple[int, ...]]:
+    # One min per permutation over the shingle hashes from
+    # features.code_shingles. None for a snippet too short to shingle.
+    if not shingles:
+        return None
+    values = [x & _MASK64 for x in shingles]
+    return tuple(min([x ^ mask for x in values]) for mask in _MASKS)
+
+
+def band_buckets(sig: Tuple[int, ...]) -> List[Tuple[int, int]]:
+    # (band, bucket) pairs; the bucket is a signed 64-bit digest of the band's
+    # rows so it fits an SQLite INTEGER.
+    buckets = []
+    for band in range(BANDS):
+        rows = sig[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(struct.pack(f"<{ROWS}Q", *rows), digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, "little", signed=True)))
+    return buckets
+
+
+def lsh_buckets(shingles: FrozenSet[int]) -> List[Tuple[int, int]]:
+    sig = signature(shingles)
+    return band_buckets(sig) if sig is not None else []
@@ -0,0 +1,167 @@
+import heapq
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+# Wall time, call counts and bytes per named stage of a scan or sync, plus
+# the slowest items of a few kinds (functions, FTS queries). Stages are
+# dotted ("parse.read", "index.fts") and may nest, so their times overlap.
+# Profiling is off unless start() was called: every hook checks the
+# module-level profiler first and returns at once when there is none, so
+# the hooks stay in the code.
+
+DEFAULT_TOP = 10
+
+
+@dataclass
+class StageStats:
+    seconds: float = 0.0
+    calls: int = 0
+    bytes: int = 0
+
+
+class Profiler:
+    def __init__(self, top: int = DEFAULT_TOP) -> None:
+        self.top = top
+        self.stages: Dict[str, StageStats] = {}
+        # Min-heaps of (seconds, label), so the fastest kept item is dropped
+        # first once a kind holds top entries.
+        self.slowest: Dict[str, List[Tuple[float, str]]] = {}
+        self.started = time.perf_counter()
+        self.seconds: Optional[float] = None
+        # Sync writes from worker threads and matrix scoring runs on a pool.
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float, calls: int = 1, nbytes: int = 0) -> None:
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = StageStats()
+            stats.seconds += seconds
+            stats.calls += calls
+            stats.bytes += nbytes
+
+    def note(self, kind: str, label: str, seconds: float) -> None:
+        if self.top <= 0:
+            return
+        with self._lock:
+            heap = self.slowest.setdefault(kind, [])
+            if len(heap) < self.top:
+                heapq.heappush(heap, (seconds, label))
+            elif seconds > heap[0][0]:
+                heapq.heapreplace(heap, (seconds, label))
+
+    def stop(self) -> None:
+        if self.seconds is None:
+            self.seconds = time.perf_counter() - self.started
+
+    def elapsed(self) -> float:
+        return self.seconds if self.seconds is not None else time.perf_counter() - self.started
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "seconds": round(self.elapsed(), 6),
+                "stages": {
+                    name: {"seconds": round(stats.seconds, 6), "calls": stats.calls, "bytes": stats.bytes}
+                    for name, stats in sorted(self.stages.items())
+                },
+                "slowest": {
+                    kind: [{"label": label, "seconds": round(seconds, 6)} for seconds, label in sorted(heap, reverse=True)]
+                    for kind, heap in sorted(self.slowest.items())
+                },
+            }
+
+    def render(self) -> str:
+        trace = self.to_dict()
+        total = trace["seconds"]
+        lines = [f"Profile: {total:.3f}s wall", ""]
+        lines.append(f"{'stage':<28}{'seconds':>10}{'%':>7}{'calls':>10}{'bytes':>12}")
+        for name, stats in trace["stages"].items():
+            share = 100.0 * stats["seconds"] / total if total > 0 else 0.0
+            size = _format_bytes(stats["bytes"]) if stats["bytes"] else "-"
+            lines.append(f"{name:<28}{stats['seconds']:>10.3f}{share:>7.1f}{stats['calls']:>10}{size:>12}")
+        for kind, items in trace["slowest"].items():
+            lines.append("")
+            lines.append(f"Slowest {kind}:")
+            for item in items:
+                lines.append(f"  {item['seconds']:>8.3f}s  {item['label']}")
+        return "\n".join(lines) + "\n"
+
+
+class _Stage:
+    __slots__ = ("profiler", "name", "nbytes", "started")
+
+    def __init__(self, profiler: Profiler, name: str, nbytes: int) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.nbytes = nbytes
+        self.started = 0.0
+
+    def __enter__(self) -> "_Stage":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.profiler.add(self.name, time.perf_counter() - self.started, nbytes=self.nbytes)
+
+
+class _NullStage:
+    # Shared no-op stage; nbytes reads as 0 and assigning it is ignored.
+    __slots__ = ()
+    nbytes = 0
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+_active: Optional[Profiler] = None
+
+
+def start(top: int = DEFAULT_TOP) -> Profiler:
+    global _active
+    _active = Profiler(top)
+    return _active
+
+
+def stop() -> Optional[Profiler]:
+    global _active
+    profiler, _active = _active, None
+    if profiler is not None:
+        profiler.stop()
+    return profiler
+
+
+def active() -> Optional[Profiler]:
+    return _active
+
+
+def stage(name: str, nbytes: int = 0) -> Any:
+    # with stage("parse.read") as s: ...; s.nbytes = len(data)
+    profiler = _active
+    if profiler is None:
+        return _NULL_STAGE
+    return _Stage(profiler, name, nbytes)
+
+
+def note(kind: str, label: str, seconds: float) -> None:
+    profiler = _active
+    if profiler is not None:
+        profiler.note(kind, label, seconds)
+
+
+def _format_bytes(size: int) -> str:
+    value = float(size)
+    for unit in ("B", "KB", "MB"):
+        if value < 1024:
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GB"
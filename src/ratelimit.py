@@ -0,0 +1,162 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Mapping, Optional
+
+from db import ConnectionPool
+
+# Reset values below this are a number of seconds from now, not an epoch timestamp.
+_EPOCH_THRESHOLD = 1_000_000_000
+# Spacing used while no quota is known (the API has not reported one yet, or
+# its window has passed), so an API that sends no quota is still not hammered.
+DEFAULT_FALLBACK_INTERVAL = 0.2
+
+
+@dataclass
+class RateLimitState:
+    remaining: Optional[int] = None
+    reset_at: Optional[float] = None
+    next_at: float = 0.0
+
+
+class RateLimiter:
+    # Paces requests from the last reported quota: with R requests left until the
+    # window resets at T, request starts are spread (T - now) / R seconds apart,
+    # and nothing is sent once R reaches zero until T has passed. The quota comes
+    # from the X-RateLimit-* headers, or the body's rateLimit object when a
+    # response has no headers; until one is known, starts are fallback_interval
+    # apart. The schedule is
+    # shared by all threads, and by all processes when shared_path points at a
+    # SQLite file (normally the response cache).
+    def __init__(
+        self,
+        *,
+        key: str = "default",
+        shared_path: Optional[str] = None,
+        min_interval: float = 0.0,
+        fallback_interval: float = DEFAULT_FALLBACK_INTERVAL,
+    ) -> None:
+        self.key = key
+        self.min_interval = min_interval
+        self.fallback_interval = fallback_interval
+        self._lock = threading.Lock()
+        self._state = RateLimitState()
+        self._pool: Optional[ConnectionPool] = None
+        if shared_path:
+            self._pool = ConnectionPool(shared_path)
+            with self._pool.get() as conn:
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS rate_limit (
+                        key TEXT PRIMARY KEY,
+                        remaining INTEGER,
+                        reset_at REAL,
+                        next_at REAL NOT NULL
+                    )
+                    """
+                )
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
+
+    def acquire(self) -> float:
+        with self._lock:
+            state = self._load()
+            now = time.time()
+            if state.reset_at is not None and now >= state.reset_at:
+                state.remaining = None
+                state.reset_at = None
+            slot = max(now, state.next_at)
+            interval = self.min_interval
+            if state.remaining is not None and state.reset_at is not None:
+                if state.remaining <= 0:
+                    slot = max(slot, state.reset_at)
+                else:
+                    interval = max(interval, (state.reset_at - slot) / state.remaining)
+                    state.remaining -= 1
+            else:
+                interval = max(interval, self.fallback_interval)
+            state.next_at = slot + interval
+            self._save(state)
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+        return max(0.0, wait)
+
+    def update(self, remaining: Optional[int], reset_at: Optional[float]) -> None:
+        if remaining is None and reset_at is None:
+            return
+        with self._lock:
+            state = self._load()
+            if remaining is not None:
+                # Within one window the server count lags behind requests we have
+                # already scheduled, so never hand back tokens we reserved.
+                same_window = reset_at is None or (
+                    state.reset_at is not None and abs(reset_at - state.reset_at) < 1.0
+                )
+                if same_window and state.remaining is not None:
+                    remaining = min(remaining, state.remaining)
+                state.remaining = remaining
+            if reset_at is not None:
+                state.reset_at = reset_at
+            self._save(state)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> bool:
+        # True when the headers carried any quota information.
+        remaining = _parse_int(headers.get("X-RateLimit-Remaining"))
+        reset_at = _parse_reset(headers.get("X-RateLimit-Reset"))
+        self.update(remaining, reset_at)
+        return remaining is not None or reset_at is not None
+
+    def update_from_body(self, payload: Any) -> None:
+        # {"rateLimit": {"remaining": 19, "limit": 20, "reset": 1700000000}}
+        rate = payload.get("rateLimit") if isinstance(payload, dict) else None
+        if not isinstance(rate, dict):
+            return
+        self.update(_parse_int(rate.get("remaining")), _parse_reset(rate.get("reset")))
+
+    def _load(self) -> RateLimitState:
+        if self._pool is None:
+            return self._state
+        conn = self._pool.get()
+        # Hold the write lock from read to save so processes cannot hand out the same slot.
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT remaining, reset_at, next_at FROM rate_limit WHERE key = ?", (self.key,)
+        ).fetchone()
+        if not row:
+            return RateLimitState()
+        return RateLimitState(remaining=row[0], reset_at=row[1], next_at=row[2])
+
+    def _save(self, state: RateLimitState) -> None:
+        if self._pool is None:
+            self._state = state
+            return
+        conn = self._pool.get()
+        conn.execute(
+            "INSERT OR REPLACE INTO rate_limit (key, remaining, reset_at, next_at) VALUES (?, ?, ?, ?)",
+            (self.key, state.remaining, state.reset_at, state.next_at),
+        )
+        conn.commit()
+
+
+def _parse_int(value: Any) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_reset(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        reset = float(value)
+    except (TypeError, ValueError):
+        return None
+    if reset < _EPOCH_THRESHOLD:
+        reset += time.time()
+    return reset
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config import get_scan_cache_path
+from db import ConnectionPool
+
+
+class ScanCache:
+    # Per-function match results from earlier scans. A key covers the function
+    # name and body, every option that affects matching, and the findings
+    # database and its index version, so a hit is exactly what a fresh query
+    # would return. Rows from other versions of the same database can never hit
+    # again and are pruned on open; rows of other databases are left alone.
+    def __init__(self, index_version: str, db_path: str, path: Optional[str] = None) -> None:
+        self.path = path or get_scan_cache_path()
+        self.index_version = index_version
+        self.db_path = os.path.realpath(db_path)
+        self.hits = 0
+        self.misses = 0
+        dir_path = os.path.dirname(self.path)
+        if dir_path and not os.path.exists(dir_path):
+            os.makedirs(dir_path, exist_ok=True)
+        self._pool = ConnectionPool(self.path)
+        self._init_db()
+
+    def __enter__(self) -> "ScanCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._pool.close()
+
+    def _init_db(self) -> None:
+        with self._pool.get() as conn:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(scan_results)")}
+            if columns and "db_path" not in columns:
+                # Rows written before results were scoped to a database cannot
+                # be attributed to one; they are only a cache, so start over.
+                conn.execute("DROP TABLE scan_results")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scan_results (
+                    key TEXT PRIMARY KEY,
+                    db_path TEXT NOT NULL,
+                    index_version TEXT NOT NULL,
+                    results BLOB NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS scan_results_db ON scan_results (db_path, index_version)")
+            conn.execute(
+                "DELETE FROM scan_results WHERE db_path = ? AND index_version != ?",
+                (self.db_path, self.index_version),
+            )
+
+    def make_key(self, name: str, body: str, options: Dict[str, Any]) -> str:
+        canonical = json.dumps(
+            {
+                "name": name,
+                "body": hashlib.sha256(body.encode("utf-8")).hexdigest(),
+                "options": options,
+                "db_path": self.db_path,
+                "index_version": self.index_version,
+            },
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[dict]]:
+        keys = list(keys)
+        found: Dict[str, List[dict]] = {}
+        conn = self._pool.get()
+        # Stay well below SQLite's bound-parameter limit.
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" for _ in chunk)
+            rows = conn.execute(
+                f"SELECT key, results FROM scan_results WHERE key IN ({placeholders})",
+                chunk,
+            ).fetchall()
+            for key, blob in rows:
+                found[key] = json.loads(zlib.decompress(blob).decode("utf-8"))
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def set_many(self, items: Iterable[Tuple[str, List[dict]]]) -> None:
+        now = time.time()
+        rows = [
+            (key, self.db_path, self.index_version, zlib.compress(json.dumps(results).encode("utf-8")), now)
+            for key, results in items
+        ]
+        with self._pool.get() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO scan_results (key, db_path, index_version, results, created_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
@@ -0,0 +1,216 @@
+import hmac
+import ipaddress
+import json
+import os
+import socket
+import socketserver
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+
+DEFAULT_WORKERS = 4
+MAX_BODY_BYTES = 1 << 20
+# Host header values accepted from clients (with or without a port). Anything
+# else is a browser that was pointed at us by a rebound DNS name.
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "[::1]"}
+
+# A route gets the decoded JSON body (None for GET) and returns the HTTP
+# status and a JSON-serializable payload.
+Route = Callable[[Optional[dict]], Tuple[int, Any]]
+Routes = Dict[Tuple[str, str], Route]
+
+
+def parse_address(address: str) -> Tuple[str, Any]:
+    # ("unix", path) for unix:PATH, otherwise ("tcp", (host, port)).
+    if address.startswith("unix:"):
+        path = address[len("unix:"):]
+        if not path:
+            raise ValueError("Invalid server address 'unix:'. Expected unix:PATH.")
+        return "unix", os.path.expanduser(path)
+    host, sep, port = address.rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError(f"Invalid server address '{address}'. Expected HOST:PORT or unix:PATH.")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_PooledMixIn"
+
+    def do_GET(self) -> None:
+        if self._allowed():
+            self._dispatch(None)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._reply(413, {"error": f"Request body over {MAX_BODY_BYTES} bytes"})
+            return
+        # Read before any rejection: closing with unread input resets the
+        # connection, and the client would lose the error reply.
+        raw = self.rfile.read(length)
+        if not self._allowed():
+            return
+        content_type = (self.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+        if content_type != "application/json":
+            # Browsers can send form and text bodies cross-site without a
+            # preflight, but not JSON.
+            self._reply(415, {"error": "Content-Type must be application/json"})
+            return
+        try:
+            body = json.loads(raw or b"{}")
+        except ValueError:
+            body = None
+        if not isinstance(body, dict):
+            self._reply(400, {"error": "Request body must be a JSON object"})
+            return
+        self._dispatch(body)
+
+    def _allowed(self) -> bool:
+        # The clients are local command-line tools: they send no Origin, name
+        # the server as localhost and, on TCP, carry the shared token.
+        if self.headers.get("Origin") is not None:
+            self._reply(403, {"error": "Cross-origin requests are not allowed"})
+            return False
+        host = (self.headers.get("Host") or "").lower()
+        if host.rsplit(":", 1)[0] not in LOCAL_HOSTS and host not in LOCAL_HOSTS:
+            self._reply(403, {"error": f"Unexpected Host header '{host}'"})
+            return False
+        token = self.server.token
+        if token is not None:
+            supplied = self.headers.get("Authorization") or ""
+            if not hmac.compare_digest(supplied.encode("utf-8"), f"Bearer {token}".encode("utf-8")):
+                self._reply(401, {"error": "Missing or wrong server token"})
+                return False
+        return True
+
+    def _dispatch(self, body: Optional[dict]) -> None:
+        route = self.server.routes.get((self.command, self.path))
+        if route is None:
+            self._reply(404, {"error": f"No route for {self.command} {self.path}"})
+            return
+        try:
+            status, payload = route(body)
+        except Exception as exc:
+            # Reported to the caller; the server keeps serving.
+            status, payload = 500, {"error": f"{type(exc).__name__}: {exc}"}
+        self._reply(status, payload)
+
+    def _reply(self, status: int, payload: Any) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self) -> str:
+        # Unix socket peers have no address.
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class _PooledMixIn:
+    # Requests run on a fixed set of worker threads instead of a new thread
+    # each: the findings index keeps one SQLite connection per thread, so
+    # pooled threads keep their connections (and statement caches) warm.
+    routes: Routes
+    verbose: bool
+    token: Optional[str]
+
+    def _init_pool(self, routes: Routes, workers: int, verbose: bool, token: Optional[str]) -> None:
+        self.routes = routes
+        self.verbose = verbose
+        self.token = token
+        self.requests = 0
+        self._count_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="audit-helper-serve")
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        self._executor.submit(self._process, request, client_address)
+
+    def _process(self, request: Any, client_address: Any) -> None:
+        with self._count_lock:
+            self.requests += 1
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+
+class _TCPServer(_PooledMixIn, HTTPServer):
+    allow_reuse_address = True
+
+
+class _UnixServer(_PooledMixIn, socketserver.UnixStreamServer):
+    def server_close(self) -> None:
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+def create_server(
+    address: str,
+    routes: Routes,
+    *,
+    workers: int = DEFAULT_WORKERS,
+    verbose: bool = False,
+    token: Optional[str] = None,
+) -> socketserver.BaseServer:
+    # Requests make the server read files as its user, so every client must
+    # be that user: a Unix socket only they can open, or a loopback TCP port
+    # plus a token only they know.
+    kind, target = parse_address(address)
+    if kind == "unix":
+        dir_path = os.path.dirname(target)
+        if dir_path and not os.path.exists(dir_path):
+            os.makedirs(dir_path, exist_ok=True)
+        _clear_stale_socket(target)
+        # Created owner-only; no window where others could connect.
+        umask = os.umask(0o177)
+        try:
+            server: Any = _UnixServer(target, _Handler)
+        finally:
+            os.umask(umask)
+    else:
+        if not _is_loopback(target[0]):
+            raise ValueError(f"Refusing to listen on non-loopback host '{target[0]}'")
+        if not token:
+            raise RuntimeError("Listening on TCP needs a token; set SOLODIT_SERVER_TOKEN for the server and its clients")
+        server = _TCPServer(target, _Handler)
+    server._init_pool(routes, workers, verbose, token if kind == "tcp" else None)
+    return server
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host.strip("[]")).is_loopback
+    except ValueError:
+        return False
+
+
+def _clear_stale_socket(path: str) -> None:
+    # A socket file left by a server that died; refuse to take over a live one.
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+    else:
+        raise RuntimeError(f"A server is already listening on {path}")
+    finally:
+        probe.close()
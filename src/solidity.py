@@ -0,0 +1,146 @@
+import re
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+# Comments and string literals are matched as single tokens so braces inside
+# them never reach the depth counters. Everything between tokens is skipped by
+# the regex engine; the lookaheads let it pass over plain code without trying
+# every alternative at each character.
+_COMMENT = r"//[^\n]*|/\*.*?(?:\*/|\Z)"
+_STRING = r"\"(?:[^\"\\\n]|\\.)*\"?|'(?:[^'\\\n]|\\.)*'?"
+
+# Between units: declaration keywords plus the punctuation that ends a header.
+_DECL_RE = re.compile(
+    rf"""
+    (?=[/"'(){{}};fmcr])
+    (?:
+        (?P<skip>{_COMMENT}|{_STRING})
+        |\bfunction\b(?:\s*(?P<function>[A-Za-z_$][A-Za-z0-9_$]*))?
+        |\bmodifier\s+(?P<modifier>[A-Za-z_$][A-Za-z0-9_$]*)
+        |\b(?P<special>constructor|fallback|receive)(?=\s*\()
+        |(?P<punct>[(){{}};])
+    )
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+# Inside a body only braces matter.
+_BODY_RE = re.compile(
+    rf"""
+    (?=[/"'{{}}])
+    (?:(?P<skip>{_COMMENT}|{_STRING})|(?P<punct>[{{}}]))
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+
+@dataclass
+class SolidityUnit:
+    kind: str
+    name: str
+    body: str
+    # Character offsets into the decoded source: start is the keyword, body
+    # starts at the opening brace, end is one past the closing brace.
+    start: int
+    body_start: int
+    end: int
+    start_line: int
+    end_line: int
+
+
+class _LineCounter:
+    # Positions are asked for in increasing order, so counting newlines only
+    # over the gap since the previous call keeps the whole scan linear.
+    def __init__(self, text: str) -> None:
+        self._text = text
+        self._pos = 0
+        self._line = 1
+
+    def at(self, pos: int) -> int:
+        self._line += self._text.count("\n", self._pos, pos)
+        self._pos = pos
+        return self._line
+
+
+def iter_units(text: str) -> Iterator[SolidityUnit]:
+    # Functions, constructors, modifiers, fallback and receive with a body, in
+    # source order. Bodiless declarations (interfaces, abstract functions) and
+    # unnamed function types are skipped.
+    lines = _LineCounter(text)
+    pos = 0
+    pending_kind: Optional[str] = None
+    pending_name = ""
+    pending_start = 0
+    paren_depth = 0
+    while True:
+        match = _DECL_RE.search(text, pos)
+        if match is None:
+            return
+        pos = match.end()
+        group = match.lastgroup
+        if group == "skip":
+            continue
+        if group == "punct":
+            if pending_kind is None:
+                continue
+            ch = match.group()
+            if ch == "(":
+                paren_depth += 1
+            elif ch == ")":
+                paren_depth -= 1
+            elif paren_depth > 0:
+                continue
+            elif ch != "{":
+                # ";" ends a bodiless declaration; a stray "}" means the header
+                # never opened a body.
+                pending_kind = None
+            else:
+                body_start = match.start()
+                end = _skip_body(text, pos)
+                if end < 0:
+                    return
+                yield SolidityUnit(
+                    kind=pending_kind,
+                    name=pending_name,
+                    body=text[body_start:end],
+                    start=pending_start,
+                    body_start=body_start,
+                    end=end,
+                    start_line=lines.at(pending_start),
+                    end_line=lines.at(end - 1),
+                )
+                pending_kind = None
+                pos = end
+            continue
+        # Keywords only open a unit at declaration level; inside a header they
+        # belong to a function-type parameter.
+        if pending_kind is not None or group is None:
+            # A nameless "function" is a function type, not a declaration.
+            continue
+        if group == "special":
+            pending_kind = pending_name = match.group(group)
+        else:
+            pending_kind = group
+            pending_name = match.group(group)
+        pending_start = match.start()
+        paren_depth = 0
+
+
+def _skip_body(text: str, pos: int) -> int:
+    # pos is just past the opening brace; returns the offset one past the
+    # matching close, or -1 if the file ends first.
+    depth = 1
+    for match in _BODY_RE.finditer(text, pos):
+        if match.lastgroup == "skip":
+            continue
+        if match.group() == "{":
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return match.end()
+    return -1
+
+
+def extract_units(text: str) -> List[SolidityUnit]:
+    return list(iter_units(text))
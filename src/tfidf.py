@@ -0,0 +1,283 @@
+import contextlib
+import math
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional: pip install -e ".[matrix]"
+    np = None
+
+from config import get_tfidf_cache_path
+
+# Bump when the weighting or the stored layout changes; older cache files are
+# then rebuilt instead of loaded.
+TFIDF_VERSION = 1
+
+# Dense tiles only span the terms the queries use, so their width follows the
+# scanned code, not the corpus vocabulary. TILE_ELEMENTS bounds one finding
+# tile (about 32 MB as float32); the row caps bound the score block, which is
+# query rows x finding rows.
+TILE_ELEMENTS = 1 << 23
+MIN_TILE_ROWS = 64
+MAX_TILE_ROWS = 4096
+QUERY_TILE_ROWS = 1024
+
+# (id, impact, quality, text) per indexed finding. A missing quality is stored
+# as '' and the corpus query casts it to 0, as the SQL filters do; a None
+# quality (from other row sources) never passes a minimum.
+CorpusRow = Tuple[int, str, Optional[int], str]
+
+
+def available() -> bool:
+    return np is not None
+
+
+def require_numpy() -> None:
+    if np is None:
+        raise RuntimeError('Matrix mode needs numpy: pip install -e ".[matrix]"')
+
+
+# Sublinear tf, smoothed idf, rows scaled to unit length, so a dot product is
+# the cosine similarity. Finding vectors are kept as CSR arrays (row i spans
+# indices[indptr[i]:indptr[i + 1]]).
+@dataclass
+class TfidfMatrix:
+    key: str
+    terms: List[str]
+    idf: Any
+    ids: Any
+    impacts: Any
+    quality: Any
+    indptr: Any
+    indices: Any
+    data: Any
+
+    def __post_init__(self) -> None:
+        self._term_ids: Dict[str, int] = {term: i for i, term in enumerate(self.terms)}
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.ids), len(self.terms)
+
+    def top_k(
+        self,
+        queries: Sequence[Counter],
+        *,
+        k: int,
+        impact: Optional[List[str]] = None,
+        min_quality: Optional[int] = None,
+        jobs: int = 1,
+    ) -> List[List[Tuple[int, float]]]:
+        # For each term-count query, up to k (finding id, cosine) pairs with a
+        # positive score, best first. Finding rows are
+        # processed in blocks, optionally on several threads (the products run
+        # in BLAS, outside the GIL); blocks are merged in order, so the result
+        # does not depend on jobs.
+        results: List[List[Tuple[int, float]]] = [[] for _ in queries]
+        if not queries or k <= 0 or not len(self.ids):
+            return results
+        columns, query_rows = self._query_columns(queries)
+        if not len(columns):
+            return results
+        allowed = self._allowed(impact, min_quality)
+        col_map = np.full(len(self.terms), -1, dtype=np.int64)
+        col_map[columns] = np.arange(len(columns))
+        tile_rows = min(MAX_TILE_ROWS, max(MIN_TILE_ROWS, TILE_ELEMENTS // len(columns)))
+        for q_start in range(0, len(queries), QUERY_TILE_ROWS):
+            q_stop = min(q_start + QUERY_TILE_ROWS, len(queries))
+            dense_queries = self._dense_queries(query_rows[q_start:q_stop], col_map, len(columns))
+            blocks = range(0, len(self.ids), tile_rows)
+            score_block = lambda start: self._block_top_k(
+                dense_queries, col_map, allowed, start, min(start + tile_rows, len(self.ids)), k
+            )
+            if jobs > 1 and len(blocks) > 1:
+                with ThreadPoolExecutor(max_workers=jobs) as pool:
+                    merged = list(pool.map(score_block, blocks))
+            else:
+                merged = [score_block(start) for start in blocks]
+            scores = np.concatenate([block[0] for block in merged], axis=1)
+            rows = np.concatenate([block[1] for block in merged], axis=1)
+            for offset in range(q_stop - q_start):
+                results[q_start + offset] = self._ranked(scores[offset], rows[offset], k)
+        return results
+
+    def _query_columns(self, queries: Sequence[Counter]) -> Tuple[Any, List[Tuple[Any, Any]]]:
+        # Weighted, normalized (columns, values) per query, plus the sorted
+        # union of columns; terms unknown to the corpus carry no idf and drop.
+        query_rows = []
+        used = set()
+        for counts in queries:
+            cols = []
+            weights = []
+            for term, count in counts.items():
+                term_id = self._term_ids.get(term)
+                if term_id is not None and count > 0:
+                    cols.append(term_id)
+                    weights.append((1.0 + math.log(count)) * float(self.idf[term_id]))
+            values = np.asarray(weights, dtype=np.float32)
+            norm = float(np.linalg.norm(values)) if len(values) else 0.0
+            if norm > 0:
+                values /= norm
+            query_rows.append((np.asarray(cols, dtype=np.int64), values))
+            used.update(cols)
+        return np.asarray(sorted(used), dtype=np.int64), query_rows
+
+    def _dense_queries(self, query_rows: List[Tuple[Any, Any]], col_map: Any, width: int) -> Any:
+        dense = np.zeros((len(query_rows), width), dtype=np.float32)
+        for row, (cols, values) in enumerate(query_rows):
+            dense[row, col_map[cols]] = values
+        return dense
+
+    def _allowed(self, impact: Optional[List[str]], min_quality: Optional[int]) -> Optional[Any]:
+        # Same semantics as the SQL filters: impact must be listed, and quality
+        # compares as its integer cast (a missing one counts as 0).
+        allowed = None
+        if impact:
+            allowed = np.isin(self.impacts, list(impact))
+        if min_quality is not None:
+            passing = self.quality >= min_quality
+            allowed = passing if allowed is None else allowed & passing
+        return allowed
+
+    def _block_top_k(
+        self,
+        dense_queries: Any,
+        col_map: Any,
+        allowed: Optional[Any],
+        start: int,
+        stop: int,
+        k: int,
+    ) -> Tuple[Any, Any]:
+        lo, hi = self.indptr[start], self.indptr[stop]
+        cols = col_map[self.indices[lo:hi]]
+        keep = cols >= 0
+        row_of = np.repeat(np.arange(stop - start), np.diff(self.indptr[start:stop + 1]))
+        tile = np.zeros((stop - start, dense_queries.shape[1]), dtype=np.float32)
+        tile[row_of[keep], cols[keep]] = self.data[lo:hi][keep]
+        scores = dense_queries @ tile.T
+        if allowed is not None:
+            scores[:, ~allowed[start:stop]] = 0.0
+        width = min(k, stop - start)
+        if width < stop - start:
+            top = np.argpartition(-scores, width - 1, axis=1)[:, :width]
+        else:
+            top = np.broadcast_to(np.arange(stop - start), scores.shape)
+        return np.take_along_axis(scores, top, axis=1), top + start
+
+    def _ranked(self, scores: Any, rows: Any, k: int) -> List[Tuple[int, float]]:
+        ranked = sorted(
+            (-float(score), int(self.ids[row])) for score, row in zip(scores, rows) if score > 0
+        )
+        return [(finding_id, -neg_score) for neg_score, finding_id in ranked[:k]]
+
+
+def build_matrix(key: str, rows: Iterable[CorpusRow], analyze: Callable[[str], List[str]]) -> TfidfMatrix:
+    require_numpy()
+    term_ids: Dict[str, int] = {}
+    ids: List[int] = []
+    impacts: List[str] = []
+    quality: List[float] = []
+    indptr = [0]
+    indices: List[int] = []
+    tfs: List[float] = []
+    for finding_id, impact, score, text in rows:
+        counts = Counter(analyze(text))
+        for term_id, count in sorted((term_ids.setdefault(term, len(term_ids)), count) for term, count in counts.items()):
+            indices.append(term_id)
+            tfs.append(1.0 + math.log(count))
+        indptr.append(len(indices))
+        ids.append(finding_id)
+        impacts.append(impact or "")
+        quality.append(float("nan") if score is None else float(score))
+    terms = [""] * len(term_ids)
+    for term, term_id in term_ids.items():
+        terms[term_id] = term
+    indices_arr = np.asarray(indices, dtype=np.int64)
+    df = np.bincount(indices_arr, minlength=len(terms))
+    idf = (np.log((1.0 + len(ids)) / (1.0 + df)) + 1.0).astype(np.float32)
+    data = np.asarray(tfs, dtype=np.float32) * idf[indices_arr] if len(indices_arr) else np.zeros(0, np.float32)
+    indptr_arr = np.asarray(indptr, dtype=np.int64)
+    # Normalize each row in place: sum of squares per row via reduceat, which
+    # needs empty rows skipped.
+    lengths = np.diff(indptr_arr)
+    nonempty = lengths > 0
+    if nonempty.any():
+        sums = np.add.reduceat(data * data, indptr_arr[:-1][nonempty])
+        norms = np.ones(len(ids), dtype=np.float32)
+        norms[nonempty] = np.sqrt(sums)
+        data /= np.repeat(norms, lengths)
+    return TfidfMatrix(
+        key=key,
+        terms=terms,
+        idf=idf,
+        ids=np.asarray(ids, dtype=np.int64),
+        impacts=np.asarray(impacts, dtype=str),
+        quality=np.asarray(quality, dtype=np.float64),
+        indptr=indptr_arr,
+        indices=indices_arr,
+        data=data.astype(np.float32),
+    )
+
+
+def load_matrix(key: str, path: Optional[str] = None) -> Optional[TfidfMatrix]:
+    # None when there is no cache file or it was built for another index
+    # version or layout.
+    require_numpy()
+    path = path or get_tfidf_cache_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as stored:
+            if str(stored["key"]) != key:
+                return None
+            return TfidfMatrix(
+                key=key,
+                terms=stored["terms"].tolist(),
+                idf=stored["idf"],
+                ids=stored["ids"],
+                impacts=stored["impacts"],
+                quality=stored["quality"],
+                indptr=stored["indptr"],
+                indices=stored["indices"],
+                data=stored["data"],
+            )
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def save_matrix(matrix: TfidfMatrix, path: Optional[str] = None) -> None:
+    path = path or get_tfidf_cache_path()
+    dir_path = os.path.dirname(path)
+    if dir_path and not os.path.exists(dir_path):
+        os.makedirs(dir_path, exist_ok=True)
+    # Written beside the target and renamed over it, so a concurrent scan
+    # never loads a half-written file.
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as fh:
+            np.savez(
+                fh,
+                key=np.asarray(matrix.key),
+                terms=np.asarray(matrix.terms, dtype=str),
+                idf=matrix.idf,
+                ids=matrix.ids,
+                impacts=matrix.impacts,
+                quality=matrix.quality,
+                indptr=matrix.indptr,
+                indices=matrix.indices,
+                data=matrix.data,
+            )
+        os.replace(tmp_path, path)
+    except BaseException:
+        # open() itself may have failed, leaving nothing to clean up.
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_path)
+        raise
+
+
+def cache_key(index_version: str) -> str:
+    return f"{TFIDF_VERSION}:{index_version}"
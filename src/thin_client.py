@@ -0,0 +1,138 @@
+import argparse
+import http.client
+import json
+import os
+import socket
+import sys
+from typing import Any, List, Optional, Tuple
+
+from config import get_server_address, get_server_token
+from server import parse_address
+
+# Client for `audit-helper serve`. It only imports the standard library, so
+# it starts in a fraction of the time the full CLI needs; scans run in the
+# server against its already-open index.
+
+DEFAULT_TIMEOUT = 600.0
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+
+def _call(address: str, method: str, path: str, body: Optional[dict], timeout: float) -> Any:
+    try:
+        kind, target = parse_address(address)
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+    if kind == "unix":
+        conn: http.client.HTTPConnection = _UnixHTTPConnection(target, timeout)
+    else:
+        conn = http.client.HTTPConnection(*target, timeout=timeout)
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    headers = {"Content-Type": "application/json"} if data is not None else {}
+    token = get_server_token()
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    try:
+        conn.request(method, path, body=data, headers=headers)
+        response = conn.getresponse()
+        payload = json.loads(response.read() or b"null")
+    except (ConnectionRefusedError, FileNotFoundError) as exc:
+        raise SystemExit(f"No audit-helper server at {address} ({exc}). Start one with `audit-helper serve`.")
+    except (OSError, http.client.HTTPException, ValueError) as exc:
+        raise SystemExit(f"Request to {address} failed: {exc}")
+    finally:
+        conn.close()
+    if response.status != 200:
+        error = payload.get("error") if isinstance(payload, dict) else payload
+        raise SystemExit(f"Server error ({response.status}): {error}")
+    return payload
+
+
+def _cmd_scan(args: argparse.Namespace) -> None:
+    # The arguments are parsed by the server, exactly as `audit-helper scan`
+    # would; relative paths are resolved against this directory.
+    result = _call(args.server, "POST", "/scan", {"args": args.args, "cwd": os.getcwd()}, args.timeout)
+    sys.stdout.write(result["stdout"])
+    sys.stderr.write(result["stderr"])
+    sys.stdout.flush()
+    if result["status"]:
+        raise SystemExit(result["status"])
+
+
+def _cmd_search(args: argparse.Namespace) -> None:
+    body = {"query": args.query, "impact": args.impact, "quality_score": args.quality_score, "limit": args.limit}
+    result = _call(args.server, "POST", "/search", body, args.timeout)
+    print(json.dumps(result["findings"], indent=2, sort_keys=True))
+
+
+def _cmd_status(args: argparse.Namespace) -> None:
+    result = _call(args.server, "GET", "/status", None, args.timeout)
+    print(json.dumps(result, indent=2, sort_keys=True))
+
+
+def _split_scan(argv: List[str]) -> Tuple[List[str], List[str]]:
+    # Everything after `scan` goes to the server untouched, including options
+    # such as --help that this parser would otherwise handle or reject.
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg == "scan":
+            return argv[: i + 1], argv[i + 1 :]
+        if arg in ("--server", "--timeout"):
+            i += 2
+        elif arg.startswith("-"):
+            i += 1
+        else:
+            break
+    return argv, []
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Send scan and search requests to a running `audit-helper serve`")
+    parser.add_argument(
+        "--server",
+        default=get_server_address(),
+        help="HOST:PORT or unix:PATH of the server (default: %(default)s, from SOLODIT_SERVER when set)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help=f"Seconds to wait for a response (default: {DEFAULT_TIMEOUT:.0f})",
+    )
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    scan = sub.add_parser(
+        "scan",
+        add_help=False,
+        help="Run `audit-helper scan ARGS` in the server (same arguments and output)",
+    )
+    scan.set_defaults(func=_cmd_scan)
+
+    search = sub.add_parser("search", help="Full-text search of the server's local index")
+    search.add_argument("query", help="FTS5 query")
+    search.add_argument("--impact", action="append", help="Impact filter (repeatable)")
+    search.add_argument("--quality-score", type=int, help="Minimum quality score")
+    search.add_argument("--limit", type=int, default=20, help="Findings to return (default: 20)")
+    search.set_defaults(func=_cmd_search)
+
+    status = sub.add_parser("status", help="Show the server's index version, uptime and request count")
+    status.set_defaults(func=_cmd_status)
+
+    argv, forwarded = _split_scan(sys.argv[1:])
+    args = parser.parse_args(argv)
+    args.args = forwarded
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
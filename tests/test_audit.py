@@ -0,0 +1,53 @@
+from audit import scan_local_index_per_function
+from index import SoloditFindingsIndex
+
+# Two overloads whose bodies hold no keyword tokens, so both run the same
+# FTS query; only the first resembles the snippet finding's code.
+OVERLOADS = """pragma solidity ^0.8.0;
+
+contract Pay {
+    function pay() external {
+        if (true) { return; } else { revert(); }
+        unchecked { }
+    }
+
+    function pay(uint256) external {
+        if (false) { return; }
+    }
+}
+"""
+
+SNIPPET = """{
+        if (true) { return; } else { revert(); }
+        unchecked { }
+    }"""
+
+
+def test_similar_code_matches_stay_with_their_function(tmp_path, monkeypatch):
+    monkeypatch.setenv("SOLODIT_FINDINGS_DB_PATH", str(tmp_path / "findings.sqlite"))
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "Pay.sol").write_text(OVERLOADS)
+    with SoloditFindingsIndex() as index:
+        index.upsert_findings(
+            [
+                {"id": "text", "title": "Reentrancy in withdraw", "description": "A reentrancy bug.", "impact": "HIGH"},
+                {
+                    "id": "snippet",
+                    "title": "Snippet finding",
+                    "description": f"Unusual control flow.\n```solidity\n{SNIPPET}\n```",
+                    "impact": "HIGH",
+                },
+            ]
+        )
+
+    _, results = scan_local_index_per_function(
+        str(tmp_path / "src"),
+        similar_code=True,
+        min_overlap=0,
+        min_core_overlap=0,
+    )
+
+    assert [entry["function"] for entry in results] == ["pay", "pay"]
+    assert results[0]["keywords"] == results[1]["keywords"]
+    assert [f["title"] for f in results[0]["findings"]] == ["Reentrancy in withdraw", "Snippet finding"]
+    assert [f["title"] for f in results[1]["findings"]] == ["Reentrancy in withdraw"]
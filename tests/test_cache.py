@@ -0,0 +1,54 @@
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+import cache as cache_module
+from cache import SoloditCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Strictly increasing timestamps, so access order is unambiguous.
+    ticks = itertools.count(1_000_000)
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(time=lambda: float(next(ticks))))
+
+
+def _cache(tmp_path, eviction):
+    return SoloditCache(str(tmp_path / "cache.sqlite"), memory_entries=0, max_bytes=0, eviction=eviction)
+
+
+def _keys(cache):
+    return {row[0] for row in cache._pool.get().execute("SELECT key FROM cache")}
+
+
+def test_lru_eviction_removes_least_recently_used(tmp_path, clock):
+    with _cache(tmp_path, "lru") as cache:
+        for key in ("a", "b", "c"):
+            cache.set(key, {"payload": key})
+        cache.get("a")
+        cache.get("c")
+        stored = cache.stats().stored_bytes
+
+        assert cache.evict(target_bytes=stored - 1) == 1
+        assert _keys(cache) == {"a", "c"}
+
+
+def test_lfu_eviction_removes_least_frequently_used(tmp_path, clock):
+    with _cache(tmp_path, "lfu") as cache:
+        for key in ("a", "b", "c"):
+            cache.set(key, {"payload": key})
+        for key in ("a", "a", "b", "c", "c"):
+            cache.get(key)
+        stored = cache.stats().stored_bytes
+
+        assert cache.evict(target_bytes=stored - 1) == 1
+        assert _keys(cache) == {"a", "c"}
+
+
+def test_compressed_payloads_round_trip(tmp_path):
+    payload = {"findings": [{"title": "Reentrancy in withdraw", "description": "x" * 4096}]}
+    with _cache(tmp_path, "lru") as cache:
+        cache.set("big", payload)
+        assert cache.stats().stored_bytes < 4096
+        assert cache.get("big").payload == payload
@@ -0,0 +1,85 @@
+import json
+import sys
+
+import pytest
+
+import cli
+from client import SoloditClient
+from index import SoloditFindingsIndex
+
+VAULT = """pragma solidity ^0.8.0;
+
+contract Vault {
+    mapping(address => uint256) balances;
+
+    function withdraw(uint256 amount) external {
+        require(balances[msg.sender] >= amount);
+        (bool ok, ) = msg.sender.call{value: amount}("");
+        balances[msg.sender] -= amount;
+    }
+
+    function setPrice(uint256 price) external {
+        lastPrice = price;
+    }
+}
+"""
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    monkeypatch.setenv("SOLODIT_FINDINGS_DB_PATH", str(tmp_path / "findings.sqlite"))
+    monkeypatch.setenv("SOLODIT_SCAN_CACHE_PATH", str(tmp_path / "scan_cache.sqlite"))
+    with SoloditFindingsIndex() as index:
+        index.upsert_findings(
+            [
+                {
+                    "id": "reentrancy",
+                    "title": "Reentrancy in withdraw",
+                    "description": "withdraw sends the amount to msg.sender before updating balances.",
+                    "impact": "HIGH",
+                },
+                {
+                    "id": "oracle",
+                    "title": "Stale oracle price",
+                    "description": "setPrice accepts any price without checking the oracle.",
+                    "impact": "MEDIUM",
+                },
+            ]
+        )
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "Vault.sol").write_text(VAULT)
+    return tmp_path / "src"
+
+
+@pytest.mark.parametrize(
+    "mode",
+    [
+        ["--per-function", "--min-overlap", "0", "--min-core-overlap", "0"],
+        ["--unique-findings", "5", "--min-overlap", "0", "--min-core-overlap", "0"],
+        [],
+    ],
+)
+def test_jsonl_output_is_one_json_value_per_line(repo, mode, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["audit-helper", "scan", str(repo), "--jsonl", *mode])
+    cli.main()
+
+    lines = capsys.readouterr().out.splitlines()
+    records = [json.loads(line) for line in lines]
+    assert records[0]["sources"] == [str(repo / "Vault.sol")]
+    assert len(records) > 1
+
+
+def test_cached_request_is_counted_in_cache_stats(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("SOLODIT_CACHE_PATH", str(tmp_path / "cache.sqlite"))
+    monkeypatch.setenv("SOLODIT_API_KEY", "test")
+    with SoloditClient() as client:
+        url = client._build_url("/search", {"q": "oracle"})
+        client.cache.set(client.cache.make_key("GET", url, {"q": "oracle"}, None), {"findings": ["cached"]})
+
+    monkeypatch.setattr(sys, "argv", ["audit-helper", "request", "--path", "/search", "--params", "q=oracle"])
+    cli.main()
+    assert json.loads(capsys.readouterr().out) == {"findings": ["cached"]}
+
+    monkeypatch.setattr(sys, "argv", ["audit-helper", "cache-stats"])
+    cli.main()
+    assert "Hits: 1 | Misses: 0" in capsys.readouterr().out
@@ -0,0 +1,62 @@
+import json
+import sqlite3
+
+from index import SoloditFindingsIndex
+
+LEGACY_FINDINGS = [
+    ("f1", "Reentrancy in withdraw", "withdraw calls out before updating balances", "HIGH", "4"),
+    ("f2", "Stale oracle price", "the oracle price is never checked for staleness", "MEDIUM", "3"),
+    ("f3", "Unchecked return", "```solidity\nfunction pay() external { token.transfer(to, amount); }\n```", "LOW", ""),
+]
+
+
+def _write_legacy_db(path):
+    # The schema before findings moved to a keyed table: everything lived in
+    # the FTS table itself.
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE findings_fts USING fts5(
+            title, description, tags,
+            impact UNINDEXED, quality_score UNINDEXED, source_link UNINDEXED,
+            firm_name UNINDEXED, external_id UNINDEXED, raw_json UNINDEXED
+        )
+        """
+    )
+    for external_id, title, description, impact, quality in LEGACY_FINDINGS:
+        finding = {"id": external_id, "title": title, "description": description, "impact": impact}
+        conn.execute(
+            "INSERT INTO findings_fts VALUES (?, ?, '', ?, ?, '', 'Firm', ?, ?)",
+            (title, description, impact, quality, external_id, json.dumps(finding)),
+        )
+    conn.commit()
+    conn.close()
+
+
+def test_legacy_schema_migrates_rows_and_backfills_features(tmp_path):
+    path = str(tmp_path / "findings.sqlite")
+    _write_legacy_db(path)
+
+    with SoloditFindingsIndex(path) as index:
+        conn = index._pool.get()
+        assert conn.execute("SELECT COUNT(*) FROM findings").fetchone()[0] == len(LEGACY_FINDINGS)
+        assert conn.execute("SELECT COUNT(*) FROM finding_features").fetchone()[0] == len(LEGACY_FINDINGS)
+        assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'findings_fts_legacy'").fetchone() is None
+        # Raises if the external-content index disagrees with its table.
+        conn.execute("INSERT INTO findings_fts(findings_fts, rank) VALUES ('integrity-check', 1)")
+
+        assert [f["title"] for f in index.search("oracle")] == ["Stale oracle price"]
+        assert index.known_ids(["f1", "f2", "f3", "f4"]) == {"f1", "f2", "f3"}
+
+    # Opening it again is a no-op.
+    with SoloditFindingsIndex(path) as index:
+        assert index._pool.get().execute("SELECT COUNT(*) FROM findings").fetchone()[0] == len(LEGACY_FINDINGS)
+
+
+def test_upsert_replaces_findings_by_external_id(tmp_path):
+    with SoloditFindingsIndex(str(tmp_path / "findings.sqlite")) as index:
+        index.upsert_findings([{"id": "f1", "title": "Old title", "description": "oracle"}])
+        index.upsert_findings([{"id": "f1", "title": "New title", "description": "oracle"}])
+        assert [f["title"] for f in index.search("oracle")] == ["New title"]
+        index._pool.get().execute("INSERT INTO findings_fts(findings_fts, rank) VALUES ('integrity-check', 1)")
@@ -0,0 +1,48 @@
+import time
+
+from ratelimit import RateLimiter
+
+
+def test_reads_remaining_and_reset_from_headers():
+    limiter = RateLimiter(fallback_interval=0)
+    assert limiter.update_from_headers({"X-RateLimit-Remaining": "19", "X-RateLimit-Reset": "60"})
+    assert limiter._state.remaining == 19
+    # A small reset is seconds from now, not an epoch timestamp.
+    assert abs(limiter._state.reset_at - (time.time() + 60)) < 5
+
+
+def test_reads_epoch_reset_from_headers():
+    limiter = RateLimiter(fallback_interval=0)
+    limiter.update_from_headers({"X-RateLimit-Remaining": "5", "X-RateLimit-Reset": "4102444800"})
+    assert limiter._state.reset_at == 4102444800.0
+
+
+def test_headers_without_quota_change_nothing():
+    limiter = RateLimiter(fallback_interval=0)
+    assert not limiter.update_from_headers({"X-RateLimit-Remaining": "soon"})
+    assert limiter._state.remaining is None
+
+
+def test_reads_quota_from_body():
+    limiter = RateLimiter(fallback_interval=0)
+    limiter.update_from_body({"findings": [], "rateLimit": {"remaining": 7, "limit": 20, "reset": 30}})
+    assert limiter._state.remaining == 7
+    limiter.update_from_body({"findings": []})
+    assert limiter._state.remaining == 7
+
+
+def test_reported_quota_spaces_requests_over_the_window():
+    limiter = RateLimiter(fallback_interval=0)
+    limiter.update_from_headers({"X-RateLimit-Remaining": "10", "X-RateLimit-Reset": "100"})
+    limiter.acquire()
+    # Ten requests left for about 100 seconds: about 10 seconds apart.
+    assert 9 < limiter._state.next_at - time.time() < 11
+    assert limiter._state.remaining == 9
+
+
+def test_spacing_falls_back_until_a_quota_is_known():
+    limiter = RateLimiter(fallback_interval=0.05)
+    started = time.perf_counter()
+    for _ in range(3):
+        limiter.acquire()
+    assert time.perf_counter() - started >= 0.1
@@ -0,0 +1,49 @@
+import json
+import threading
+
+import pytest
+
+from server import create_server
+from thin_client import _UnixHTTPConnection
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    path = str(tmp_path / "serve.sock")
+    server = create_server(f"unix:{path}", {("POST", "/echo"): lambda body: (200, body)}, workers=1)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield path
+    server.shutdown()
+    server.server_close()
+
+
+def _post(path, body, headers):
+    conn = _UnixHTTPConnection(path, timeout=5)
+    try:
+        conn.request("POST", "/echo", body=body, headers=headers)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def test_json_requests_are_served(socket_path):
+    assert _post(socket_path, b'{"a": 1}', {"Content-Type": "application/json"}) == (200, {"a": 1})
+
+
+@pytest.mark.parametrize(
+    "headers, status",
+    [
+        ({"Content-Type": "text/plain"}, 415),
+        ({"Content-Type": "application/json", "Origin": "http://example.com"}, 403),
+        ({"Content-Type": "application/json", "Host": "example.com"}, 403),
+    ],
+)
+def test_browser_style_requests_are_rejected(socket_path, headers, status):
+    assert _post(socket_path, b'{"a": 1}', headers)[0] == status
+
+
+def test_tcp_needs_a_token():
+    with pytest.raises(RuntimeError):
+        create_server("127.0.0.1:0", {})
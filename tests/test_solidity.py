@@ -0,0 +1,51 @@
+from solidity import extract_units
+
+SOURCE = """pragma solidity ^0.8.0;
+
+contract Vault {
+    // function commented() { a brace in a comment
+    /* } function alsoCommented() { */
+    string constant BANNER = "}{ function inString() {";
+
+    function apply(function (uint256) external returns (uint256) f, uint256 x) internal returns (uint256) {
+        string memory closing = "}";
+        bytes1 opening = '{';
+        return f(x); // }
+    }
+
+    modifier onlyOwner() { require(msg.sender == owner, "not {owner}"); _; }
+
+    constructor() { owner = msg.sender; }
+
+    function declared(uint256 a) external;
+
+    receive() external payable {}
+
+    function last() public { if (true) { x = 1; } }
+}
+"""
+
+
+def test_units_ignore_braces_in_strings_and_comments():
+    units = extract_units(SOURCE)
+    assert [(unit.kind, unit.name) for unit in units] == [
+        ("function", "apply"),
+        ("modifier", "onlyOwner"),
+        ("constructor", "constructor"),
+        ("receive", "receive"),
+        ("function", "last"),
+    ]
+
+
+def test_function_type_parameters_do_not_start_a_unit():
+    apply = extract_units(SOURCE)[0]
+    assert apply.body.startswith("{")
+    assert apply.body.endswith("return f(x); // }\n    }")
+    assert (apply.start_line, apply.end_line) == (8, 12)
+
+
+def test_bodies_are_balanced_slices_of_the_source():
+    for unit in extract_units(SOURCE):
+        assert SOURCE[unit.body_start:unit.end] == unit.body
+        assert unit.body.startswith("{") and unit.body.endswith("}")
+    assert extract_units(SOURCE)[-1].body == "{ if (true) { x = 1; } }"